@@ -9,13 +9,7 @@ Available interfaces:
 from pathlib import Path
 import click
 import logging
-from lolibot.cli.commands import (
-    apunta_command,
-    change_context_command,
-    status_command,
-    telegram_command,
-)
-from lolibot.db import init_db
+from lolibot.cli.lazy_group import LazyGroup
 
 
 def configure_logging(verbosity: int):
@@ -47,7 +41,23 @@ def configure_logging(verbosity: int):
             logging.getLogger(lib).setLevel(logging.WARNING)
 
 
-@click.group()
+# Subcommands are imported on demand, so lightweight commands skip heavy frameworks
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands={
+        "agenda": "lolibot.cli.commands.agenda_command",
+        "apunta": "lolibot.cli.commands.apunta_command",
+        "auth": "lolibot.cli.commands.auth_command",
+        "db": "lolibot.cli.commands.db_group",
+        "history": "lolibot.cli.commands.history_command",
+        "replay": "lolibot.cli.commands.replay_command",
+        "search": "lolibot.cli.commands.search_command",
+        "telegram": "lolibot.cli.commands.telegram_command",
+        "status": "lolibot.cli.commands.status_command",
+        "set-context": "lolibot.cli.commands.change_context_command",
+        "warmup": "lolibot.cli.commands.warmup_command",
+    },
+)
 @click.option("-v", "--verbose", count=True, help="Increase verbosity (up to -vvv)")
 @click.option(
     "--config-path",
@@ -62,7 +72,6 @@ def main(ctx, verbose, config_path):
     ctx.obj["config_path"] = config_path
 
     configure_logging(verbose)
-    init_db()
 
     # Load the configuration
     from lolibot.config import BotConfig
@@ -70,12 +79,5 @@ def main(ctx, verbose, config_path):
     ctx.obj["config"] = BotConfig.from_file(config_path)
 
 
-# Add the CLI commands directly
-main.add_command(apunta_command)
-main.add_command(telegram_command)
-main.add_command(status_command)
-main.add_command(change_context_command)
-
-
 if __name__ == "__main__":
     main()
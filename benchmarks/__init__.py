@@ -0,0 +1 @@
+"""Microbenchmarks for lolibot hot paths. Run each module with ``python -m benchmarks.<name>``."""
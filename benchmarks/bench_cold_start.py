@@ -0,0 +1,50 @@
+"""Benchmark for the cold start of a lightweight command.
+
+Runs `loli set-context` in a fresh interpreter under `python -X importtime` and reports the
+cumulative import time from `app` onwards, so interpreter startup is not counted, along with the
+slowest top-level imports.
+
+    python -m benchmarks.bench_cold_start
+"""
+
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+RUNS = 5
+SLOWEST = 10
+
+
+def _import_times(config_path: Path) -> list:
+    """Top-level imports from `app` onwards, as (cumulative microseconds, module) pairs."""
+    script = f"import app; app.main(['--config-path', {str(config_path)!r}, 'set-context', 'personal'], standalone_mode=False)"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).parent.parent,
+        check=True,
+    )
+    top_level = [
+        (int(cumulative), name) for cumulative, name in re.findall(r"^import time:\s+\d+ \|\s+(\d+) \| (\S+)$", result.stderr, re.MULTILINE)
+    ]
+    app_start = [name for _, name in top_level].index("app")
+    return top_level[app_start:]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = Path(tmp) / "config.toml"
+        config_path.write_text('current_context = "work"\n[context.work]\n[context.personal]\n')
+        runs = [_import_times(config_path) for _ in range(RUNS)]
+
+    best = min(runs, key=lambda imports: sum(cumulative for cumulative, _ in imports))
+    print(f"set-context imports: {sum(cumulative for cumulative, _ in best) / 1000:.1f} ms (best of {RUNS})")
+    for cumulative, name in sorted(best, reverse=True)[:SLOWEST]:
+        print(f"{name:<40}{cumulative / 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
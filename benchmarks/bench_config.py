@@ -0,0 +1,67 @@
+"""Microbenchmark for configuration attribute access.
+
+Compares the previous ``__getattribute__``-based lookup against the precomputed
+resolved view and against immutable per-request snapshots.
+
+    python -m benchmarks.bench_config
+"""
+
+import tempfile
+import timeit
+from pathlib import Path
+
+from lolibot.config import BotConfig
+
+CONFIG = """
+bot_name = "BenchBot"
+default_timezone = "Europe/Madrid"
+current_context = "work"
+openai_api_key = "default_key"
+
+[context.work]
+openai_api_key = "work_key"
+"""
+
+NUMBER = 200_000
+
+
+class LegacyConfig(BotConfig):
+    """Previous lookup strategy: try normal lookup, then walk the contexts on every miss."""
+
+    def _resolve(self):
+        pass
+
+    def __getattribute__(self, name):
+        try:
+            return object.__getattribute__(self, name)
+        except AttributeError:
+            contexts = object.__getattribute__(self, "contexts")
+            current_context = object.__getattribute__(self, "current_context")
+            if name in contexts[current_context]:
+                return contexts[current_context][name]
+            elif name in contexts["default"]:
+                return contexts["default"][name]
+        return None
+
+
+def _time(config, attribute: str) -> float:
+    """Return nanoseconds per attribute access."""
+    seconds = min(timeit.repeat(f"config.{attribute}", globals={"config": config}, number=NUMBER, repeat=5))
+    return seconds / NUMBER * 1e9
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = Path(tmp) / "config.toml"
+        config_path.write_text(CONFIG)
+        legacy = LegacyConfig.from_file(config_path)
+        current = BotConfig.from_file(config_path)
+        snapshot = current.snapshot()
+
+    print(f"{'attribute':<24}{'before (ns)':>14}{'after (ns)':>14}{'snapshot (ns)':>16}")
+    for attribute in ["bot_name", "openai_api_key", "default_timezone", "current_context", "missing_key"]:
+        print(f"{attribute:<24}{_time(legacy, attribute):>14.1f}{_time(current, attribute):>14.1f}{_time(snapshot, attribute):>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark for task writes: a commit per task against the group-committing writer thread.
+
+Several threads save tasks at once, as concurrent handlers would, and the time they spend
+blocked on saving is measured.
+
+    python -m benchmarks.bench_db_writer
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from lolibot import db
+from lolibot.db_writer import db_writer
+from lolibot.services import TaskData, TaskResponse
+
+THREADS = 8
+TASKS_PER_THREAD = 250
+
+RESPONSE = TaskResponse(task=TaskData(task_type="task", title="Water the plants", date="2030-01-02"), processed=True)
+
+
+def _inline(i: int):
+    """How tasks were saved before: a connection and a commit each."""
+    conn = sqlite3.connect(db.get_db_path())
+    conn.execute(
+        "INSERT INTO tasks (user_id, message, task_type, task_title, task_description, task_date, task_time, processed) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (str(i), "Water the plants", *RESPONSE.task.db_row(), True),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _queued(i: int):
+    db.save_task_to_db(str(i), "Water the plants", RESPONSE)
+
+
+def _run(save) -> float:
+    def worker(thread: int):
+        for i in range(TASKS_PER_THREAD):
+            save(thread * TASKS_PER_THREAD + i)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as pool:
+        list(pool.map(worker, range(THREADS)))
+    return time.perf_counter() - started
+
+
+def main():
+    tasks = THREADS * TASKS_PER_THREAD
+    print(f"{'writes':<14}{'callers (s)':>14}{'until on disk (s)':>20}{'commits':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DB_PATH"] = os.path.join(directory, "inline.db")
+        db.init_db()
+        seconds = _run(_inline)
+        print(f"{'inline':<14}{seconds:>14.3f}{seconds:>20.3f}{tasks:>10}")
+
+        os.environ["DB_PATH"] = os.path.join(directory, "queued.db")
+        db.init_db()
+        started = time.perf_counter()
+        seconds = _run(_queued)
+        db_writer.flush()
+        on_disk = time.perf_counter() - started
+        print(f"{'group commit':<14}{seconds:>14.3f}{on_disk:>20.3f}{db_writer.stats()['commits']:>10}")
+        db_writer.stop()
+
+
+if __name__ == "__main__":
+    main()
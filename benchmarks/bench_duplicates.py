@@ -0,0 +1,68 @@
+"""Benchmark for near-duplicate lookups as the task history grows.
+
+Fills a scratch database with years of tasks and compares the trigram index lookup against
+scanning every earlier task of the user.
+
+    python -m benchmarks.bench_duplicates
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+import timeit
+from datetime import date, timedelta
+
+from lolibot import db
+from lolibot.db_writer import db_writer
+from lolibot.services import TaskData, TaskResponse
+from lolibot.services.duplicates import DuplicateDetector, DuplicateStats, fingerprint
+
+TASKS_PER_DAY = 10
+YEARS = (1, 3)
+LOOKUPS = 200
+
+WORDS = "call send review meeting report invoice team client dentist gym lunch book plan fix pay renew".split()
+
+
+def _fill(days: int):
+    detector = DuplicateDetector(stats=DuplicateStats())
+    start = date(2030, 1, 1)
+    for day in range(days):
+        task_date = (start + timedelta(days=day)).isoformat()
+        for _ in range(TASKS_PER_DAY):
+            message = " ".join(random.choices(WORDS, k=5))
+            task = TaskData(task_type="task", title=message[:30], date=task_date)
+            detector.save("bench", message, TaskResponse(task=task, processed=True))
+    db_writer.flush()
+    return detector, start
+
+
+def _linear_scan(message: str, task: TaskData):
+    grams = fingerprint(message, task)
+    conn = sqlite3.connect(db.get_db_path())
+    rows = conn.execute("SELECT task_title, message FROM tasks WHERE user_id = ? AND processed", ("bench",)).fetchall()
+    conn.close()
+    for title, earlier in rows:
+        other = fingerprint(earlier, TaskData(task_type="task", title=title))
+        len(grams & other) / len(grams | other)
+
+
+def main():
+    random.seed(42)
+    print(f"{'history':<16}{'tasks':>10}{'index (ms)':>14}{'scan (ms)':>14}")
+    for years in YEARS:
+        with tempfile.TemporaryDirectory() as directory:
+            os.environ["DB_PATH"] = os.path.join(directory, "bench.db")
+            db.init_db()
+            days = years * 365
+            detector, start = _fill(days)
+            task = TaskData(task_type="task", title="call client review", date=(start + timedelta(days=days // 2)).isoformat())
+            message = "call the client to review the report"
+            index_ms = timeit.timeit(lambda: detector.find("bench", message, task), number=LOOKUPS) / LOOKUPS * 1000
+            scan_ms = timeit.timeit(lambda: _linear_scan(message, task), number=5) / 5 * 1000
+            print(f"{f'{years} year(s)':<16}{days * TASKS_PER_DAY:>10}{index_ms:>14.3f}{scan_ms:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
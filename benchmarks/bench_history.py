@@ -0,0 +1,104 @@
+"""Benchmark for /history and /search on a large task table.
+
+Fills a scratch database with a million tasks from a thousand users, then times the first and a
+deep page of history and of full-text searches, and prints the query plans behind them.
+
+    python -m benchmarks.bench_history [ROWS]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+
+from lolibot import db
+from lolibot.services.history import history, match_expression, search
+
+ROWS = 1_000_000
+USERS = 1_000
+REPEAT = 50
+
+WORDS = "call send review meeting report invoice team client dentist gym lunch book plan fix pay renew passport car".split()
+
+
+def _fill(rows: int):
+    random.seed(42)
+    start = datetime(2025, 1, 1)
+    conn = sqlite3.connect(db.get_db_path())
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO tasks (user_id, message, task_type, task_title, task_description, task_date, created_at, processed)
+            VALUES (?, ?, 'task', ?, NULL, ?, ?, 1)
+            """,
+            (
+                (
+                    str(random.randrange(USERS)),
+                    " ".join(random.choices(WORDS, k=8)),
+                    " ".join(random.choices(WORDS, k=3)),
+                    (start + timedelta(days=i // 1000)).date().isoformat(),
+                    (start + timedelta(seconds=i * 30)).isoformat(sep=" "),
+                )
+                for i in range(rows)
+            ),
+        )
+    conn.close()
+
+
+def _ms(fn) -> float:
+    return min(timeit.repeat(fn, number=REPEAT, repeat=3)) / REPEAT * 1000
+
+
+def _plan(sql: str, params: tuple):
+    conn = sqlite3.connect(db.get_db_path())
+    for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+        print(f"    {row[-1]}")
+    conn.close()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DB_PATH"] = os.path.join(directory, "bench.db")
+        db.init_db()
+        print(f"Filling {rows} tasks...")
+        _fill(rows)
+
+        user = "7"
+        # Walk halfway down the user's history, keeping the cursor there
+        page = history(user)
+        for _ in range(rows // USERS // 20):
+            page = history(user, page.cursor)
+        deep_cursor = page.cursor
+        search_page = search(user, "dentist")
+        for _ in range(5):
+            search_page = search(user, "dentist", search_page.cursor)
+
+        print(f"{'query':<28}{'ms':>10}")
+        print(f"{'history, first page':<28}{_ms(lambda: history(user)):>10.3f}")
+        print(f"{'history, deep page':<28}{_ms(lambda: history(user, deep_cursor)):>10.3f}")
+        print(f"{'search, common word':<28}{_ms(lambda: search(user, 'dentist')):>10.3f}")
+        print(f"{'search, deep page':<28}{_ms(lambda: search(user, 'dentist', search_page.cursor)):>10.3f}")
+        print(f"{'search, two words':<28}{_ms(lambda: search(user, 'dentist passport')):>10.3f}")
+
+        print("\nhistory plan:")
+        created_at, task_id = deep_cursor.rsplit("_", 1)
+        _plan(
+            "SELECT id FROM tasks t WHERE t.user_id = ? AND (t.created_at, t.id) < (?, ?) ORDER BY t.created_at DESC, t.id DESC LIMIT 10",
+            (user, created_at.replace("T", " "), int(task_id)),
+        )
+        print("search plan:")
+        _plan(
+            """
+            SELECT t.id FROM tasks_fts JOIN tasks t ON t.id = tasks_fts.rowid
+            WHERE tasks_fts MATCH ? AND tasks_fts.rowid < ? AND t.user_id = ? ORDER BY tasks_fts.rowid DESC LIMIT 10
+            """,
+            (match_expression("dentist"), 2**63 - 1, user),
+        )
+
+
+if __name__ == "__main__":
+    main()
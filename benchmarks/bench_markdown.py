@@ -0,0 +1,43 @@
+"""Benchmark for rendering replies as MarkdownV2.
+
+Compares escaping with one str.replace pass per reserved character against a single
+translate() pass, and times validating and packing a long reply.
+
+    python -m benchmarks.bench_markdown
+"""
+
+import random
+import timeit
+
+from lolibot.services import TaskData, TaskResponse
+from lolibot.telegram.markdown import escape, render
+from lolibot.telegram.message_handler import format_command
+
+RUNS = 2000
+
+TITLES = ["Call mom (re: 5.2k loan)", "Buy milk!", "Review PR #42 - fix_tests", "Dentist @ 10.30", "Pay rent [urgent]"]
+
+
+def _escape_replace(text: str) -> str:
+    for c in set(["_", "*", "[", "]", "(", ")", "~", "`", "#", "+", "-", "=", "|", "{", "}", ".", "!", "<", ">"]):
+        text = text.replace(c, f"\\{c}")
+    return text
+
+
+def main():
+    titles = [random.choice(TITLES) for _ in range(50)]
+    print(f"{'escape':<22}{'per title (µs)':>16}")
+    for name, function in (("replace per char", _escape_replace), ("translate table", escape)):
+        seconds = timeit.timeit(lambda: [function(title) for title in titles], number=RUNS)
+        print(f"{name:<22}{seconds / RUNS / len(titles) * 1e6:>16.2f}")
+
+    responses = [
+        TaskResponse(task=TaskData(task_type="event", title=title, date="2025-05-23", time="12:00"), processed=True) for title in titles
+    ]
+    replies = render(format_command(responses))
+    seconds = timeit.timeit(lambda: render(format_command(responses)), number=RUNS)
+    print(f"\nformat + validate + pack {len(responses)} tasks into {len(replies)} message(s): {seconds / RUNS * 1e6:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
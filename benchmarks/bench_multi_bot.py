@@ -0,0 +1,53 @@
+"""Benchmark for the memory each bot adds to a process serving several of them.
+
+Builds the bots of a configuration with one token per context, as `loli telegram --all-contexts`
+does, without connecting to Telegram, and reports what each one allocated.
+
+    python -m benchmarks.bench_multi_bot
+"""
+
+import os
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from lolibot import db
+from lolibot.config import BotConfig
+from lolibot.services.rate_limit import RateLimiter
+from lolibot.telegram.bot import SHARED_POOL_SIZE, SharedRequest, add_handlers, bots_by_token, create_application
+from lolibot.telegram.host import rss_bytes
+
+BOTS = 8
+
+
+def _config(directory: str) -> BotConfig:
+    contexts = "\n".join(f'[context.bot{i}]\ntelegram_bot_token = "{i + 1}:token"\n' for i in range(BOTS))
+    path = Path(directory) / "config.toml"
+    path.write_text(f'bot_name = "Bench"\nopenai_api_key = "key"\nclaude_api_key = "key"\ngemini_api_key = "key"\n{contexts}')
+    return BotConfig.from_file(path)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DB_PATH"] = os.path.join(directory, "bench.db")
+        db.init_db()
+        config = _config(directory)
+        rate_limiter = RateLimiter(config)
+        request = SharedRequest(connection_pool_size=SHARED_POOL_SIZE)
+        # Kept alive as run_all_telegram_bots keeps them, or each bot is collected before it is measured
+        applications = []
+
+        print(f"{'bot':<6}{'allocated (KiB)':>18}{'resident (KiB)':>18}")
+        tracemalloc.start()
+        for i, contexts in enumerate(bots_by_token(config).values()):
+            allocated_before, rss_before = tracemalloc.get_traced_memory()[0], rss_bytes()
+            application = create_application(config, contexts, rate_limiter, request)
+            add_handlers(application)
+            applications.append(application)
+            allocated = tracemalloc.get_traced_memory()[0] - allocated_before
+            print(f"{i + 1:<6}{allocated / 1024:>18.1f}{(rss_bytes() - rss_before) / 1024:>18.1f}")
+        tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
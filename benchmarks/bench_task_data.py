@@ -0,0 +1,67 @@
+"""Microbenchmark for TaskData construction, copies and memory.
+
+Compares the previous mutable dataclass, copied with ``dataclasses.replace``,
+against the slotted, frozen TaskData and its ``replace``.
+
+    python -m benchmarks.bench_task_data
+"""
+
+import dataclasses
+import sys
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from typing import List, Optional
+
+from lolibot.services import TaskData
+
+NUMBER = 200_000
+OBJECTS = 10_000
+
+FIELDS = dict(task_type="event", title="Standup", description="Daily standup", date="2030-01-02", time="10:00", invitees=[], duration=15)
+
+
+@dataclass()
+class LegacyTaskData:
+    """Previous layout: mutable, with an instance __dict__."""
+
+    task_type: str
+    title: str
+    description: Optional[str] = None
+    date: Optional[str] = None
+    time: Optional[str] = None
+    invitees: Optional[List[str]] = None
+    duration: Optional[int] = None
+
+
+def _time(statement: str, namespace: dict) -> float:
+    """Return nanoseconds per statement."""
+    seconds = min(timeit.repeat(statement, globals=namespace, number=NUMBER, repeat=5))
+    return seconds / NUMBER * 1e9
+
+
+def _bytes_per_object(cls) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [cls(**FIELDS) for _ in range(OBJECTS)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # The list holding the objects is not part of them
+    allocated -= sys.getsizeof(objects)
+    return allocated / OBJECTS
+
+
+def main():
+    legacy = {"cls": LegacyTaskData, "fields": FIELDS, "task": LegacyTaskData(**FIELDS), "replace": dataclasses.replace}
+    current = {"cls": TaskData, "fields": FIELDS, "task": TaskData(**FIELDS)}
+
+    print(f"{'operation':<24}{'before':>14}{'after':>14}")
+    print(f"{'construct (ns)':<24}{_time('cls(**fields)', legacy):>14.1f}{_time('cls(**fields)', current):>14.1f}")
+    legacy_replace, current_replace = _time("replace(task, title='x')", legacy), _time("task.replace(title='x')", current)
+    print(f"{'replace (ns)':<24}{legacy_replace:>14.1f}{current_replace:>14.1f}")
+    print(f"{'memory (bytes/object)':<24}{_bytes_per_object(LegacyTaskData):>14.1f}{_bytes_per_object(TaskData):>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,16 @@
-"""CLI commands for the task manager."""
+"""CLI commands for the task manager.
+
+Heavy dependencies (LLM providers, Google APIs, python-telegram-bot) are imported inside the
+commands that need them, so lightweight commands start fast.
+"""
 
 import logging
+import math
 import click
 
 from lolibot import UserMessage
 from lolibot.config import BotConfig
-from lolibot.services import TaskResponse, processor
-from lolibot.services.status import StatusType, status_service
-from lolibot.telegram.bot import run_telegram_bot
+from lolibot.services import TaskResponse
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +18,7 @@ logger = logging.getLogger(__name__)
 def click_secho_task_response(task_response: TaskResponse):
     # render a nice response using click
     if not task_response.processed:
-        click.secho("Error processing message 👎", fg="red")
+        click.secho(f"{task_response.feedback or 'Error processing message'} 👎", fg="red")
         return
 
     click.secho(f"{task_response.task.task_type.capitalize()} created 👍", fg="green")
@@ -40,7 +43,20 @@ def apunta_command(ctx, text):
     TEXT is your natural language description of what you want to create.
     For example: "Schedule a meeting with John tomorrow at 2pm"
     """
-    config = ctx.obj["config"]
+    from lolibot.db import init_db, load_rate_limit_buckets, save_rate_limit_buckets
+    from lolibot.services import processor
+    from lolibot.services.rate_limit import RateLimiter
+
+    init_db()
+    config = ctx.obj["config"].snapshot()
+
+    # Each CLI run is its own process, so the limiter state lives in the database
+    limiter = RateLimiter(config, load_rate_limit_buckets(["user:cli_user", "chat:cli"]))
+    admission = limiter.admit("cli_user", "cli")
+    save_rate_limit_buckets(limiter.bucket_states())
+    if not admission.admitted:
+        click.secho(f"Too many messages, please wait {math.ceil(admission.retry_after)}s and try again ⏳", fg="yellow")
+        ctx.exit(1)
 
     # Process the text using LLM
     text = " ".join(text)
@@ -54,10 +70,125 @@ def apunta_command(ctx, text):
         click_secho_task_response(task_response)
 
 
+@click.command(name="agenda")
+@click.argument("period", type=click.Choice(["today", "tomorrow", "week"]), default="today")
+@click.option("--sync", is_flag=True, help="Sync the calendar mirror first, e.g. when no bot is running to keep it fresh")
+@click.pass_context
+def agenda_command(ctx, period, sync):
+    """Show upcoming events from the local calendar mirror."""
+    from lolibot.db import init_db, load_calendar_synced_at
+    from lolibot.services.calendar_sync import agenda, calendar_sync
+
+    init_db()
+    config = ctx.obj["config"].snapshot()
+    if sync:
+        state = calendar_sync.sync(config)
+        if state.error:
+            click.secho(f"Could not sync the calendar: {state.error}", fg="red")
+    elif load_calendar_synced_at(config.current_context) is None:
+        click.secho("The calendar was never synced, run `loli agenda --sync` or start the bot", fg="yellow")
+
+    days = agenda(config, period)
+    if not days:
+        click.echo(f"Nothing on the calendar {'this week' if period == 'week' else period} 🎉")
+    for day, events in days:
+        click.secho(f"{day:%a %d %b}", bold=True)
+        for event in events:
+            click.echo(f"  {event.when:<11}  {event.summary}")
+
+
+def click_echo_page(page, more_command: str):
+    for entry in page.entries:
+        mark = click.style("✓", fg="green") if entry.processed else click.style("✗", fg="red")
+        click.echo(f"{mark} {entry.created_at[:16]}  {entry.title or entry.message}")
+    if page.cursor:
+        click.secho(f"\nOlder: {more_command} --before {page.cursor}", fg="blue")
+
+
+@click.command(name="history")
+@click.option("--before", "cursor", help="Cursor printed at the end of the previous page")
+@click.option("--limit", default=10, show_default=True, help="Tasks per page")
+@click.pass_context
+def history_command(ctx, cursor, limit):
+    """List the tasks created from the command line, newest first."""
+    from lolibot.db import init_db
+    from lolibot.services.history import history
+
+    init_db()
+    try:
+        page = history("cli_user", cursor, limit)
+    except ValueError as e:
+        click.secho(str(e), fg="red")
+        ctx.exit(1)
+    if not page.entries:
+        click.echo("No older tasks" if cursor else "No tasks yet")
+    click_echo_page(page, "loli history")
+
+
+@click.command(name="search")
+@click.argument("terms", nargs=-1, required=True)
+@click.option("--before", "cursor", help="Cursor printed at the end of the previous page")
+@click.option("--limit", default=10, show_default=True, help="Tasks per page")
+@click.pass_context
+def search_command(ctx, terms, cursor, limit):
+    """Search the messages, titles and descriptions of the tasks created from the command line."""
+    from lolibot.db import init_db
+    from lolibot.services.history import search
+
+    init_db()
+    terms = " ".join(terms)
+    try:
+        page = search("cli_user", terms, cursor, limit)
+    except ValueError as e:
+        click.secho(str(e), fg="red")
+        ctx.exit(1)
+    if not page.entries:
+        click.echo(f"Nothing {'more ' if cursor else ''}found for '{terms}'")
+    click_echo_page(page, f"loli search {terms}")
+
+
+@click.command(name="auth")
+@click.argument("context", required=False)
+@click.option("--no-browser", is_flag=True, help="Print the login URL instead of opening a browser")
+@click.option("--port", default=0, type=int, help="Local port for the login redirect, e.g. one forwarded over SSH")
+@click.pass_context
+def auth_command(ctx, context, no_browser, port):
+    """Log in to Google for a context (the current one by default)."""
+    from lolibot.google_api import CredentialsError, authorize
+
+    config = ctx.obj["config"]
+    try:
+        outcome = authorize(config.snapshot(context), open_browser=not no_browser, port=port)
+    except (CredentialsError, ValueError) as e:
+        click.secho(str(e), fg="red")
+        ctx.exit(1)
+    for service_name, done in outcome.items():
+        click.secho(f"✅ Google {service_name}: {done}", fg="green")
+
+
+@click.command(name="warmup")
+@click.pass_context
+def warmup_command(ctx):
+    """Open connections and load credentials and caches, reporting how long each took."""
+    from lolibot.services.warmup import warm_up
+
+    config = ctx.obj["config"].snapshot()
+    results = warm_up(config)
+    for result in results:
+        if result.ok:
+            click.secho(f"✅ {result.target}: {result.seconds * 1000:.0f}ms", fg="green")
+        else:
+            click.secho(f"❌ {result.target}: {result.error or 'not reachable'}", fg="red")
+    if not all(result.ok for result in results):
+        ctx.exit(1)
+
+
 @click.command(name="status")
 @click.pass_context
 def status_command(ctx):
     """Check connection status to various services."""
+    from lolibot.services.status import StatusType, status_service
+
     config = ctx.obj["config"]
     status_list = status_service(config)
     for status_item in status_list:
@@ -73,12 +204,127 @@ def status_command(ctx):
             click.secho(f"{status_item.name} (unknown status)", fg="magenta")
 
 
+@click.group(name="db")
+def db_group():
+    """Maintain the tasks database."""
+
+
+@db_group.command(name="compact")
+@click.pass_context
+def db_compact_command(ctx):
+    """Archive tasks past their retention period and rebuild the database to its smallest size."""
+    from lolibot.db import get_archive_path, init_db
+    from lolibot.services.retention import compact
+
+    init_db()
+    result = compact(ctx.obj["config"])
+    click.secho(f"Archived {result.archived} tasks to {get_archive_path()}", fg="green")
+    click.secho(f"Database size: {result.size_before / 1024:.0f} KiB -> {result.size_after / 1024:.0f} KiB", fg="green")
+
+
+@db_group.command(name="stats")
+@click.option("--user", "user_id", default="cli_user", show_default=True, help="Whose tasks to count")
+@click.option("--since", default="0000-00-00", help="First day to show, YYYY-MM-DD")
+def db_stats_command(user_id, since):
+    """Per-day counts of the archived tasks, kept in the working database."""
+    from lolibot.db import init_db, load_daily_stats
+
+    init_db()
+    rows = load_daily_stats(user_id, since)
+    if not rows:
+        click.echo("No archived tasks")
+        return
+    click.echo(f"{'day':<12}{'type':<10}{'created':>8}{'total':>8}")
+    for day, task_type, total, processed in rows:
+        click.echo(f"{day:<12}{task_type or '-':<10}{processed:>8}{total:>8}")
+    click.echo(f"{'':<22}{sum(row[3] for row in rows):>8}{sum(row[2] for row in rows):>8}")
+
+
+@db_group.command(name="archived")
+@click.argument("day")
+@click.option("--user", "user_id", help="Only the tasks of this user")
+def db_archived_command(day, user_id):
+    """List the archived tasks created on DAY (YYYY-MM-DD)."""
+    from lolibot.db import load_archived_tasks
+
+    tasks = [task for task in load_archived_tasks(day) if user_id is None or task["user_id"] == user_id]
+    if not tasks:
+        click.echo(f"No archived tasks on {day}")
+        return
+    for task in tasks:
+        title = task["task_title"] or task["message"]
+        click.echo(f"{'✅' if task['processed'] else '❌'} {task['created_at'][11:16]} {task['user_id']}: {title}")
+
+
+def _ms(value) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+def _share(value) -> str:
+    return "-" if value is None else f"{value:.0%}"
+
+
+@click.command(name="replay")
+@click.option("--target", "targets", multiple=True, help="provider[:model] to replay against, e.g. openai:gpt-4.1-mini; repeatable")
+@click.option("--sample", "sample_size", default=50, show_default=True, help="How many stored tasks to replay")
+@click.option("--user", "user_id", help="Only replay the tasks of this user")
+@click.option("--workers", default=4, show_default=True, help="Replays running at once")
+@click.pass_context
+def replay_command(ctx, targets, sample_size, user_id, workers):
+    """Re-run stored messages against providers and compare with the stored tasks.
+
+    Nothing is created in Google. Without --target, every enabled provider is replayed with its configured model.
+    """
+    from lolibot.db import init_db
+    from lolibot.services.replay import COMPARED_FIELDS, Target, default_targets, load_samples, replay, stored_report, stored_sources
+
+    init_db()
+    config = ctx.obj["config"].snapshot()
+    try:
+        targets = [Target.parse(spec) for spec in targets] or default_targets(config)
+    except ValueError as e:
+        click.secho(str(e), fg="red")
+        ctx.exit(1)
+    if not targets:
+        click.secho("No provider is enabled, pass --target regex to replay the regex parser", fg="yellow")
+        ctx.exit(1)
+    samples = load_samples(sample_size, user_id)
+    if not samples:
+        click.echo("No stored tasks to replay")
+        return
+
+    sources = ", ".join(
+        f"{provider or '?'} {model or ''} v{version or '?'} ({count})"
+        for (provider, model, version), count in stored_sources(samples).most_common()
+    )
+    click.echo(f"Replaying {len(samples)} tasks, stored from: {sources}\n")
+    header = (
+        f"{'target':<32}{'failed':>7}{'p50 ms':>8}{'p90 ms':>8}{'p99 ms':>8}"
+        + "".join(f"{name:>10}" for name in COMPARED_FIELDS)
+        + f"{'all':>7}"
+    )
+    click.secho(header, bold=True)
+    for report in [stored_report(samples), *replay(config, samples, targets, workers)]:
+        name = str(report.target) if report.model is None or report.target.model else f"{report.target}:{report.model}"
+        line = f"{name:<32}{report.failed:>7}" + "".join(f"{_ms(report.percentile(q)):>8}" for q in (0.5, 0.9, 0.99))
+        line += "".join(f"{_share(report.agreement(field)):>10}" for field in COMPARED_FIELDS) + f"{_share(report.agreement()):>7}"
+        click.echo(line)
+
+
 @click.command(name="telegram")
+@click.option("--all-contexts", is_flag=True, help="Serve the bot of every context with its own token, all from this process")
 @click.pass_context
-def telegram_command(ctx):
+def telegram_command(ctx, all_contexts):
     """Start the Telegram bot."""
+    from lolibot.db import init_db
+    from lolibot.telegram.bot import run_all_telegram_bots, run_telegram_bot
+
+    init_db()
     config = ctx.obj["config"]
-    run_telegram_bot(config=config)
+    if all_contexts:
+        run_all_telegram_bots(config=config)
+    else:
+        run_telegram_bot(config=config)
 
 
 @click.command("set-context")
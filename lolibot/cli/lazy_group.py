@@ -0,0 +1,35 @@
+"""Click group that imports its subcommands only when they are invoked."""
+
+import importlib
+from typing import Dict, Optional
+
+import click
+
+
+class LazyGroup(click.Group):
+    """A click group whose subcommands are declared as import paths.
+
+    ``lazy_subcommands`` maps a command name to ``"package.module.attribute"``. The module is only
+    imported when that command is resolved, so running one subcommand never pays the import cost
+    of the others.
+    """
+
+    def __init__(self, *args, lazy_subcommands: Optional[Dict[str, str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx: click.Context) -> list:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_subcommands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name in self.lazy_subcommands:
+            return self._lazy_load(cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def _lazy_load(self, cmd_name: str) -> click.Command:
+        import_path = self.lazy_subcommands[cmd_name]
+        module_name, attribute = import_path.rsplit(".", 1)
+        command = getattr(importlib.import_module(module_name), attribute)
+        if not isinstance(command, click.Command):
+            raise ValueError(f"Lazy loading of '{import_path}' did not return a click command")
+        return command
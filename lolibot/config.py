@@ -1,7 +1,9 @@
 """Configuration module ."""
 
+import copy
 from dataclasses import dataclass
 import logging
+from types import MappingProxyType
 from typing import Optional
 import tomli
 from pathlib import Path
@@ -23,6 +25,94 @@ class Config:
     # current configuration contexts
     contexts: dict = None
 
+    # Setting any of these attributes re-flattens the resolved view
+    _RESOLVE_ON = ("current_context", "contexts")
+
+    def __setattr__(self, name, value):
+        if self.__dict__.get("_frozen", False):
+            raise AttributeError(f"Cannot set '{name}': configuration snapshots are read-only.")
+        super().__setattr__(name, value)
+        if name == "contexts":
+            # A reloaded configuration makes every snapshot taken so far stale
+            self.__dict__["_snapshots"] = {}
+        if name in self._RESOLVE_ON and "current_context" in self.__dict__ and "contexts" in self.__dict__:
+            self._resolve()
+
+    def _resolve(self):
+        """Flatten the default and current contexts into a single read-only view.
+
+        Resolved keys are also installed in the instance dict, so reading them is a plain attribute
+        access. Keys shadowed by fields, properties or methods stay reachable through the view.
+        """
+        contexts = self.contexts or {}
+        resolved = dict(contexts.get("default", {}))
+        if self.current_context != "default":
+            resolved.update(contexts.get(self.current_context, {}))
+
+        cls = type(self)
+        installed = {
+            key: value
+            for key, value in resolved.items()
+            if not key.startswith("_") and key not in self.__dataclass_fields__ and not hasattr(cls, key)
+        }
+        stale = self.__dict__.get("_installed", frozenset()) - installed.keys()
+
+        # New values go in before stale ones go away, so readers never miss a key present in both
+        self.__dict__.update(installed)
+        for key in stale:
+            del self.__dict__[key]
+        self.__dict__["_installed"] = frozenset(installed)
+        self.__dict__["_resolved"] = MappingProxyType(resolved)
+
+    def __getattr__(self, name):
+        # Only reached for keys missing from every context, which resolve to None
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._resolved.get(name)
+
+    def __getstate__(self):
+        # The resolved view is derived data, and mapping proxies cannot be pickled
+        state = dict(self.__dict__)
+        state.pop("_resolved", None)
+        state.pop("_snapshots", None)
+        if isinstance(state.get("contexts"), MappingProxyType):
+            state["contexts"] = dict(state["contexts"])
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._resolve()
+
+    def snapshot(self, context: Optional[str] = None) -> "Config":
+        """Return an immutable copy of this configuration, bound to the current context.
+
+        Snapshots are meant to be handed to a single request, so it can read the configuration
+        without locking while the shared object switches context. Passing `context` binds the
+        snapshot to that context instead of the current one.
+
+        A snapshot owns a deep copy of the contexts, so it never changes under its readers. There
+        is one per context until the contexts are reloaded, and taking it again returns that one.
+        """
+        context = self.current_context if context is None else context
+        if self.__dict__.get("_frozen", False) and context == self.current_context:
+            return self
+        snapshots = self.__dict__.setdefault("_snapshots", {})
+        snapshot = snapshots.get(context)
+        if snapshot is None:
+            if context != self.current_context and context not in self.contexts:
+                raise ValueError(f"Context '{context}' not found in available contexts.")
+            snapshot = object.__new__(type(self))
+            snapshot.__dict__.update(
+                current_context=context,
+                config_path=self.config_path,
+                contexts=MappingProxyType(copy.deepcopy(dict(self.contexts or {}))),
+            )
+            snapshot._resolve()
+            snapshot.__dict__["_frozen"] = True
+            # Concurrent callers may both build one; they all get whichever was stored first
+            snapshot = snapshots.setdefault(context, snapshot)
+        return snapshot
+
     @property
     def available_contexts(self) -> list:
         return [c for c in self.contexts.keys() if c != "default"]
@@ -85,25 +175,6 @@ class Config:
         self.current_context = new_context
         self.to_file()
 
-    def __getattribute__(self, name):
-        try:
-            # First try normal attribute lookup
-            return super().__getattribute__(name)
-        except AttributeError:
-            # If that fails, try our dynamic config lookup
-            contexts = super().__getattribute__("contexts")
-            current_context = super().__getattribute__("current_context")
-
-            # Check if the attribute exists in the current context
-            if name in contexts[current_context]:
-                return contexts[current_context][name]
-            # Check if the attribute exists in the default context
-            elif name in contexts["default"]:
-                return contexts["default"][name]
-
-        # phew----
-        return None
-
 
 class BotConfig(Config):
     """Bot configuration loaded from TOML file."""
@@ -111,7 +182,7 @@ class BotConfig(Config):
     @property
     def default_event_duration(self) -> int:
         """Get the default event duration in minutes."""
-        return self.contexts[self.current_context].get("default_event_duration", 30)
+        return self._resolved.get("default_event_duration", 30)
 
     @property
     def version(self) -> str:
@@ -1,9 +1,14 @@
 """Database handling module for the Task Manager Bot."""
 
 import logging
+import json
 import sqlite3
 import os
+import time
+import zlib
+from concurrent.futures import Future
 
+from lolibot.db_writer import db_writer
 from lolibot.services import TaskResponse
 
 logger = logging.getLogger(__name__)
@@ -14,13 +19,15 @@ def get_db_path():
     return os.getenv("DB_PATH", "./taskbot.db")
 
 
-def init_db():
-    """Initialize the SQLite database."""
-    conn = sqlite3.connect(get_db_path())
-    cursor = conn.cursor()
-    logger.debug("Initializing database...")
-    cursor.execute(
-        """
+def get_archive_path():
+    """Get the path to the archive database, next to the working one unless ARCHIVE_DB_PATH is set."""
+    root, extension = os.path.splitext(get_db_path())
+    return os.getenv("ARCHIVE_DB_PATH", f"{root}.archive{extension}")
+
+
+# Schema migrations, applied in order. The database stores how many have run in PRAGMA user_version.
+MIGRATIONS = [
+    """
     CREATE TABLE IF NOT EXISTS tasks (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         user_id TEXT,
@@ -34,37 +41,483 @@ def init_db():
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         processed BOOLEAN DEFAULT FALSE
     )
+    """,
     """
+    CREATE TABLE IF NOT EXISTS chat_contexts (
+        chat_id TEXT PRIMARY KEY,
+        context TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
-    conn.commit()
-    conn.close()
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+        bucket_key TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS calendar_events (
+        context TEXT NOT NULL,
+        event_id TEXT NOT NULL,
+        summary TEXT,
+        start TEXT NOT NULL,
+        end TEXT NOT NULL,
+        all_day BOOLEAN NOT NULL DEFAULT FALSE,
+        PRIMARY KEY (context, event_id)
+    );
+    CREATE INDEX IF NOT EXISTS calendar_events_start ON calendar_events (context, start);
+    CREATE TABLE IF NOT EXISTS calendar_sync (
+        context TEXT PRIMARY KEY,
+        sync_token TEXT,
+        synced_at REAL
+    );
+    """,
+    """
+    ALTER TABLE tasks ADD COLUMN trigram_count INTEGER;
+    CREATE TABLE IF NOT EXISTS task_trigrams (
+        user_id TEXT NOT NULL,
+        task_date TEXT NOT NULL,
+        trigram TEXT NOT NULL,
+        task_id INTEGER NOT NULL,
+        PRIMARY KEY (user_id, task_date, trigram, task_id)
+    ) WITHOUT ROWID;
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS tasks_user_created ON tasks (user_id, created_at);
+    CREATE INDEX IF NOT EXISTS tasks_date ON tasks (task_date);
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        user_id, message, task_title, task_description, content='tasks', content_rowid='id', tokenize='porter unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts (rowid, user_id, message, task_title, task_description)
+        VALUES (new.id, new.user_id, new.message, new.task_title, new.task_description);
+    END;
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, user_id, message, task_title, task_description)
+        VALUES ('delete', old.id, old.user_id, old.message, old.task_title, old.task_description);
+    END;
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF user_id, message, task_title, task_description ON tasks BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, user_id, message, task_title, task_description)
+        VALUES ('delete', old.id, old.user_id, old.message, old.task_title, old.task_description);
+        INSERT INTO tasks_fts (rowid, user_id, message, task_title, task_description)
+        VALUES (new.id, new.user_id, new.message, new.task_title, new.task_description);
+    END;
+    INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild');
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS task_daily_stats (
+        day TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        task_type TEXT NOT NULL,
+        total INTEGER NOT NULL,
+        processed INTEGER NOT NULL,
+        PRIMARY KEY (day, user_id, task_type)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS tasks_created ON tasks (created_at);
+    """,
+    """
+    ALTER TABLE tasks ADD COLUMN provider TEXT;
+    ALTER TABLE tasks ADD COLUMN model TEXT;
+    ALTER TABLE tasks ADD COLUMN latency_ms REAL;
+    ALTER TABLE tasks ADD COLUMN extracted_json BLOB;
+    ALTER TABLE tasks ADD COLUMN prompt_version INTEGER;
+    """,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+# PRAGMA auto_vacuum value the database is switched to, so idle maintenance can give pages back
+AUTO_VACUUM_INCREMENTAL = 2
 
 
-def save_task_to_db(user_id, message, task_response: TaskResponse):
-    """Save task information to the local database."""
+def init_db():
+    """Initialize the SQLite database, applying only the migrations it has not seen yet."""
     conn = sqlite3.connect(get_db_path())
     cursor = conn.cursor()
-    logger.debug("Saving task to database...")
+    current_version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    if current_version >= SCHEMA_VERSION:
+        logger.debug("Database schema is current (version %s)", current_version)
+        conn.close()
+        return
+
+    logger.debug("Migrating database schema from version %s to %s...", current_version, SCHEMA_VERSION)
+    try:
+        for version, migration in enumerate(MIGRATIONS[current_version:], start=current_version + 1):
+            # Each migration commits along with its version, so a failed one is retried from where it stopped
+            cursor.executescript(f"BEGIN; {migration}; PRAGMA user_version = {version}; COMMIT;")
+        # Switching an existing database to incremental auto-vacuum takes a VACUUM, which cannot run in a transaction
+        if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def save_task_to_db(user_id, message, task_response: TaskResponse, trigrams=None) -> Future:
+    """Queue task information for the database writer, without waiting for the disk.
+
+    The returned future resolves to the task's id once committed. With `trigrams`, the task is
+    added to the duplicate detection index in the same transaction. How the task was extracted is
+    stored along with it, with the task as the provider answered it compressed, so `loli replay` can
+    compare against it.
+    """
     task_data = task_response.task
-    cursor.execute(
+    extraction = task_response.extraction
+    if extraction is None:
+        trace = (None, None, None, None, None)
+    else:
+        trace = (extraction.provider, extraction.model, extraction.latency_ms, _pack(extraction.task), extraction.prompt_version)
+    row = (user_id, message, *task_data.db_row(), task_response.processed, *trace)
+
+    def write(conn):
+        task_id = conn.execute(
+            """
+            INSERT INTO tasks (
+                user_id, message, task_type, task_title, task_description,
+                task_date, task_time, processed,
+                provider, model, latency_ms, extracted_json, prompt_version
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            row,
+        ).lastrowid
+        if trigrams is not None:
+            _index_task_trigrams(conn, task_id, user_id, task_data.date, trigrams)
+        logger.debug("Task saved to database with ID: %s", task_id)
+        return task_id
+
+    return db_writer.submit(write, get_db_path())
+
+
+def _index_task_trigrams(conn, task_id: int, user_id: str, task_date, trigrams):
+    """Add a created task to the trigram index of its user and date (undated tasks share one)."""
+    conn.execute("UPDATE tasks SET trigram_count = ? WHERE id = ?", (len(trigrams), task_id))
+    conn.executemany(
+        "INSERT OR IGNORE INTO task_trigrams (user_id, task_date, trigram, task_id) VALUES (?, ?, ?, ?)",
+        [(user_id, task_date or "", trigram, task_id) for trigram in trigrams],
+    )
+
+
+def load_trigram_matches(user_id: str, task_date, trigrams) -> list:
+    """Tasks of a user and date sharing trigrams with the given ones, as (id, title, time, shared, trigram_count) rows.
+
+    Only the index entries of the given trigrams are read, however long the history is.
+    """
+    conn = sqlite3.connect(get_db_path())
+    trigrams = list(trigrams)
+    placeholders = ", ".join("?" for _ in trigrams)
+    rows = conn.execute(
+        f"""
+        SELECT t.id, t.task_title, t.task_time, COUNT(*), t.trigram_count
+        FROM task_trigrams g JOIN tasks t ON t.id = g.task_id
+        WHERE g.user_id = ? AND g.task_date = ? AND g.trigram IN ({placeholders})
+        GROUP BY g.task_id
+        """,
+        (user_id, task_date or "", *trigrams),
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def load_replay_sample(size: int, user_id: str = None) -> list:
+    """A random sample of created tasks, with the message they came from, for replaying.
+
+    Rows come as (id, message, created_at, task_type, task_title, task_date, task_time,
+    provider, model, latency_ms, prompt_version).
+    """
+    conn = sqlite3.connect(get_db_path())
+    rows = conn.execute(
         """
-        INSERT INTO tasks (
-            user_id, message, task_type, task_title, task_description,
-            task_date, task_time, processed
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        SELECT id, message, created_at, task_type, task_title, task_date, task_time, provider, model, latency_ms, prompt_version
+        FROM tasks WHERE processed AND (? IS NULL OR user_id = ?)
+        ORDER BY random() LIMIT ?
+        """,
+        (user_id, user_id, size),
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def load_extracted_json(task_id: int):
+    """The task as the provider answered it, parsed and before any middleware, or None if it was not stored."""
+    conn = sqlite3.connect(get_db_path())
+    row = conn.execute("SELECT extracted_json FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    conn.close()
+    return _unpack(row[0]) if row and row[0] is not None else None
+
+
+def load_chat_contexts() -> dict:
+    """Load the active context of every chat that has switched away from the default."""
+    conn = sqlite3.connect(get_db_path())
+    rows = conn.execute("SELECT chat_id, context FROM chat_contexts").fetchall()
+    conn.close()
+    return dict(rows)
+
+
+def save_chat_context(chat_id: str, context: str):
+    """Persist the active context for a chat."""
+    conn = sqlite3.connect(get_db_path())
+    conn.execute(
+        """
+        INSERT INTO chat_contexts (chat_id, context) VALUES (?, ?)
+        ON CONFLICT(chat_id) DO UPDATE SET context = excluded.context, updated_at = CURRENT_TIMESTAMP
+        """,
+        (chat_id, context),
+    )
+    conn.commit()
+    conn.close()
+
+
+def load_rate_limit_buckets(keys: list) -> dict:
+    """Load persisted token bucket states as {key: (tokens, updated_at)}."""
+    conn = sqlite3.connect(get_db_path())
+    placeholders = ", ".join("?" for _ in keys)
+    rows = conn.execute(f"SELECT bucket_key, tokens, updated_at FROM rate_limit_buckets WHERE bucket_key IN ({placeholders})", keys)
+    buckets = {key: (tokens, updated_at) for key, tokens, updated_at in rows}
+    conn.close()
+    return buckets
+
+
+def save_rate_limit_buckets(buckets: dict):
+    """Persist token bucket states given as {key: (tokens, updated_at)}."""
+    conn = sqlite3.connect(get_db_path())
+    conn.executemany(
+        "INSERT OR REPLACE INTO rate_limit_buckets (bucket_key, tokens, updated_at) VALUES (?, ?, ?)",
+        [(key, tokens, updated_at) for key, (tokens, updated_at) in buckets.items()],
+    )
+    conn.commit()
+    conn.close()
+
+
+def load_calendar_sync_token(context: str):
+    """Return the Calendar sync token stored for a context, or None before the first full sync."""
+    conn = sqlite3.connect(get_db_path())
+    row = conn.execute("SELECT sync_token FROM calendar_sync WHERE context = ?", (context,)).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def save_calendar_changes(context: str, upserted: list, deleted: list, sync_token: str, full: bool = False, prune_before: str = None):
+    """Apply one sync to the calendar mirror of a context in a single transaction.
+
+    `upserted` holds (event_id, summary, start, end, all_day) rows. A full sync replaces the whole
+    mirror; events over by `prune_before` are dropped, the mirror only keeps upcoming ones.
+    """
+    conn = sqlite3.connect(get_db_path())
+    with conn:
+        if full:
+            conn.execute("DELETE FROM calendar_events WHERE context = ?", (context,))
+        conn.executemany("DELETE FROM calendar_events WHERE context = ? AND event_id = ?", [(context, event_id) for event_id in deleted])
+        conn.executemany(
+            "INSERT OR REPLACE INTO calendar_events (context, event_id, summary, start, end, all_day) VALUES (?, ?, ?, ?, ?, ?)",
+            [(context, *row) for row in upserted],
+        )
+        if prune_before is not None:
+            conn.execute("DELETE FROM calendar_events WHERE context = ? AND end <= ?", (context, prune_before))
+        conn.execute(
+            "INSERT OR REPLACE INTO calendar_sync (context, sync_token, synced_at) VALUES (?, ?, ?)",
+            (context, sync_token, time.time()),
+        )
+    conn.close()
+
+
+def clear_calendar_mirror(context: str):
+    """Forget the mirrored events and the sync token of a context, so the next sync is a full one."""
+    conn = sqlite3.connect(get_db_path())
+    with conn:
+        conn.execute("DELETE FROM calendar_events WHERE context = ?", (context,))
+        conn.execute("DELETE FROM calendar_sync WHERE context = ?", (context,))
+    conn.close()
+
+
+def load_calendar_events(context: str, start: str, end: str) -> list:
+    """Mirrored events of a context overlapping [start, end), as (summary, start, end, all_day) rows by start."""
+    conn = sqlite3.connect(get_db_path())
+    rows = conn.execute(
+        """
+        SELECT summary, start, end, all_day FROM calendar_events
+        WHERE context = ? AND start < ? AND end > ?
+        ORDER BY start
+        """,
+        (context, end, start),
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def load_calendar_synced_at(context: str):
+    """When the mirror of a context was last synced, as a timestamp, or None if it never was."""
+    conn = sqlite3.connect(get_db_path())
+    row = conn.execute("SELECT synced_at FROM calendar_sync WHERE context = ?", (context,)).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+# Columns of the rows load_history and search_tasks return
+HISTORY_COLUMNS = "t.id, t.created_at, t.message, t.task_type, t.task_title, t.task_date, t.task_time, t.processed"
+
+
+def load_history(user_id: str, before: tuple = None, limit: int = 10) -> list:
+    """A user's tasks, newest first, older than the (created_at, id) keyset `before` when given.
+
+    Pages are read from the (user_id, created_at) index, so a deep page costs as much as the first.
+    """
+    conn = sqlite3.connect(get_db_path())
+    if before is None:
+        rows = conn.execute(
+            f"SELECT {HISTORY_COLUMNS} FROM tasks t WHERE t.user_id = ? ORDER BY t.created_at DESC, t.id DESC LIMIT ?",
+            (user_id, limit),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            f"""
+            SELECT {HISTORY_COLUMNS} FROM tasks t
+            WHERE t.user_id = ? AND (t.created_at, t.id) < (?, ?)
+            ORDER BY t.created_at DESC, t.id DESC LIMIT ?
+            """,
+            (user_id, *before, limit),
+        ).fetchall()
+    conn.close()
+    return rows
+
+
+def search_tasks(user_id: str, match: str, before_id: int = None, limit: int = 10) -> list:
+    """A user's tasks matching an FTS5 query over message, title and description, newest first.
+
+    Rows come as in load_history; `before_id` is the keyset, the id of the last row of the previous page.
+    The user id is matched inside the full-text index too, so other users' matches are skipped there.
+    """
+    quoted_user = '"' + user_id.replace('"', '""') + '"'
+    conn = sqlite3.connect(get_db_path())
+    rows = conn.execute(
+        f"""
+        SELECT {HISTORY_COLUMNS} FROM tasks_fts JOIN tasks t ON t.id = tasks_fts.rowid
+        WHERE tasks_fts MATCH ? AND tasks_fts.rowid < ? AND t.user_id = ?
+        ORDER BY tasks_fts.rowid DESC LIMIT ?
         """,
         (
+            f"user_id : {quoted_user} AND {{message task_title task_description}} : ({match})",
+            before_id if before_id is not None else 2**63 - 1,
             user_id,
-            message,
-            task_data.task_type,
-            task_data.title,
-            task_data.description,
-            task_data.date,
-            task_data.time,
-            task_response.processed,
+            limit,
         ),
-    )
-    logger.debug("Task saved to database with ID: %s", cursor.lastrowid)
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive.tasks_archive (
+    day TEXT PRIMARY KEY,
+    row_count INTEGER NOT NULL,
+    data BLOB NOT NULL
+)
+"""
 
+
+def _pack(rows: list) -> bytes:
+    return zlib.compress(json.dumps(rows, separators=(",", ":")).encode(), 9)
+
+
+def _unpack(data: bytes) -> list:
+    return json.loads(zlib.decompress(data))
+
+
+def archive_tasks(older_than: str, rejected_older_than: str = None, batch_size: int = 500) -> int:
+    """Move tasks created before `older_than`, and rejected ones before `rejected_older_than`, to the archive.
+
+    The archive database holds one zlib-compressed JSON blob of rows per day; the working one keeps
+    per-day counts in task_daily_stats. Each batch moves in one transaction across both databases.
+    Returns how many tasks were archived.
+    """
+    rejected_older_than = max(older_than, rejected_older_than or older_than)
+    conn = sqlite3.connect(get_db_path())
+    conn.row_factory = sqlite3.Row
+    conn.execute("ATTACH DATABASE ? AS archive", (get_archive_path(),))
+    conn.execute(ARCHIVE_SCHEMA)
+    ids = [
+        row["id"]
+        for row in conn.execute(
+            "SELECT id FROM tasks WHERE created_at < ? AND (created_at < ? OR NOT processed)", (rejected_older_than, older_than)
+        )
+    ]
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        batch = [(task_id,) for task_id in ids[start:end]]
+        placeholders = ", ".join("?" for _ in batch)
+        with conn:
+            days = {}
+            for row in conn.execute(f"SELECT * FROM tasks WHERE id IN ({placeholders}) ORDER BY id", ids[start:end]):
+                task = dict(row)
+                if task["extracted_json"] is not None:
+                    # Compressed on its own in the working database, the archive compresses whole days
+                    task["extracted_json"] = _unpack(task["extracted_json"])
+                days.setdefault(row["created_at"][:10], []).append(task)
+            for day, day_rows in days.items():
+                existing = conn.execute("SELECT data FROM archive.tasks_archive WHERE day = ?", (day,)).fetchone()
+                merged = (_unpack(existing["data"]) if existing else []) + day_rows
+                conn.execute(
+                    "INSERT OR REPLACE INTO archive.tasks_archive (day, row_count, data) VALUES (?, ?, ?)",
+                    (day, len(merged), _pack(merged)),
+                )
+
+            conn.executemany(
+                """
+                INSERT INTO task_daily_stats (day, user_id, task_type, total, processed)
+                SELECT date(created_at), COALESCE(user_id, ''), COALESCE(task_type, ''), 1, COALESCE(processed, 0) = 1
+                FROM tasks WHERE id = ?
+                ON CONFLICT (day, user_id, task_type) DO UPDATE SET
+                    total = total + excluded.total, processed = processed + excluded.processed
+                """,
+                batch,
+            )
+            conn.executemany("DELETE FROM task_trigrams WHERE task_id = ?", batch)
+            conn.executemany("DELETE FROM tasks WHERE id = ?", batch)
+    conn.close()
+    return len(ids)
+
+
+def load_archived_tasks(day: str) -> list:
+    """The archived tasks created on a day (YYYY-MM-DD), as dicts of their columns."""
+    if not os.path.exists(get_archive_path()):
+        return []
+    conn = sqlite3.connect(get_archive_path())
+    try:
+        row = conn.execute("SELECT data FROM tasks_archive WHERE day = ?", (day,)).fetchone()
+    except sqlite3.OperationalError:
+        # Nothing was ever archived to this file
+        row = None
+    conn.close()
+    return _unpack(row[0]) if row else []
+
+
+def load_daily_stats(user_id: str, since: str) -> list:
+    """Per-day counts of archived tasks, as (day, task_type, total, processed) rows."""
+    conn = sqlite3.connect(get_db_path())
+    rows = conn.execute(
+        "SELECT day, task_type, total, processed FROM task_daily_stats WHERE user_id = ? AND day >= ? ORDER BY day",
+        (user_id, since),
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def incremental_vacuum(pages: int) -> int:
+    """Return up to `pages` free pages to the file system, returning how many are still free."""
+    conn = sqlite3.connect(get_db_path())
+    # Through executescript, which steps the pragma to the end; execute() frees a single page
+    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    conn.close()
+    return free
+
+
+def vacuum():
+    """Rebuild the working database, defragmenting it and releasing every free page."""
+    conn = sqlite3.connect(get_db_path())
+    conn.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('optimize')")
     conn.commit()
+    conn.execute("VACUUM")
     conn.close()
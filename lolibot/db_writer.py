@@ -0,0 +1,188 @@
+"""Asynchronous, group-committed writes to the SQLite database.
+
+Writing inline makes every handler wait for its own commit, and commits are serialized on the
+disk. Instead, writes are queued as jobs and a single writer thread runs them, committing every
+`batch_size` jobs or `batch_delay` seconds after the first one of a batch, whichever comes first.
+Each job runs in its own savepoint, so a failing job does not undo the rest of its batch.
+"""
+
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_BATCH_DELAY = 0.05
+# Callers block once this many jobs wait, instead of growing the queue without bound
+DEFAULT_QUEUE_SIZE = 1000
+
+Job = Callable[[sqlite3.Connection], Any]
+
+
+class DBWriter:
+    """A single thread owning the write connections, fed through a bounded queue."""
+
+    def __init__(
+        self, batch_size: int = DEFAULT_BATCH_SIZE, batch_delay: float = DEFAULT_BATCH_DELAY, queue_size: int = DEFAULT_QUEUE_SIZE
+    ):
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self._queue: "queue.Queue[Tuple[str, Any, Optional[Future]]]" = queue.Queue(maxsize=queue_size)
+        self._connections: Dict[str, sqlite3.Connection] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._counters = {"jobs": 0, "failed": 0, "commits": 0, "blocked": 0, "commit_seconds": 0.0, "max_depth": 0}
+
+    def submit(self, job: Job, path: str) -> Future:
+        """Queue a job for the database at `path`; the future resolves to its result once committed.
+
+        Blocks while the queue is full, which slows callers down to the pace of the disk.
+        """
+        self.start()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((path, job, future))
+        except queue.Full:
+            with self._stats_lock:
+                self._counters["blocked"] += 1
+            self._queue.put((path, job, future))
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._counters["max_depth"] = max(self._counters["max_depth"], depth)
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every job queued so far is committed."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        # Queued like a job; the writer sets it once everything before it is committed
+        done = threading.Event()
+        self._queue.put(("", done, None))
+        return done.wait(timeout)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Commit everything queued, then end the writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(("", None, None))
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            counters = dict(self._counters)
+        commits = counters.pop("commits")
+        commit_seconds = counters.pop("commit_seconds")
+        return {
+            **counters,
+            "queue_depth": self._queue.qsize(),
+            "commits": commits,
+            "avg_batch": counters["jobs"] / commits if commits else 0.0,
+            "avg_commit_ms": commit_seconds / commits * 1000 if commits else 0.0,
+        }
+
+    def _run(self):
+        while True:
+            batch, flushes, stopping = self._next_batch()
+            jobs: Dict[str, List[Tuple[Job, Future]]] = {}
+            for path, job, future in batch:
+                jobs.setdefault(path, []).append((job, future))
+            for path, path_jobs in jobs.items():
+                self._commit(path, path_jobs)
+            for done in flushes:
+                done.set()
+            if stopping:
+                for conn in self._connections.values():
+                    conn.close()
+                self._connections.clear()
+                return
+
+    def _next_batch(self):
+        batch, flushes = [], []
+        deadline = None
+        while len(batch) < self.batch_size:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                path, job, future = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if job is None:
+                return batch, flushes, True
+            if isinstance(job, threading.Event):
+                # Commit right away, someone is waiting
+                flushes.append(job)
+                break
+            batch.append((path, job, future))
+            if deadline is None:
+                deadline = time.monotonic() + self.batch_delay
+        return batch, flushes, False
+
+    def _connection(self, path: str) -> sqlite3.Connection:
+        conn = self._connections.get(path)
+        if conn is None:
+            # A new database replaces the previous one, e.g. in tests; only ever keep one open
+            for stale in self._connections.values():
+                stale.close()
+            self._connections.clear()
+            # Transactions are managed here, explicitly
+            conn = self._connections[path] = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        return conn
+
+    def _commit(self, path: str, jobs: List[Tuple[Job, Future]]):
+        started = time.perf_counter()
+        results = []
+        failed = 0
+        try:
+            conn = self._connection(path)
+            conn.execute("BEGIN")
+            for job, future in jobs:
+                conn.execute("SAVEPOINT job")
+                try:
+                    results.append((future, job(conn), None))
+                    conn.execute("RELEASE job")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO job")
+                    conn.execute("RELEASE job")
+                    logger.error(f"Database write failed: {e}")
+                    results.append((future, None, e))
+                    failed += 1
+            conn.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"Database commit of {len(jobs)} writes failed: {e}")
+            conn = self._connections.pop(path, None)
+            if conn is not None:
+                conn.close()
+            results = [(future, None, e) for _, future in jobs]
+            failed = len(jobs)
+
+        with self._stats_lock:
+            self._counters["jobs"] += len(jobs)
+            self._counters["failed"] += failed
+            self._counters["commits"] += 1
+            self._counters["commit_seconds"] += time.perf_counter() - started
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+# Every write of the process goes through this writer
+db_writer = DBWriter()
+
+# Short-lived processes, like CLI commands, must not lose what they queued last
+atexit.register(db_writer.stop)
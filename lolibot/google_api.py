@@ -3,11 +3,19 @@
 import logging
 import os
 import json
+import threading
 from datetime import datetime, timedelta
+from operator import attrgetter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import httplib2
+from google.auth.exceptions import RefreshError
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
+from googleapiclient.http import build_http
 
 from lolibot.config import BotConfig
 from lolibot.services import TaskData
@@ -21,33 +29,180 @@ SCOPES = [
 
 logger = logging.getLogger(__name__)
 
+# Built services per (context, service name). Their credentials refresh themselves when used.
+_services = {}
+_services_lock = threading.Lock()
+
+# Credentials behind every built service, with their token file. The background refresher renews
+# them in place, so the services holding them pick up the new access tokens.
+_credentials: Dict[Tuple[str, str], Tuple[Credentials, Path]] = {}
+
+
+# Services whose credentials could not be loaded, with the error and the token file's mtime at the
+# time. They fail fast until the token file changes, e.g. after `loli auth`.
+_invalid: Dict[Tuple[str, str], Tuple[str, Optional[float]]] = {}
+
+SERVICE_NAMES = ("calendar", "tasks")
+
+
+class CredentialsError(Exception):
+    """Google credentials are missing or invalid, and only `loli auth` can fix them."""
+
+
+class HttpPool:
+    """The connections of one cached service, each used by a single thread at a time.
+
+    httplib2.Http is not thread-safe, and message handlers, the warm-up and keep-alive pings call
+    the same cached services from different threads. Every request borrows an idle Http, or a new
+    one when all are busy, and gives it back with its connection open, so the connections the
+    pings keep warm are the ones requests use next.
+    """
+
+    def __init__(self):
+        self._idle: List[httplib2.Http] = []
+        self._lock = threading.Lock()
+
+    def request(self, *args, **kwargs):
+        with self._lock:
+            http = self._idle.pop() if self._idle else build_http()
+        try:
+            return http.request(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._idle.append(http)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for http in idle:
+            http.close()
+
 
 def get_google_service(config: BotConfig, service_name: str):
-    """Get authenticated Google API service."""
-    creds = None
-    creds_path = config.get_creds_path()
-    token_file = creds_path / f"token_{service_name}.json"
-    credentials_file = creds_path / "credentials.json"
+    """Get authenticated Google API service, cached per context.
+
+    Never starts an interactive login: missing or invalid credentials raise CredentialsError, and
+    keep raising it without touching the disk or the network until the token file changes.
+    """
+    key = (config.current_context, service_name)
+    service = _services.get(key)
+    if service is None:
+        token_file = _token_file(config, service_name)
+        invalid = _invalid.get(key)
+        if invalid and invalid[1] == _mtime(token_file):
+            raise CredentialsError(invalid[0])
+        try:
+            creds = _load_credentials(config.current_context, service_name, token_file)
+        except CredentialsError as e:
+            with _services_lock:
+                _invalid[key] = (str(e), _mtime(token_file))
+            logger.error(str(e))
+            raise
+        http = AuthorizedHttp(creds, http=HttpPool())
+        service = build(service_name, "v3" if service_name == "calendar" else "v1", http=http)
+        with _services_lock:
+            _services[key] = service
+            _credentials[key] = (creds, token_file)
+            _invalid.pop(key, None)
+    return service
+
+
+def cached_credentials() -> Dict[Tuple[str, str], Tuple[Credentials, Path]]:
+    """Credentials of every built service, per (context, service name)."""
+    with _services_lock:
+        return dict(_credentials)
+
+
+def save_token(token_file: Path, creds: Credentials):
+    """Write a token atomically, so a crash or a concurrent reader never sees half a file."""
+    tmp_file = Path(token_file).with_name(f".{Path(token_file).name}.tmp")
+    with open(tmp_file, "w") as token:
+        token.write(creds.to_json())
+    os.replace(tmp_file, token_file)
 
-    # Load existing token if available
-    if os.path.exists(token_file):
-        creds = Credentials.from_authorized_user_info(json.load(open(token_file)), SCOPES)
 
-    # Refresh token if expired
-    if creds and creds.expired and creds.refresh_token:
-        creds.refresh(Request())
+def refresh_credentials(creds: Credentials, token_file: Path):
+    """Renew the access token in place and persist it."""
+    creds.refresh(Request())
+    save_token(token_file, creds)
 
-    # Get new credentials if none exist
-    if not creds or not creds.valid:
+
+def _token_file(config: BotConfig, service_name: str) -> Path:
+    return config.get_creds_path() / f"token_{service_name}.json"
+
+
+def _mtime(path: Path) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def _read_token(token_file: Path) -> Optional[Credentials]:
+    if not os.path.exists(token_file):
+        return None
+    with open(token_file) as token:
+        return Credentials.from_authorized_user_info(json.load(token), SCOPES)
+
+
+def _load_credentials(context: str, service_name: str, token_file: Path) -> Credentials:
+    """Load the stored credentials of a service, refreshing them if expired. Never interactive.
+
+    Only what a new login fixes raises CredentialsError: a missing or unreadable token, or a refresh
+    the token endpoint refused. Network errors while refreshing propagate as they are, transient.
+    """
+    hint = f"run `loli auth {context}` to log in again"
+    try:
+        creds = _read_token(token_file)
+    except (OSError, ValueError, KeyError) as e:
+        raise CredentialsError(f"Google {service_name} token for context '{context}' is unreadable ({e}), {hint}")
+    if creds is None:
+        raise CredentialsError(f"No Google {service_name} token for context '{context}', {hint}")
+
+    if creds.expired and creds.refresh_token:
+        try:
+            refresh_credentials(creds, token_file)
+        except RefreshError as e:
+            # invalid_grant: the refresh token expired or was revoked
+            raise CredentialsError(f"Could not refresh the Google {service_name} token for context '{context}' ({e}), {hint}")
+    if not creds.valid:
+        raise CredentialsError(f"Google {service_name} token for context '{context}' is invalid, {hint}")
+    return creds
+
+
+def authorize(config: BotConfig, open_browser: bool = True, port: int = 0) -> Dict[str, str]:
+    """Make sure every Google service of the config's context has valid credentials, logging in if needed.
+
+    This is the only place an interactive login happens. Returns what was done per service.
+    """
+    creds_path = config.get_creds_path()
+    credentials_file = creds_path / "credentials.json"
+    outcome = {}
+    for service_name in SERVICE_NAMES:
+        token_file = _token_file(config, service_name)
+        try:
+            _load_credentials(config.current_context, service_name, token_file)
+            outcome[service_name] = "valid"
+            continue
+        except CredentialsError as e:
+            logger.info(str(e))
+
+        if not credentials_file.exists():
+            raise CredentialsError(
+                f"{credentials_file} not found. Create an OAuth client ID (Desktop application) with the Calendar and "
+                f"Tasks APIs enabled at https://console.developers.google.com/ and save its JSON there."
+            )
         flow = InstalledAppFlow.from_client_secrets_file(credentials_file, SCOPES)
-        creds = flow.run_local_server(port=0)
+        # Without a browser, the URL is printed: open it anywhere that can reach this port (e.g. over an SSH tunnel)
+        creds = flow.run_local_server(port=port, open_browser=open_browser)
+        save_token(token_file, creds)
+        outcome[service_name] = "logged in"
+    return outcome
 
-        # Save credentials for future use
-        with open(token_file, "w") as token:
-            token.write(creds.to_json())
 
-    # Build and return the service
-    return build(service_name, "v3" if service_name == "calendar" else "v1", credentials=creds)
+# TaskData fields each Google body is built from, read in a single call
+_task_body_values = attrgetter("title", "description", "date")
+_event_body_values = attrgetter("title", "description", "date", "time", "duration", "invitees")
 
 
 def create_task(config: BotConfig, task_data: TaskData):
@@ -66,10 +221,11 @@ def create_task(config: BotConfig, task_data: TaskData):
             task_list_id = task_lists["items"][0]["id"]
 
         # Create the task
+        title, notes, due_date = _task_body_values(task_data)
         task = {
-            "title": task_data.title,
-            "notes": task_data.description,
-            "due": f"{task_data.date}T23:59:59Z" if task_data.date else None,
+            "title": title,
+            "notes": notes,
+            "due": f"{due_date}T23:59:59Z" if due_date else None,
         }
         logger.info(f"Creating task: {task}")
 
@@ -86,18 +242,20 @@ def create_calendar_event(config: BotConfig, event_data: TaskData):
     try:
         service = get_google_service(config, "calendar")
 
+        summary, description, event_date, event_time, duration, invitees = _event_body_values(event_data)
+
         # Set the start and end times
-        start_time = event_data.time if event_data.time else "09:00"
-        start_date = event_data.date if event_data.date else datetime.now().date().isoformat()
+        start_time = event_time if event_time else "09:00"
+        start_date = event_date if event_date else datetime.now().date().isoformat()
         start_datetime = f"{start_date}T{start_time}:00"
 
         end_datetime = datetime.fromisoformat(start_datetime)
-        end_datetime = end_datetime + timedelta(minutes=event_data.duration or config.default_event_duration)
+        end_datetime = end_datetime + timedelta(minutes=duration or config.default_event_duration)
         end_datetime = end_datetime.isoformat()
 
         event = {
-            "summary": event_data.title,
-            "description": event_data.description,
+            "summary": summary,
+            "description": description,
             "start": {
                 "dateTime": start_datetime,
                 "timeZone": config.default_timezone,
@@ -109,8 +267,8 @@ def create_calendar_event(config: BotConfig, event_data: TaskData):
             "reminders": {"useDefault": True},
         }
         # Add attendees if present
-        if event_data.invitees:
-            event["attendees"] = [{"email": email} for email in event_data.invitees]
+        if invitees:
+            event["attendees"] = [{"email": email} for email in invitees]
         logger.info(f"Creating event: {event}")
 
         result = service.events().insert(calendarId="primary", body=event).execute()
@@ -1,6 +1,6 @@
 """LLM package for processing natural language input."""
 
-from .base import LLMProvider
+from .base import Capability, LLMProvider
 from .openai import OpenAIProvider
 from .anthropic import AnthropicProvider
 from .gemini import GeminiProvider
@@ -9,6 +9,7 @@ from .processor import LLMProcessor
 from .prompts import common_prompt
 
 __all__ = [
+    "Capability",
     "LLMProvider",
     "OpenAIProvider",
     "AnthropicProvider",
@@ -1,36 +1,48 @@
 """Anthropic provider implementation."""
 
-import json
 import logging
-import re
-import requests
 
 from lolibot.config import BotConfig
-from .base import LLMProvider
-from .prompts import common_prompt
+from .base import LLMProvider, parse_segments
+from .http import session
+from .prompts import common_prompt, split_prompt
+from .schema import TASK_SCHEMA, task_validator
 
 logger = logging.getLogger(__name__)
 
+# Claude answers extractions by calling this tool, whose input is the TaskData schema
+TASK_TOOL = {
+    "name": "record_task",
+    "description": "Record the task, event or reminder extracted from the user message.",
+    "input_schema": TASK_SCHEMA,
+}
+
 
 class AnthropicProvider(LLMProvider):
     """Anthropic LLM provider."""
 
+    DEFAULT_MODEL = "claude-3-5-haiku-latest"
+
     def name(self):
         return "Anthropic"
 
     def split_text(self, text) -> list:
-        raise NotImplementedError("Anthropic does not implement split_text")
+        """Split text into tasks with Anthropic API."""
+        # There is no JSON mode, prefilling the answer with "[" makes Claude continue a JSON array
+        result = self.__complete(split_prompt(), text, prefill="[")
+        return parse_segments("[" + result["content"][0]["text"])
 
     def enabled(self) -> bool:
         """Check if the provider is enabled."""
         return self.__api_key is not None
 
-    def __init__(self, config: BotConfig):
+    def __init__(self, config: BotConfig, model: str = None):
         self.__api_key = config.claude_api_key
+        self.model = model or getattr(config, "claude_model", None) or self.DEFAULT_MODEL
 
     def check_connection(self):
         try:
-            response = requests.get(
+            response = session.get(
                 "https://api.anthropic.com/v1/models",
                 headers={
                     "x-api-key": self.__api_key,
@@ -46,28 +58,33 @@ class AnthropicProvider(LLMProvider):
 
     def process_text(self, text) -> dict:
         """Process text with Anthropic API."""
-        response = requests.post(
-            "https://api.anthropic.com/v1/complete",
+        result = self.__complete(common_prompt(), text, tools=[TASK_TOOL], tool_choice={"type": "tool", "name": TASK_TOOL["name"]})
+        for block in result["content"]:
+            if block.get("type") == "tool_use":
+                return task_validator.validate(block["input"])
+        raise Exception("Claude did not call the task tool")
+
+    def __complete(self, system_prompt: str, text: str, prefill: str = "", **extra) -> dict:
+        messages = [{"role": "user", "content": text}]
+        if prefill:
+            messages.append({"role": "assistant", "content": prefill})
+        response = session.post(
+            "https://api.anthropic.com/v1/messages",
             headers={
                 "x-api-key": self.__api_key,
                 "anthropic-version": "2023-06-01",
                 "Content-Type": "application/json",
             },
             json={
-                "model": "claude-instant-1.2",
+                "model": self.model,
                 "max_tokens": 300,
-                "system": common_prompt(),
-                "messages": [{"role": "user", "content": text}],
+                "system": system_prompt,
+                "messages": messages,
+                **extra,
             },
         )
         result = response.json()
         logger.debug(f"Anthropic response: {result}")
         if result.get("type") == "error":
             raise Exception(f"Error processing text with Claude: {result['error']['message']}")
-
-        # Extract the JSON from the text
-        content = result["content"][0]["text"]
-        match = re.search(r"{.*}", content, re.DOTALL)
-        if match:
-            return json.loads(match.group(0))
-        raise Exception("Failed to extract JSON from response")
+        return result
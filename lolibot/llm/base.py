@@ -1,13 +1,53 @@
 """Base module for LLM providers."""
 
 import abc
+import json
+import re
+from enum import Enum
+from typing import FrozenSet, Optional
 
 from lolibot.config import BotConfig
 
 
+class Capability(Enum):
+    """What a provider can do, so the processor only routes requests to providers able to serve them."""
+
+    # Split a message into task segments
+    SPLIT = "split"
+    # Extract one task from a segment
+    EXTRACT = "extract"
+    # The API itself constrains every answer to JSON, instead of the prompt asking for it
+    JSON_MODE = "json_mode"
+
+
+def parse_segments(content) -> list:
+    """Turn a split answer into a list of segments.
+
+    Accepts a JSON array, an object wrapping it under "tasks" (JSON mode APIs only return objects),
+    or text with the array somewhere inside.
+    """
+    if isinstance(content, str):
+        try:
+            content = json.loads(content)
+        except ValueError:
+            match = re.search(r"\[.*\]", content, re.DOTALL)
+            if not match:
+                raise Exception("Failed to extract JSON array from response")
+            content = json.loads(match.group(0))
+    if isinstance(content, dict):
+        content = content.get("tasks")
+    if not isinstance(content, list) or not all(isinstance(segment, str) for segment in content):
+        raise Exception(f"Split response is not a list of strings: {content}")
+    return content
+
+
 class LLMProvider(abc.ABC):
     """Abstract base class for LLM providers."""
 
+    capabilities: FrozenSet[Capability] = frozenset({Capability.SPLIT, Capability.EXTRACT})
+    # Model the provider asks for, None for providers without one
+    model: Optional[str] = None
+
     @abc.abstractmethod
     def __init__(self, config: BotConfig):
         """Initialize the LLM provider."""
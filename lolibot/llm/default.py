@@ -2,12 +2,42 @@
 
 import logging
 import re
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
 
 from .base import LLMProvider
 
 logger = logging.getLogger(__name__)
 
+Span = Tuple[int, int]
+
+# Words and punctuation that join several tasks in one message
+CLAUSE_SEPARATOR_PATTERN = re.compile(
+    r"[,;\n&]|\.\s+\w|\b(?:y|e|and|also|además|ademas|then|luego|después|despues|plus|tambi[ée]n)\b",
+    re.IGNORECASE,
+)
+
+# Time-like expressions the time patterns do not understand ("at 10", "a las 10", "10h", "3pm")
+UNPARSED_TIME_PATTERN = re.compile(r"\b(?:at|a las|a la)\s+\d{1,2}\b|\b\d{1,2}\s*(?:h|am|pm|a\.m\.|p\.m\.)(?!\w)")
+TASK_TYPE_KEYWORDS = (
+    ("reminder", re.compile(r"remind(?:er)?|alert|notify|recordar|alertar|avisar|recordatorio")),
+    ("event", re.compile(r"meet(?:ing)?|call|discuss|talk|conversation|reuni[óo]n|llamada|charla|hablar|discutir")),
+)
+
+
+@dataclass(frozen=True)
+class TemporalMask:
+    """Text with its date and time expressions replaced by placeholders, plus what they resolve to."""
+
+    # Lowercased, whitespace-normalized text with "<date>" and "<time>" placeholders
+    masked: str
+    date: str
+    time: Optional[str]
+    # The expressions that were masked, as they appear in the lowercased text
+    date_text: Optional[str] = None
+    time_text: Optional[str] = None
+
 
 class DefaultProvider(LLMProvider):
     """Default LLM provider for regex-based parsing."""
@@ -102,13 +132,9 @@ class DefaultProvider(LLMProvider):
     def _extract_task_type(self, text: str) -> str:
         """Extract task type from text. Order matters for pattern matching."""
         text = text.lower()
-        if re.search(r"remind(?:er)?|alert|notify|recordar|alertar|avisar|recordatorio", text):
-            return "reminder"
-        elif re.search(
-            r"meet(?:ing)?|call|discuss|talk|conversation|reuni[óo]n|llamada|charla|hablar|discutir",
-            text,
-        ):
-            return "event"
+        for task_type, pattern in TASK_TYPE_KEYWORDS:
+            if pattern.search(text):
+                return task_type
         return "task"
 
     def _is_valid_time(self, hour: int, minute: int) -> bool:
@@ -117,6 +143,10 @@ class DefaultProvider(LLMProvider):
 
     def _parse_time(self, text: str) -> str | None:
         """Extract and validate time from text."""
+        return self._find_time(text)[0]
+
+    def _find_time(self, text: str) -> Tuple[Optional[str], Optional[Span]]:
+        """Extract and validate time from text, along with where it was found."""
         # Support both 12h and 24h formats, including Spanish variations
         time_patterns = [
             r"(\d{1,2}):(\d{2})(?:\s*(am|pm))?",  # English 12h/24h
@@ -139,8 +169,8 @@ class DefaultProvider(LLMProvider):
                         hour = 0
 
                 if self._is_valid_time(hour, minute):
-                    return f"{hour:02d}:{minute:02d}"
-        return None
+                    return f"{hour:02d}:{minute:02d}", match.span()
+        return None, None
 
     def _parse_iso_date(self, date_str: str) -> str | None:
         """Parse ISO format date (YYYY-MM-DD)."""
@@ -212,10 +242,11 @@ class DefaultProvider(LLMProvider):
 
     def _extract_date(self, text: str) -> str:
         """Extract date from text trying different formats."""
-        text = text.lower()
+        return self._find_date(text)[0]
 
-        # Try different date formats in order
-        date_parsers = [
+    def _date_parsers(self) -> list:
+        """Date formats and their parsers, in the order they are tried."""
+        return [
             (r"\d{4}-\d{2}-\d{2}", self._parse_iso_date),
             (r"\d{1,2}/\d{1,2}/\d{4}", self._parse_slash_date),
             (
@@ -228,15 +259,43 @@ class DefaultProvider(LLMProvider):
             ),
         ]
 
-        for pattern, parser in date_parsers:
+    def _find_date(self, text: str) -> Tuple[str, Optional[Span]]:
+        """Extract date from text trying different formats, along with where it was found."""
+        text = text.lower()
+
+        # Try different date formats in order
+        for pattern, parser in self._date_parsers():
             match = re.search(pattern, text)
             if match:
                 result = parser(match.group(0))
                 if result:
-                    return result
+                    return result, match.span()
 
         # Default to today if no valid date found
-        return datetime.now().strftime("%Y-%m-%d")
+        return datetime.now().strftime("%Y-%m-%d"), None
+
+    def mask_temporal(self, text: str) -> Optional[TemporalMask]:
+        """Mask the date and time expressions this parser understands.
+
+        Returns None when the expressions overlap, since the text cannot be masked reliably.
+        """
+        lowered = text.lower()
+        date, date_span = self._find_date(lowered)
+        time, time_span = self._find_time(lowered)
+        spans = sorted((span, placeholder) for span, placeholder in ((date_span, "<date>"), (time_span, "<time>")) if span)
+        if len(spans) == 2 and spans[0][0][1] > spans[1][0][0]:
+            return None
+
+        masked = lowered
+        for (start, end), placeholder in reversed(spans):
+            masked = masked[:start] + placeholder + masked[end:]
+        return TemporalMask(
+            masked=" ".join(masked.split()),
+            date=date,
+            time=time,
+            date_text=lowered[slice(*date_span)] if date_span else None,
+            time_text=lowered[slice(*time_span)] if time_span else None,
+        )
 
     def process_text(self, text: str) -> dict:
         """
@@ -254,6 +313,87 @@ class DefaultProvider(LLMProvider):
         logger.info(f"Regex processing result: {result}")
         return result
 
+    def is_single_clause(self, text: str) -> bool:
+        """Whether the text is surely a single task: no separators or conjunctions, and at most one
+        temporal anchor (a date, a time, or a date with its time)."""
+        lowered = text.lower()
+        if CLAUSE_SEPARATOR_PATTERN.search(lowered):
+            return False
+        return self._count_dates(lowered) <= 1 and self._count_times(lowered) <= 1
+
+    def _count_dates(self, text: str) -> int:
+        spans = []
+        for pattern, parser in self._date_parsers():
+            spans.extend(match.span() for match in re.finditer(pattern, text) if parser(match.group(0)))
+        # Bare weekday names are not parsed as dates, but they still anchor a task in time
+        weekdays = r"\b(?:" + "|".join(self.DAY_MAP) + r")\b"
+        spans.extend(match.span() for match in re.finditer(weekdays, text))
+        return len(self._merge_spans(spans))
+
+    def _count_times(self, text: str) -> int:
+        spans = [match.span() for match in re.finditer(r"\d{1,2}:\d{2}", text)]
+        spans.extend(match.span() for match in UNPARSED_TIME_PATTERN.finditer(text))
+        return len(self._merge_spans(spans))
+
+    @staticmethod
+    def _merge_spans(spans: list) -> list:
+        merged = []
+        for start, end in sorted(spans):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def process_text_with_confidence(self, text: str) -> Tuple[dict, Dict[str, float]]:
+        """Process text like `process_text`, also scoring how sure the parser is of each field (0 to 1)."""
+        lowered = text.lower()
+        task_type = self._extract_task_type(lowered)
+        date, date_span = self._find_date(lowered)
+        time, time_span = self._find_time(lowered)
+        result = {
+            "task_type": task_type,
+            "title": text[:50] + ("..." if len(text) > 50 else ""),
+            "description": text,
+            "date": date,
+            "time": time,
+        }
+        confidence = {
+            # Plain "task" is only a fallback when no keyword matched
+            "task_type": 0.9 if task_type != "task" else 0.6,
+            # Truncated titles are poor summaries
+            "title": 0.9 if len(text) <= 50 else 0.5,
+            "description": 1.0,
+            "date": self._date_confidence(lowered[slice(*date_span)] if date_span else None),
+            "time": self._time_confidence(lowered, time_span),
+        }
+        return result, confidence
+
+    def _date_confidence(self, date_text: Optional[str]) -> float:
+        if date_text is None:
+            # Defaulted to today: maybe there is no date, maybe it is written in a way we missed
+            return 0.5
+        if re.fullmatch(r"\d{4}-\d{2}-\d{2}", date_text):
+            return 1.0
+        if re.fullmatch(r"\d{1,2}/\d{1,2}/\d{4}", date_text):
+            first, second = (int(part) for part in date_text.split("/")[:2])
+            # 03/11/2025 is either March or November
+            return 0.6 if first != second and first <= 12 and second <= 12 else 0.9
+        if date_text.split()[0] in ("next", "proximo", "próximo"):
+            return 0.9
+        if date_text in ("today", "hoy", "tomorrow", "mañana"):
+            return 0.95
+        return 0.85
+
+    def _time_confidence(self, text: str, time_span: Optional[Span]) -> float:
+        if time_span is None:
+            # No time, unless there is a time-like expression we could not parse
+            return 0.3 if UNPARSED_TIME_PATTERN.search(text) else 0.85
+        time_text = text[slice(*time_span)]
+        hour = int(time_text.split(":")[0])
+        # "9:00" may be morning or evening; 24h hours and explicit meridians are unambiguous
+        return 0.95 if hour == 0 or hour > 12 or re.search(r"[ap]\.?m|mañana|tarde|noche", time_text) else 0.9
+
     def split_text(self, text: str) -> list:
         """Split input text into potential task segments."""
         text = self.__normalize_task_separators(text)
@@ -0,0 +1,75 @@
+"""Local fast path: accept the regex parser's result when it is confident enough to skip the LLM."""
+
+import logging
+import threading
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Fields that decide whether a result is usable; the description is always the full text
+SCORED_FIELDS = ("task_type", "title", "date", "time")
+# Fields compared against the LLM in shadow mode; local titles are the raw text, so they never match
+COMPARED_FIELDS = ("task_type", "date", "time")
+
+
+def overall_confidence(confidence: Dict[str, float]) -> float:
+    """A result is only as reliable as its least certain field."""
+    return min(confidence.get(field, 0.0) for field in SCORED_FIELDS)
+
+
+def disagreements(local: dict, llm: dict) -> List[str]:
+    return [field for field in COMPARED_FIELDS if local.get(field) != llm.get(field)]
+
+
+class FastPathStats:
+    """Counters for local hits, escalations to the LLM, shadow comparisons and skipped split calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {
+            "local_hits": 0,
+            "escalated": 0,
+            "shadow_compared": 0,
+            "shadow_disagreed": 0,
+            "split_skipped": 0,
+            "split_escalated": 0,
+        }
+        self._disagreed_fields: Dict[str, int] = {field: 0 for field in COMPARED_FIELDS}
+
+    def record_local_hit(self):
+        with self._lock:
+            self._counters["local_hits"] += 1
+
+    def record_escalation(self):
+        with self._lock:
+            self._counters["escalated"] += 1
+
+    def record_split(self, skipped: bool):
+        with self._lock:
+            self._counters["split_skipped" if skipped else "split_escalated"] += 1
+
+    def record_shadow(self, local: dict, llm: dict) -> List[str]:
+        fields = disagreements(local, llm)
+        if fields:
+            logger.info(f"Local parser disagrees with the LLM on {fields}: local {local}, LLM {llm}")
+        with self._lock:
+            self._counters["shadow_compared"] += 1
+            self._counters["shadow_disagreed"] += int(bool(fields))
+            for field in fields:
+                self._disagreed_fields[field] += 1
+        return fields
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            disagreed_fields = dict(self._disagreed_fields)
+        decided = counters["local_hits"] + counters["escalated"]
+        compared = counters["shadow_compared"]
+        splits = counters["split_skipped"] + counters["split_escalated"]
+        return {
+            **counters,
+            "disagreed_fields": disagreed_fields,
+            "split_skip_rate": counters["split_skipped"] / splits if splits else 0.0,
+            "local_hit_rate": counters["local_hits"] / decided if decided else 0.0,
+            "disagreement_rate": counters["shadow_disagreed"] / compared if compared else None,
+        }
@@ -3,18 +3,27 @@
 from datetime import datetime
 import json
 import logging
-import re
-import requests
 
 from lolibot.config import BotConfig
-from .base import LLMProvider
+from .base import Capability, LLMProvider, parse_segments
+from .http import session
+from .prompts import split_prompt
+from .schema import gemini_schema, task_validator
 
 logger = logging.getLogger(__name__)
 
+# Makes Gemini answer extractions with a JSON object matching the TaskData schema
+TASK_GENERATION_CONFIG = {"responseMimeType": "application/json", "responseSchema": gemini_schema()}
+# Makes Gemini answer splits with a JSON array of segments
+SPLIT_GENERATION_CONFIG = {"responseMimeType": "application/json", "responseSchema": {"type": "array", "items": {"type": "string"}}}
+
 
 class GeminiProvider(LLMProvider):
     """Google Gemini LLM provider."""
 
+    DEFAULT_MODEL = "gemini-2.0-flash"
+    capabilities = frozenset({Capability.SPLIT, Capability.EXTRACT, Capability.JSON_MODE})
+
     def name(self):
         return "Gemini Flash 2.5"
 
@@ -22,14 +31,18 @@ class GeminiProvider(LLMProvider):
         """Check if the Gemini provider is enabled."""
         return self.__api_key is not None
 
-    def __init__(self, config: BotConfig):
+    def __init__(self, config: BotConfig, model: str = None):
         self.__api_key = config.gemini_api_key
-
-    def __post_prompt(self, prompt: str) -> str:
-        response = requests.post(
-            f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={self.__api_key}",
+        self.model = model or getattr(config, "gemini_model", None) or self.DEFAULT_MODEL
+
+    def __post_prompt(self, prompt: str, generation_config: dict = None) -> str:
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        if generation_config:
+            payload["generationConfig"] = generation_config
+        response = session.post(
+            f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent?key={self.__api_key}",
             headers={"Content-Type": "application/json"},
-            json={"contents": [{"parts": [{"text": prompt}]}]},
+            json=payload,
         )
         result = response.json()
         logger.debug(f"Gemini response: {result}")
@@ -39,52 +52,17 @@ class GeminiProvider(LLMProvider):
 
     def check_connection(self):
         try:
-            response = requests.get(f"https://generativelanguage.googleapis.com/v1beta/models?key={self.__api_key}")
+            response = session.get(f"https://generativelanguage.googleapis.com/v1beta/models?key={self.__api_key}")
             return response.status_code == 200
         except Exception as e:
             logger.error(f"Error pinging Gemini: {e}")
             return False
 
     def split_text(self, text) -> list:
-        prompt = f"""\
-You are a helpful assistant, your task is to split the following text into smaller tasks that can be processed individually.
-A task is something that needs to be done, that will be fed into another LLM for processing.
-
-It is very important that the message is preserved, commas might appear in the text.
-Do not blindly split by commas just because they are there.
-
-Examples
-- "We must go to the store, buy groceries, and clean the house." is three tasks.
-- "make sure that you buy apples, oranges, and bananas" is one task.
-
-If the text contains multiple tasks, split them into individual tasks.
-If the text contains only one task, return just one task.
-If just one temporal reference is present, add it to all tasks.
-If more than one temporal reference is present, split tasks accordingly.
-
-Please provide a JSON response to the following request: '{text}' with a list for each task.
-
-Clean linking terms in the language the text is written in, such as "and", "y", "e", "then", "luego", etc.
-Examples:
-Input: "Go to the store, buy groceries, and clean the house."
-Output: ["Go to the store", "Buy groceries", "Clean the house"]
-
-Input: "crerar una reunión el próximo martes a las 10h y enviar el informe mensual."
-Output: ["Crear una reunión el próximo martes a las 10h", "Enviar el informe mensual el próximo martes a las 10h"]
-
-NEVER CREATE ANY EVENT OR TASK, that is not your job.
-Always return a JSON array of strings.
-
-"""
-        response = self.__post_prompt(prompt)
+        response = self.__post_prompt(split_prompt(text), SPLIT_GENERATION_CONFIG)
         logger.debug(f"Split tasks response: {response}")
 
-        # text is in format: ```json [ ... ] ```
-        match = re.search(r"\[.*\]", response, re.DOTALL)
-        if not match:
-            raise Exception("Failed to extract JSON array from response")
-
-        json_data = json.loads(match.group(0))
+        json_data = parse_segments(response)
         logger.info(f"Split tasks JSON: {json_data}")
         return json_data
 
@@ -115,14 +93,7 @@ Time can be AM/PM or 24-hour format.
 Time can end on "h", such as 12:00h, that is 24-hour format. No ending suffix for time is 24-hour format.
 It is illegal to return an empty or invalid date for events.
 """
-        content = self.__post_prompt(prompt)
-
-        # Extract the JSON from the text
-        match = re.search(r"{.*}", content, re.DOTALL)
-        if not match:
-            raise Exception("Failed to extract JSON from response")
-
-        response = match.group(0)
-        json_date = json.loads(response)
-        logger.info(f"Extracted JSON: {json_date}")
-        return json_date
+        content = self.__post_prompt(prompt, TASK_GENERATION_CONFIG)
+        task = task_validator.validate(json.loads(content))
+        logger.info(f"Extracted JSON: {task}")
+        return task
@@ -0,0 +1,20 @@
+"""Pooled HTTP connections shared by every LLM provider.
+
+Reusing connections skips a DNS lookup and a TLS handshake per call, and lets the warm-up open
+them before the first message arrives.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Idle connections kept per host; enough for the bot's in-flight messages
+POOL_MAXSIZE = 8
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE))
+    return session
+
+
+session = _build_session()
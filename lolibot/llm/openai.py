@@ -2,11 +2,12 @@
 
 import json
 import logging
-import requests
 
 from lolibot.config import BotConfig
-from .base import LLMProvider
-from .prompts import common_prompt
+from .base import Capability, LLMProvider, parse_segments
+from .http import session
+from .prompts import common_prompt, split_prompt
+from .schema import TASK_SCHEMA, task_validator
 
 logger = logging.getLogger(__name__)
 
@@ -14,50 +15,66 @@ logger = logging.getLogger(__name__)
 class OpenAIProvider(LLMProvider):
     """OpenAI LLM provider."""
 
+    DEFAULT_MODEL = "gpt-4o-mini"
+    capabilities = frozenset({Capability.SPLIT, Capability.EXTRACT, Capability.JSON_MODE})
+
     def name(self) -> str:
         return "OpenAI"
 
     def split_text(self, text) -> list:
-        raise NotImplementedError("OpenAIProvider does not implement split_text")
+        """Split text into tasks with OpenAI API."""
+        # JSON mode only returns objects, so the array comes wrapped under "tasks"
+        content = self.__chat(
+            split_prompt() + 'Wrap the array in a JSON object: {"tasks": [...]}',
+            text,
+            {"type": "json_object"},
+        )
+        return parse_segments(content)
 
     def enabled(self) -> bool:
         """Check if the provider is enabled."""
         return self.__api_key is not None
 
-    def __init__(self, config: BotConfig):
+    def __init__(self, config: BotConfig, model: str = None):
         self.__api_key = config.openai_api_key
+        self.model = model or getattr(config, "openai_model", None) or self.DEFAULT_MODEL
 
     def process_text(self, text) -> dict:
         """Process text with OpenAI API."""
-        response = requests.post(
+        # Structured outputs make the API itself enforce the TaskData schema
+        response_format = {"type": "json_schema", "json_schema": {"name": "task", "strict": True, "schema": TASK_SCHEMA}}
+        return task_validator.validate(json.loads(self.__chat(common_prompt(), text, response_format)))
+
+    def __chat(self, system_prompt: str, text: str, response_format: dict) -> str:
+        response = session.post(
             "https://api.openai.com/v1/chat/completions",
             headers={
                 "Authorization": f"Bearer {self.__api_key}",
                 "Content-Type": "application/json",
             },
             json={
-                "model": "gpt-3.5-turbo",
+                "model": self.model,
                 "messages": [
                     {
                         "role": "system",
-                        "content": common_prompt(),
+                        "content": system_prompt,
                     },
                     {"role": "user", "content": text},
                 ],
                 "temperature": 0.2,
-                "response_format": {"type": "json_object"},
+                "response_format": response_format,
             },
         )
         result = response.json()
         logger.debug(f"OpenAI response: {result}")
         if "error" in result:
             raise Exception(result["error"]["message"])
-        return json.loads(result["choices"][0]["message"]["content"])
+        return result["choices"][0]["message"]["content"]
 
     def check_connection(self) -> bool:
         """Ping OpenAI API to check if it's reachable."""
         try:
-            response = requests.get(
+            response = session.get(
                 "https://api.openai.com/v1/models",
                 headers={"Authorization": f"Bearer {self.__api_key}"},
             )
@@ -1,45 +1,102 @@
 """LLM processor module."""
 
-from typing import List
+from datetime import date
+from typing import Hashable, List, Optional, Tuple
 import random
 import logging
+import time
 
 from lolibot.config import BotConfig
-from lolibot.llm.base import LLMProvider
+from lolibot.llm.base import Capability, LLMProvider
+from lolibot.services import Extraction
 from .openai import OpenAIProvider
 from .anthropic import AnthropicProvider
 from .gemini import GeminiProvider
 from .default import DefaultProvider
+from .fast_path import FastPathStats, overall_confidence
+from .prompts import PROMPT_VERSION
+from .single_flight import SingleFlight
+from .template_cache import TemplateCache
 
 logger = logging.getLogger(__name__)
 
+# Shared by every processor, so identical requests coalesce across messages and chats
+llm_single_flight = SingleFlight()
+llm_template_cache = TemplateCache()
+llm_fast_path_stats = FastPathStats()
+
 
 class LLMProcessor:
     """Process natural language using LLM APIs."""
 
-    def __init__(self, config: BotConfig):
+    def __init__(
+        self,
+        config: BotConfig,
+        single_flight: Optional[SingleFlight] = None,
+        template_cache: Optional[TemplateCache] = None,
+    ):
         self.providers = [
             OpenAIProvider(config),
             AnthropicProvider(config),
             GeminiProvider(config),
         ]
         self.default_provider = DefaultProvider(config)
+        self.context = getattr(config, "current_context", "default")
+        self.single_flight = single_flight or llm_single_flight
+
+        # The template cache is on by default; a verify rate above 0 re-asks the LLM for that share of hits
+        self.template_cache = None
+        if getattr(config, "template_cache_enabled", None) is not False:
+            self.template_cache = template_cache or llm_template_cache
+        self.template_cache_verify_rate = getattr(config, "template_cache_verify_rate", None) or 0.0
+
+        # Regex results scoring at least this confidence skip the LLM; None disables the fast path.
+        # In shadow mode they are only compared against the LLM, which still answers.
+        self.local_threshold = getattr(config, "local_fast_path_threshold", None)
+        self.local_shadow = bool(getattr(config, "local_fast_path_shadow", None))
+        self.fast_path_stats = llm_fast_path_stats
 
-    def __shuffle_providers(self) -> List[LLMProvider]:
-        """Randomly select first working LLM."""
+    def _flight_key(self, operation: str, text: str) -> Hashable:
+        """Requests are identical if they share text, reference date, prompt version and context."""
+        normalized = " ".join(text.split())
+        return (operation, normalized, date.today().isoformat(), PROMPT_VERSION, self.context)
+
+    def __shuffle_providers(self, capability: Capability, prefer: Optional[Capability] = None) -> List[LLMProvider]:
+        """Randomly order the enabled LLMs able to serve the request, those that also have `prefer` first."""
         llm_providers = random.sample(self.providers, len(self.providers))
-        llm_providers = [p for p in llm_providers if p.enabled()]
+        llm_providers = [p for p in llm_providers if capability in p.capabilities and p.enabled()]
         if not llm_providers:
-            logger.error("No LLM providers are enabled. Falling back to regex-based parsing.")
+            logger.error(f"No enabled LLM provider supports {capability.value}. Falling back to regex-based parsing.")
             return [self.default_provider]
+        if prefer is not None:
+            # The sort is stable, so load is still spread among the preferred providers
+            llm_providers.sort(key=lambda p: prefer not in p.capabilities)
         return llm_providers
 
     def split_text(self, text) -> list:
         """
         Split text into smaller chunks if needed.
-        Currently, this is a placeholder that returns the text as a single chunk.
+        Single-clause messages are returned as they are, without asking any provider.
+        Concurrent identical requests share a single provider call.
         """
-        providers = self.__shuffle_providers()
+        if self._is_single_clause(text):
+            return [text]
+        return self.single_flight.do(self._flight_key("split", text), lambda: self._split_text(text))
+
+    async def split_text_async(self, text) -> list:
+        """Async variant of `split_text`, coalesced with threaded callers too."""
+        if self._is_single_clause(text):
+            return [text]
+        return await self.single_flight.do_async(self._flight_key("split", text), lambda: self._split_text(text))
+
+    def _is_single_clause(self, text) -> bool:
+        single = self.default_provider.is_single_clause(text)
+        self.fast_path_stats.record_split(skipped=single)
+        return single
+
+    def _split_text(self, text) -> list:
+        # A prompted JSON array can come back malformed, JSON mode answers always parse
+        providers = self.__shuffle_providers(Capability.SPLIT, prefer=Capability.JSON_MODE)
         response = None
 
         for provider in providers:
@@ -56,19 +113,71 @@ class LLMProcessor:
 
     def process_text(self, text) -> dict:
         """
-        Randomly select first working LLM
+        Randomly select first working LLM.
+        Concurrent identical requests share a single provider call.
         """
-        provider = self.__shuffle_providers()
-        response = None
+        return self.extract(text).task
 
-        for provider in provider:
-            try:
-                response = provider.process_text(text)
-                break
-            except Exception as e:
-                logger.warning(f"Error processing text with {provider.name()}: {e}")
+    async def process_text_async(self, text) -> dict:
+        """Async variant of `process_text`, coalesced with threaded callers too."""
+        return (await self.extract_async(text)).task
+
+    def extract(self, text) -> Extraction:
+        """Like `process_text`, also telling which provider and model answered and how fast."""
+        return self.single_flight.do(self._flight_key("process", text), lambda: self._process_text(text))
+
+    async def extract_async(self, text) -> Extraction:
+        """Async variant of `extract`, coalesced with threaded callers too."""
+        return await self.single_flight.do_async(self._flight_key("process", text), lambda: self._process_text(text))
 
+    def _process_text(self, text) -> Extraction:
+        local = None
+        if self.local_threshold is not None or self.local_shadow:
+            local, confidence = self.default_provider.process_text_with_confidence(text)
+            if overall_confidence(confidence) >= (self.local_threshold or 0.0):
+                self.fast_path_stats.record_local_hit()
+                if not self.local_shadow:
+                    logger.debug(f"Local fast path accepted '{text}' with confidence {confidence}")
+                    return Extraction(local, self.default_provider.name())
+            else:
+                self.fast_path_stats.record_escalation()
+                local = None
+
+        mask, cached = None, None
+        scope = (self.context, PROMPT_VERSION)
+        if self.template_cache is not None:
+            mask = self.default_provider.mask_temporal(text)
+        if mask is not None:
+            cached = self.template_cache.lookup(mask, scope)
+            if cached is not None and random.random() >= self.template_cache_verify_rate:
+                logger.debug(f"Template cache hit for '{mask.masked}'")
+                return Extraction(cached, prompt_version=PROMPT_VERSION)
+
+        started = time.perf_counter()
+        response, provider = self._process_text_with_providers(text)
+        latency_ms = (time.perf_counter() - started) * 1000
         if not response:
             logger.error("All LLM providers failed. Falling back to regex-based parsing.")
-            return self.default_provider.process_text(text)
-        return response
+            if cached is not None:
+                return Extraction(cached, prompt_version=PROMPT_VERSION)
+            return Extraction(self.default_provider.process_text(text), self.default_provider.name())
+
+        # Only real LLM answers are worth caching or verifying against
+        if provider is self.default_provider:
+            return Extraction(response, provider.name(), latency_ms=latency_ms)
+        if local is not None:
+            self.fast_path_stats.record_shadow(local, response)
+        if cached is not None:
+            self.template_cache.record_verification(cached, response)
+        elif mask is not None:
+            self.template_cache.store(mask, scope, response)
+        return Extraction(response, provider.name(), provider.model, latency_ms, PROMPT_VERSION)
+
+    def _process_text_with_providers(self, text) -> Tuple[Optional[dict], Optional[LLMProvider]]:
+        """Return the first successful response and the provider that gave it."""
+        for provider in self.__shuffle_providers(Capability.EXTRACT):
+            try:
+                return provider.process_text(text), provider
+            except Exception as e:
+                logger.warning(f"Error processing text with {provider.name()}: {e}")
+        return None, None
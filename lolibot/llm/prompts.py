@@ -1,5 +1,8 @@
 """Common prompt utilities for LLM providers."""
 
+# Bump whenever any provider prompt changes, so cached or coalesced results are not reused across prompts
+PROMPT_VERSION = 2
+
 
 def common_prompt(text: str = None) -> str:
     if text is None:
@@ -26,3 +29,41 @@ Return ONLY a JSON object with:
     "time": "HH:MM" (extract time or null if not specified)
 }}
 """
+
+
+def split_prompt(text: str = None) -> str:
+    if text is None:
+        request_text = "Please provide a JSON response to the user's message with a list for each task."
+    else:
+        request_text = f"Please provide a JSON response to the following request: '{text}' with a list for each task."
+
+    return f"""\
+You are a helpful assistant, your task is to split the following text into smaller tasks that can be processed individually.
+A task is something that needs to be done, that will be fed into another LLM for processing.
+
+It is very important that the message is preserved, commas might appear in the text.
+Do not blindly split by commas just because they are there.
+
+Examples
+- "We must go to the store, buy groceries, and clean the house." is three tasks.
+- "make sure that you buy apples, oranges, and bananas" is one task.
+
+If the text contains multiple tasks, split them into individual tasks.
+If the text contains only one task, return just one task.
+If just one temporal reference is present, add it to all tasks.
+If more than one temporal reference is present, split tasks accordingly.
+
+{request_text}
+
+Clean linking terms in the language the text is written in, such as "and", "y", "e", "then", "luego", etc.
+Examples:
+Input: "Go to the store, buy groceries, and clean the house."
+Output: ["Go to the store", "Buy groceries", "Clean the house"]
+
+Input: "crerar una reunión el próximo martes a las 10h y enviar el informe mensual."
+Output: ["Crear una reunión el próximo martes a las 10h", "Enviar el informe mensual el próximo martes a las 10h"]
+
+NEVER CREATE ANY EVENT OR TASK, that is not your job.
+Always return a JSON array of strings.
+
+"""
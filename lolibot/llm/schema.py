@@ -0,0 +1,160 @@
+"""TaskData JSON schema shared by every LLM provider, and its validator.
+
+OpenAI gets it as a strict structured output, Anthropic as the input schema of a forced tool call
+and Gemini as a response schema, so all of them answer with the same object. The validator is
+compiled once from the same schema and checks and normalizes an answer in a single pass.
+"""
+
+import copy
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+TASK_TYPES = ("task", "event", "reminder")
+
+TASK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "task_type": {"type": "string", "enum": list(TASK_TYPES), "description": "What the user wants to create"},
+        "title": {"type": "string", "description": "Brief title, at most 50 characters"},
+        "description": {"type": ["string", "null"], "description": "Detailed description"},
+        "date": {"type": ["string", "null"], "pattern": r"^\d{4}-\d{2}-\d{2}$", "description": "YYYY-MM-DD"},
+        "time": {"type": ["string", "null"], "pattern": r"^\d{2}:\d{2}$", "description": "HH:MM, 24-hour format"},
+        "duration": {"type": ["integer", "null"], "description": "Duration in minutes"},
+    },
+    # Strict structured outputs require every property; optional ones are nullable instead
+    "required": ["task_type", "title", "description", "date", "time", "duration"],
+    "additionalProperties": False,
+}
+
+# Fields an answer cannot do without; missing nullable fields are read as null
+REQUIRED_FIELDS = ("task_type", "title")
+
+TIME_PATTERN = re.compile(r"^(\d{1,2}):(\d{2})(?::\d{2})?$")
+
+
+class SchemaValidationError(Exception):
+    """An LLM answer does not match the TaskData schema."""
+
+    def __init__(self, errors: List[Tuple[str, str]]):
+        self.errors = errors
+        super().__init__("; ".join(f"{field}: {message}" for field, message in errors))
+
+
+def gemini_schema(schema: dict = TASK_SCHEMA) -> dict:
+    """Translate the schema to the OpenAPI subset Gemini accepts: nullable flags instead of type lists."""
+    translated = {}
+    for key, value in schema.items():
+        if key in ("additionalProperties", "pattern"):
+            continue
+        if key == "type" and isinstance(value, list):
+            translated["type"] = next(t for t in value if t != "null")
+            translated["nullable"] = "null" in value
+        elif key == "properties":
+            translated[key] = {name: gemini_schema(prop) for name, prop in value.items()}
+        else:
+            translated[key] = copy.deepcopy(value)
+    return translated
+
+
+def _string_checker(spec: dict) -> Callable:
+    enum = frozenset(spec.get("enum", ()))
+
+    def check(value):
+        if not isinstance(value, str):
+            raise ValueError(f"expected a string, got {type(value).__name__}")
+        value = value.strip()
+        if enum:
+            value = value.lower()
+            if value not in enum:
+                raise ValueError(f"must be one of {sorted(enum)}, got '{value}'")
+        elif not value:
+            raise ValueError("must not be empty")
+        return value
+
+    return check
+
+
+def _date_checker(spec: dict) -> Callable:
+    pattern = re.compile(spec["pattern"])
+
+    def check(value):
+        if not isinstance(value, str) or not pattern.match(value.strip()):
+            raise ValueError(f"expected YYYY-MM-DD, got {value!r}")
+        return value.strip()
+
+    return check
+
+
+def _time_checker() -> Callable:
+    def check(value):
+        match = TIME_PATTERN.match(value.strip()) if isinstance(value, str) else None
+        if not match or int(match.group(1)) > 23:
+            raise ValueError(f"expected HH:MM, got {value!r}")
+        # "9:00" and "09:00:00" are the same time, normalize them
+        return f"{int(match.group(1)):02d}:{match.group(2)}"
+
+    return check
+
+
+def _integer_checker() -> Callable:
+    def check(value):
+        if isinstance(value, bool):
+            raise ValueError("expected an integer, got a boolean")
+        if isinstance(value, int):
+            return value
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, str) and value.strip().isdigit():
+            return int(value.strip())
+        raise ValueError(f"expected an integer, got {value!r}")
+
+    return check
+
+
+def _checker_for(name: str, spec: dict) -> Callable:
+    types = spec["type"] if isinstance(spec["type"], list) else [spec["type"]]
+    if "integer" in types:
+        return _integer_checker()
+    if name == "date":
+        return _date_checker(spec)
+    if name == "time":
+        return _time_checker()
+    return _string_checker(spec)
+
+
+class TaskValidator:
+    """Check an answer against the schema and normalize it, reporting every bad field at once."""
+
+    def __init__(self, schema: dict = TASK_SCHEMA, required=REQUIRED_FIELDS):
+        # Compile one checker per field up front, validation is then a single loop
+        self._fields: List[Tuple[str, bool, bool, Callable]] = []
+        for name, spec in schema["properties"].items():
+            types = spec["type"] if isinstance(spec["type"], list) else [spec["type"]]
+            self._fields.append((name, name in required, "null" in types, _checker_for(name, spec)))
+
+    def validate(self, data) -> Dict[str, Optional[object]]:
+        """Return the fields of the schema, normalized; unknown fields are dropped."""
+        if not isinstance(data, dict):
+            raise SchemaValidationError([("", f"expected an object, got {type(data).__name__}")])
+
+        result, errors = {}, []
+        for name, required, nullable, check in self._fields:
+            value = data.get(name)
+            if value is None or value == "":
+                if required:
+                    errors.append((name, "is required"))
+                elif not nullable:
+                    errors.append((name, "must not be null"))
+                result[name] = None
+                continue
+            try:
+                result[name] = check(value)
+            except ValueError as e:
+                errors.append((name, str(e)))
+
+        if errors:
+            raise SchemaValidationError(errors)
+        return result
+
+
+task_validator = TaskValidator()
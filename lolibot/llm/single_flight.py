@@ -0,0 +1,88 @@
+"""Single-flight coalescing of identical in-flight calls."""
+
+import asyncio
+import copy
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """One in-flight call, shared by its leader and every caller waiting on it."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its outcome.
+
+    The first caller for a key (the leader) runs the function. Callers arriving while it runs
+    wait and receive a copy of the same result, or the same exception. If the leader is
+    interrupted (anything that is not an `Exception`, like cancellation or KeyboardInterrupt),
+    waiters do not inherit the interruption: one of them retries the call instead.
+
+    Threaded callers use `do`; async callers use `do_async`, which shares the same table, so both
+    kinds coalesce with each other.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is None:
+                    call = self._calls[key] = _Call()
+                    self._counters["calls"] += 1
+                    leader = True
+                else:
+                    self._counters["coalesced"] += 1
+                    leader = False
+
+            if leader:
+                return self._lead(key, call, fn)
+
+            call.done.wait()
+            if call.error is None:
+                # Each caller gets its own copy, so nobody mutates someone else's result
+                return copy.deepcopy(call.result)
+            if isinstance(call.error, Exception):
+                raise call.error
+            logger.debug(f"Leader for {key!r} was interrupted, retrying")
+
+    def _lead(self, key: Hashable, call: _Call, fn: Callable[[], Any]) -> Any:
+        try:
+            result = fn()
+            # Keep a pristine copy for waiters, the leader's caller may mutate its own result
+            call.result = copy.deepcopy(result)
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Coalesce from async code. The call runs in a worker thread, so cancelling the awaiting
+        task only stops the wait: the shared call still completes for everyone else."""
+        return await asyncio.to_thread(self.do, key, fn)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, "in_flight": len(self._calls)}
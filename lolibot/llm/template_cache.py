@@ -0,0 +1,141 @@
+"""Date-agnostic cache of LLM extractions.
+
+"standup tomorrow at 10:00" and "standup next friday at 10:00" get the same answer from the LLM
+except for the date. Masking date and time expressions gives both the same key, so the second one
+reuses the first one's skeleton (task type, title, description, duration) and only the date and
+time are filled in locally, with the regex parser.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from .default import TemporalMask
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 512
+
+SKELETON_FIELDS = ("task_type", "title", "description", "duration")
+TEXT_FIELDS = ("title", "description")
+
+# Placeholders for the masked expressions and their resolved values inside cached texts
+DATE_TEXT, TIME_TEXT, DATE_VALUE, TIME_VALUE = "<date>", "<time>", "<date_value>", "<time_value>"
+
+
+def _templatize(value: str, mask: TemporalMask, result: dict) -> str:
+    replacements = (
+        (mask.date_text, DATE_TEXT),
+        (mask.time_text, TIME_TEXT),
+        (result.get("date"), DATE_VALUE),
+        (result.get("time"), TIME_VALUE),
+    )
+    for needle, placeholder in replacements:
+        if needle and len(needle) > 1:
+            value = _replace_ignore_case(value, needle, placeholder)
+    return value
+
+
+def _replace_ignore_case(value: str, needle: str, replacement: str) -> str:
+    lowered, needle = value.lower(), needle.lower()
+    parts, start = [], 0
+    while (index := lowered.find(needle, start)) != -1:
+        parts.append(value[start:index])
+        parts.append(replacement)
+        start = index + len(needle)
+    parts.append(value[start:])
+    return "".join(parts)
+
+
+def _fill(value: str, mask: TemporalMask) -> str:
+    replacements = (
+        (DATE_TEXT, mask.date_text),
+        (TIME_TEXT, mask.time_text),
+        (DATE_VALUE, mask.date),
+        (TIME_VALUE, mask.time),
+    )
+    for placeholder, filling in replacements:
+        value = value.replace(placeholder, filling or "")
+    return value
+
+
+class TemplateCache:
+    """LRU cache of extraction skeletons keyed on date-masked text."""
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stored": 0, "not_cacheable": 0, "verified": 0, "agreed": 0}
+
+    def lookup(self, mask: TemporalMask, scope: Hashable) -> Optional[dict]:
+        """Return a full extraction for the masked text, with date and time re-filled locally."""
+        key = (scope, mask.masked)
+        with self._lock:
+            skeleton = self._entries.get(key)
+            if skeleton is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+
+        result = {field: _fill(value, mask) if field in TEXT_FIELDS and value else value for field, value in skeleton.items()}
+        result["date"] = mask.date
+        result["time"] = mask.time
+        return result
+
+    def store(self, mask: TemporalMask, scope: Hashable, result: dict) -> bool:
+        """Cache the skeleton of an LLM extraction, if its date and time match what the parser resolves locally.
+
+        When they disagree the parser cannot re-fill future hits correctly, so nothing is cached.
+        """
+        if not result.get("task_type") or not result.get("title"):
+            return self._not_cacheable()
+        if result.get("date") != mask.date or result.get("time") != mask.time:
+            return self._not_cacheable()
+
+        skeleton = {}
+        for field in SKELETON_FIELDS:
+            value = result.get(field)
+            skeleton[field] = _templatize(value, mask, result) if field in TEXT_FIELDS and isinstance(value, str) else value
+
+        with self._lock:
+            self._entries[(scope, mask.masked)] = skeleton
+            self._entries.move_to_end((scope, mask.masked))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._counters["stored"] += 1
+        return True
+
+    def _not_cacheable(self) -> bool:
+        with self._lock:
+            self._counters["not_cacheable"] += 1
+        return False
+
+    def record_verification(self, cached: dict, fresh: dict) -> bool:
+        """Compare a cache hit against a fresh LLM extraction of the same text."""
+        agreed = all(cached.get(field) == fresh.get(field) for field in ("task_type", "title", "date", "time"))
+        if not agreed:
+            logger.info(f"Template cache disagreement: cached {cached}, fresh {fresh}")
+        with self._lock:
+            self._counters["verified"] += 1
+            self._counters["agreed"] += int(agreed)
+        return agreed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Counters plus hit ratio and the accuracy measured against fresh LLM calls."""
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "size": size,
+            "hit_ratio": counters["hits"] / lookups if lookups else 0.0,
+            "accuracy": counters["agreed"] / counters["verified"] if counters["verified"] else None,
+        }
@@ -1,6 +1,8 @@
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field, fields, make_dataclass
 from datetime import date
 from enum import Enum
+from operator import attrgetter
 from typing import List, Optional
 
 
@@ -25,9 +27,12 @@ class StatusItem:
     status_type: StatusType
 
 
-@dataclass()
+@dataclass(frozen=True, slots=True, init=False)
 class TaskData:
-    """Data structure for task information."""
+    """Data structure for task information.
+
+    Immutable: middlewares derive new instances with `replace`, which always carries every field over.
+    """
 
     task_type: str
     title: str
@@ -37,6 +42,53 @@ class TaskData:
     invitees: Optional[List[str]] = None
     duration: Optional[int] = None
 
+    def __new__(cls, task_type, title, description=None, date=None, time=None, invitees=None, duration=None):
+        # The generated frozen __init__ goes through object.__setattr__ once per field, twice as slow as a mutable
+        # dataclass. The draft shares TaskData's slots without freezing them, so its fields are stored at mutable
+        # speed, and it becomes a TaskData once they are all set.
+        self = _new_draft(_TaskDataDraft)
+        self.task_type = _intern(task_type) if type(task_type) is str else task_type
+        self.title = title
+        self.description = description
+        self.date = date
+        self.time = time
+        self.invitees = invitees
+        self.duration = duration
+        self.__class__ = cls
+        return self
+
+    def __init_subclass__(cls):
+        # Subclasses may add attributes, so they do not share the draft's layout and are built the usual way
+        cls.__new__ = staticmethod(_new_plain)
+        if "__init__" not in cls.__dict__:
+            cls.__init__ = _init_fields
+
+    def __reduce__(self):
+        # Copies and pickles pass the fields to __new__, which needs them
+        return TaskData, _task_values(self)
+
+    def replace(self, **changes) -> "TaskData":
+        """Return a copy with some fields changed."""
+        task_type, title, description, date, time, invitees, duration = _task_values(self)
+        if not changes:
+            return TaskData(task_type, title, description, date, time, invitees, duration)
+        if not changes.keys() <= _TASK_FIELD_SET:
+            raise TypeError(f"Unknown TaskData fields: {', '.join(changes.keys() - _TASK_FIELD_SET)}")
+        get = changes.get
+        return TaskData(
+            get("task_type", task_type),
+            get("title", title),
+            get("description", description),
+            get("date", date),
+            get("time", time),
+            get("invitees", invitees),
+            get("duration", duration),
+        )
+
+    def db_row(self) -> tuple:
+        """Values for the task columns of the tasks table, in DB_COLUMNS order."""
+        return _db_values(self)
+
     @staticmethod
     def from_error(error_message: str) -> "TaskData":
         """Create a TaskData instance from an error message."""
@@ -67,6 +119,43 @@ class TaskData:
         )
 
 
+# Field layout computed once, so copies and DB rows do not introspect the dataclass every time
+TASK_FIELDS = tuple(field.name for field in fields(TaskData))
+DB_COLUMNS = ("task_type", "title", "description", "date", "time")
+_TASK_FIELD_SET = frozenset(TASK_FIELDS)
+_task_values = attrgetter(*TASK_FIELDS)
+_db_values = attrgetter(*DB_COLUMNS)
+
+
+def _new_plain(cls, *args, **kwargs):
+    return object.__new__(cls)
+
+
+def _init_fields(self, task_type, title, description=None, date=None, time=None, invitees=None, duration=None):
+    values = (_intern(task_type) if type(task_type) is str else task_type, title, description, date, time, invitees, duration)
+    for name, value in zip(TASK_FIELDS, values):
+        object.__setattr__(self, name, value)
+
+
+_new_draft = object.__new__
+_intern = sys.intern
+# TaskData's fields and slots, mutable: TaskData.__new__ fills one in, then turns it into a TaskData
+_TaskDataDraft = make_dataclass("_TaskDataDraft", [(f.name, f.type, field(default=f.default)) for f in fields(TaskData)], slots=True)
+
+
+@dataclass(frozen=True)
+class Extraction:
+    """A task extracted from a segment, and where it came from."""
+
+    # The answer as returned, before any middleware
+    task: dict
+    # Provider name, or None when the answer did not come from a provider call (e.g. a cache hit)
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    latency_ms: Optional[float] = None
+    prompt_version: Optional[int] = None
+
+
 @dataclass
 class TaskResponse:
     """Response from processing a task."""
@@ -74,3 +163,4 @@ class TaskResponse:
     task: TaskData
     processed: bool = False
     feedback: Optional[str] = None
+    extraction: Optional[Extraction] = None
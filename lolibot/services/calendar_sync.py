@@ -0,0 +1,214 @@
+"""Local mirror of the upcoming Google Calendar events of every context.
+
+Reading the calendar live costs a round trip per question. The mirror keeps upcoming events in
+SQLite instead: the first sync of a context lists them all, later ones only fetch what changed
+since, using the sync token Calendar hands out with every listing. When Calendar invalidates a
+token (HTTP 410 Gone) the mirror of that context is dropped and listed again from scratch.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from googleapiclient.errors import HttpError
+
+from lolibot import db
+from lolibot.config import BotConfig
+from lolibot.google_api import get_google_service
+
+logger = logging.getLogger(__name__)
+
+# Seconds between syncs when the configuration does not set `calendar_sync_interval`
+DEFAULT_SYNC_INTERVAL = 300
+# The largest page Calendar serves, fewer round trips on a full sync
+PAGE_SIZE = 2500
+
+
+@dataclass
+class SyncState:
+    """What the syncer knows about the mirror of one context."""
+
+    synced_at: Optional[float] = None
+    full: bool = False
+    changes: int = 0
+    error: Optional[str] = None
+
+
+def _local_time(moment: dict, tz: ZoneInfo) -> Tuple[str, bool]:
+    """Turn a Calendar start or end into naive local ISO time, which sorts and compares as text."""
+    if "dateTime" in moment:
+        value = datetime.fromisoformat(moment["dateTime"])
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=ZoneInfo(moment["timeZone"]) if moment.get("timeZone") else tz)
+        return value.astimezone(tz).replace(tzinfo=None).isoformat(timespec="seconds"), False
+    return f"{moment['date']}T00:00:00", True
+
+
+def event_row(event: dict, tz: ZoneInfo) -> tuple:
+    """The (event_id, summary, start, end, all_day) row mirroring a Calendar event."""
+    start, all_day = _local_time(event["start"], tz)
+    end = _local_time(event["end"], tz)[0] if "end" in event else start
+    return event["id"], event.get("summary") or "(no title)", start, end, all_day
+
+
+class CalendarSync:
+    """Keep the calendar mirror of every context up to date, from a background thread."""
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_SYNC_INTERVAL,
+        service: Callable[[BotConfig], object] = lambda config: get_google_service(config, "calendar"),
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ):
+        self.interval = interval
+        self.service = service
+        self.clock = clock
+        self._states: Dict[str, SyncState] = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sync(self, config: BotConfig) -> SyncState:
+        """Bring the mirror of the config's context up to date, incrementally when possible."""
+        context = config.current_context
+        # One sync at a time, the bot's thread and a CLI `--sync` must not interleave their changes
+        with self._sync_lock:
+            full, changes, error = False, 0, None
+            try:
+                try:
+                    full, changes = self._sync(config, db.load_calendar_sync_token(context))
+                except HttpError as e:
+                    if e.resp.status != 410:
+                        raise
+                    logger.info(f"Calendar sync token of context '{context}' expired, syncing again from scratch")
+                    db.clear_calendar_mirror(context)
+                    full, changes = self._sync(config, None)
+                logger.debug(f"Synced calendar of context '{context}': {changes} changes{' (full)' if full else ''}")
+            except Exception as e:
+                error = str(e)
+                logger.warning(f"Could not sync calendar of context '{context}': {e}")
+
+        with self._lock:
+            state = self._states.setdefault(context, SyncState())
+            state.full, state.changes, state.error = full, changes, error
+            if error is None:
+                state.synced_at = time.time()
+            return SyncState(state.synced_at, state.full, state.changes, state.error)
+
+    def _sync(self, config: BotConfig, sync_token: Optional[str]) -> Tuple[bool, int]:
+        tz = ZoneInfo(config.default_timezone)
+        now = self.clock()
+        params = {"calendarId": "primary", "singleEvents": True, "maxResults": PAGE_SIZE}
+        if sync_token:
+            params["syncToken"] = sync_token
+        else:
+            # Only upcoming events, the mirror drops past ones anyway
+            params["timeMin"] = now.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+        events = self.service(config).events()
+        upserted, deleted = [], []
+        while True:
+            response = events.list(**params).execute()
+            for event in response.get("items", []):
+                if event.get("status") == "cancelled":
+                    deleted.append(event["id"])
+                else:
+                    upserted.append(event_row(event, tz))
+            if "nextPageToken" not in response:
+                break
+            params["pageToken"] = response["nextPageToken"]
+
+        prune_before = now.astimezone(tz).replace(tzinfo=None).isoformat(timespec="seconds")
+        db.save_calendar_changes(
+            config.current_context, upserted, deleted, response.get("nextSyncToken"), full=not sync_token, prune_before=prune_before
+        )
+        return not sync_token, len(upserted) + len(deleted)
+
+    def sync_all(self, configs: Iterable[BotConfig]):
+        for config in configs:
+            self.sync(config)
+
+    def _run(self, configs: List[BotConfig]):
+        while True:
+            try:
+                self.sync_all(configs)
+            except Exception as e:
+                logger.error(f"Calendar sync failed: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self, configs: Iterable[BotConfig]):
+        """Sync the given contexts now and then every `interval` seconds, until stopped."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(list(configs),), name="calendar-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self, context: str) -> Optional[SyncState]:
+        with self._lock:
+            state = self._states.get(context)
+            return SyncState(state.synced_at, state.full, state.changes, state.error) if state else None
+
+
+# One syncer covers the calendars of every context
+calendar_sync = CalendarSync()
+
+
+def local_now(config: BotConfig) -> datetime:
+    """The current naive local time in the config's time zone, as the mirror stores it."""
+    return datetime.now(ZoneInfo(config.default_timezone)).replace(tzinfo=None)
+
+
+def day_start(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+# Agenda periods, as (days from today to the first day, number of days)
+PERIODS = {"today": (0, 1), "tomorrow": (1, 1), "week": (0, 7)}
+
+
+def agenda_range(period: str, now: datetime) -> Tuple[datetime, datetime]:
+    """The [start, end) local time range a period covers, starting from `now`'s day."""
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period '{period}', expected one of: {', '.join(PERIODS)}")
+    offset, days = PERIODS[period]
+    start = day_start(now) + timedelta(days=offset)
+    return start, start + timedelta(days=days)
+
+
+@dataclass(frozen=True)
+class AgendaEvent:
+    """One mirrored event, with naive local times."""
+
+    summary: str
+    start: datetime
+    end: datetime
+    all_day: bool
+
+    @property
+    def when(self) -> str:
+        if self.all_day:
+            return "all day"
+        return f"{self.start:%H:%M}-{self.end:%H:%M}"
+
+
+def agenda(config: BotConfig, period: str = "today", now: Optional[datetime] = None) -> List[Tuple[datetime, List[AgendaEvent]]]:
+    """Events of a period grouped by day, read from the local mirror only.
+
+    Events spanning several days are listed under the first day of the period they fall on.
+    """
+    start, end = agenda_range(period, now or local_now(config))
+    days: Dict[datetime, List[AgendaEvent]] = {}
+    for summary, event_start, event_end, all_day in db.load_calendar_events(config.current_context, start.isoformat(), end.isoformat()):
+        event = AgendaEvent(summary, datetime.fromisoformat(event_start), datetime.fromisoformat(event_end), bool(all_day))
+        days.setdefault(max(day_start(event.start), start), []).append(event)
+    return sorted(days.items())
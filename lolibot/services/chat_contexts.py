@@ -0,0 +1,68 @@
+"""Per-chat active contexts."""
+
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from lolibot.config import BotConfig
+from lolibot.db import load_chat_contexts, save_chat_context
+
+logger = logging.getLogger(__name__)
+
+
+class ChatContexts:
+    """Track which configuration context each chat is using.
+
+    Chats that never switched use the configuration's current context. Switches are kept in memory
+    and persisted to SQLite, so the configuration file is never rewritten on the request path.
+
+    A bot serving only some of the contexts, like each bot of `loli telegram --all-contexts`, passes
+    them as `contexts`; its chats can only switch among those, and start on the first of them unless
+    the current context is one.
+    """
+
+    def __init__(self, config: BotConfig, active: Optional[Dict[str, str]] = None, contexts: Optional[List[str]] = None):
+        self.config = config
+        self.contexts = config.available_contexts if contexts is None else list(contexts)
+        self.default_context = config.current_context if contexts is None or config.current_context in contexts else contexts[0]
+        self._active = dict(active or {})
+        self._snapshots: Dict[str, BotConfig] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_db(cls, config: BotConfig, contexts: Optional[List[str]] = None) -> "ChatContexts":
+        """Load the persisted chat contexts, dropping any that no longer exist in the configuration."""
+        served = config.contexts if contexts is None else contexts
+        active = {}
+        for chat_id, context in load_chat_contexts().items():
+            if context in served:
+                active[chat_id] = context
+            elif context not in config.contexts:
+                logger.warning(f"Ignoring unknown context '{context}' stored for chat {chat_id}")
+        return cls(config, active, contexts)
+
+    def get(self, chat_id) -> str:
+        """Return the active context name for a chat."""
+        return self._active.get(str(chat_id), self.default_context)
+
+    def set(self, chat_id, context: str):
+        """Switch a chat to another context and persist the choice."""
+        if context not in self.contexts:
+            raise ValueError(f"Context '{context}' not found in available contexts.")
+        with self._lock:
+            self._active[str(chat_id)] = context
+        save_chat_context(str(chat_id), context)
+
+    def config_for(self, chat_id) -> BotConfig:
+        """Return the immutable configuration snapshot for a chat's active context."""
+        return self.config_for_context(self.get(chat_id))
+
+    def config_for_context(self, context: str) -> BotConfig:
+        """Return the immutable configuration snapshot for a context."""
+        snapshot = self._snapshots.get(context)
+        if snapshot is None:
+            # Snapshots are immutable, so every chat on the same context can share one
+            snapshot = self.config.snapshot(context)
+            with self._lock:
+                self._snapshots[context] = snapshot
+        return snapshot
@@ -0,0 +1,129 @@
+"""Near-duplicate detection of tasks against the user's history.
+
+Every created task is fingerprinted as the set of character trigrams of its title and message, and
+indexed per user and date. A new task is looked up through that index, so only tasks sharing at
+least one trigram are ever read, and is a likely duplicate when the Jaccard similarity of the two
+sets reaches the threshold. Re-worded re-sends and repeated segments of one message share most of
+their trigrams.
+"""
+
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from concurrent.futures import Future
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from lolibot.db import load_trigram_matches, save_task_to_db
+from lolibot.services import TaskData, TaskResponse
+
+logger = logging.getLogger(__name__)
+
+# Jaccard similarity from which a task counts as a duplicate, when the config sets no `duplicate_threshold`
+DEFAULT_DUPLICATE_THRESHOLD = 0.8
+# Long messages add little over their start, and the lookup binds one parameter per trigram
+MAX_FINGERPRINT_CHARS = 300
+
+WORD = re.compile(r"\w+")
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Character trigrams of the words of a text, each padded like pg_trgm, so word starts weigh more."""
+    grams = set()
+    for word in WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(map("".join, zip(padded, padded[1:], padded[2:])))
+    return frozenset(grams)
+
+
+def fingerprint(message: str, task: TaskData) -> FrozenSet[str]:
+    return trigrams(f"{task.title} {message}"[:MAX_FINGERPRINT_CHARS])
+
+
+@dataclass(frozen=True)
+class Duplicate:
+    """A task from the history that a new one most likely repeats."""
+
+    # None while the earlier task is still waiting for the database writer
+    task_id: Optional[int]
+    title: str
+    similarity: float
+
+
+class DuplicateStats:
+    """Counters for lookups, their cost and the Google writes they avoided."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {"lookups": 0, "duplicates": 0, "seconds": 0.0}
+
+    def record_lookup(self, seconds: float, duplicate: bool):
+        with self._lock:
+            self._counters["lookups"] += 1
+            self._counters["duplicates"] += int(duplicate)
+            self._counters["seconds"] += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        counters["avg_ms"] = counters["seconds"] / counters["lookups"] * 1000 if counters["lookups"] else 0.0
+        return counters
+
+
+# Shared by every detector, so /status sees the whole process
+duplicate_stats = DuplicateStats()
+
+
+class DuplicateDetector:
+    """Find the most similar earlier task of a user on the same date, and index created tasks."""
+
+    def __init__(self, threshold: float = DEFAULT_DUPLICATE_THRESHOLD, stats: Optional[DuplicateStats] = None):
+        self.threshold = threshold
+        self.stats = stats or duplicate_stats
+        # Created tasks the database writer has not committed yet, per (user, date): (trigrams, title, time)
+        self._pending: Dict[Tuple[str, str], List[Tuple[FrozenSet[str], str, Optional[str]]]] = {}
+        self._pending_lock = threading.Lock()
+
+    def find(self, user_id: str, message: str, task: TaskData) -> Optional[Duplicate]:
+        """The earlier task most similar to this one, if it reaches the threshold."""
+        started = time.perf_counter()
+        grams = fingerprint(message, task)
+        best = None
+        if grams:
+            with self._pending_lock:
+                pending = list(self._pending.get((str(user_id), task.date or ""), ()))
+            candidates = [(None, title, task_time, len(grams & other), len(other)) for other, title, task_time in pending]
+            candidates += load_trigram_matches(user_id, task.date, grams)
+            for task_id, title, task_time, shared, count in candidates:
+                # The same words at another time of the day are another task, e.g. a second meeting
+                if task.time and task_time and task.time != task_time:
+                    continue
+                similarity = shared / (len(grams) + (count or 0) - shared)
+                if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                    best = Duplicate(task_id, title, similarity)
+        self.stats.record_lookup(time.perf_counter() - started, best is not None)
+        if best:
+            logger.info(f"'{task.title}' looks like a duplicate of task {best.task_id} '{best.title}' ({best.similarity:.0%})")
+        return best
+
+    def save(self, user_id, message: str, task_response: TaskResponse) -> Future:
+        """Save a task response; created tasks are indexed, and found by `find` before they are even committed."""
+        if not task_response.processed:
+            return save_task_to_db(user_id, message, task_response)
+
+        task = task_response.task
+        grams = fingerprint(message, task)
+        key, entry = (str(user_id), task.date or ""), (grams, task.title, task.time)
+        with self._pending_lock:
+            self._pending.setdefault(key, []).append(entry)
+        future = save_task_to_db(user_id, message, task_response, trigrams=grams)
+        future.add_done_callback(lambda _: self._forget(key, entry))
+        return future
+
+    def _forget(self, key, entry):
+        with self._pending_lock:
+            entries = self._pending.get(key, [])
+            entries.remove(entry)
+            if not entries:
+                self._pending.pop(key, None)
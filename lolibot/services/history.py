@@ -0,0 +1,81 @@
+"""Reading back a user's tasks: their history and full-text search over it.
+
+Both are paginated by keyset rather than OFFSET. A page ends with an opaque cursor naming its
+last row, and the next page starts right after that row in the index. Going deep into the history
+then costs as much as reading the first page.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from lolibot import db
+
+PAGE_SIZE = 10
+
+WORD = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class HistoryEntry:
+    id: int
+    created_at: str
+    message: str
+    task_type: Optional[str]
+    title: Optional[str]
+    date: Optional[str]
+    time: Optional[str]
+    processed: bool
+
+
+@dataclass(frozen=True)
+class Page:
+    entries: List[HistoryEntry]
+    # Pass it back to get the next page; None on the last page
+    cursor: Optional[str] = None
+
+
+def _entries(rows) -> List[HistoryEntry]:
+    return [HistoryEntry(*row[:7], processed=bool(row[7])) for row in rows]
+
+
+def _history_cursor(entry: HistoryEntry) -> str:
+    # Telegram splits command arguments on spaces, the timestamp must not have any
+    return f"{entry.created_at.replace(' ', 'T')}_{entry.id}"
+
+
+def _parse_history_cursor(cursor: str) -> tuple:
+    try:
+        created_at, entry_id = cursor.rsplit("_", 1)
+        return created_at.replace("T", " "), int(entry_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{cursor}'") from None
+
+
+def history(user_id, cursor: Optional[str] = None, limit: int = PAGE_SIZE) -> Page:
+    """A page of the user's tasks, newest first."""
+    before = _parse_history_cursor(cursor) if cursor else None
+    entries = _entries(db.load_history(str(user_id), before, limit))
+    return Page(entries, _history_cursor(entries[-1]) if len(entries) == limit else None)
+
+
+def match_expression(terms: str) -> str:
+    """An FTS5 query matching every word of the terms, or a word of the same stem.
+
+    Words are quoted, so text typed by users can never be read as FTS5 syntax. There are no prefix
+    queries: FTS5 merges the whole doclist of every term a prefix matches, which does not scale.
+    """
+    words = WORD.findall(terms)
+    if not words:
+        raise ValueError("Nothing to search for")
+    return " ".join(f'"{word}"' for word in words)
+
+
+def search(user_id, terms: str, cursor: Optional[str] = None, limit: int = PAGE_SIZE) -> Page:
+    """A page of the user's tasks whose message, title or description match the terms, newest first."""
+    try:
+        before_id = int(cursor) if cursor else None
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{cursor}'") from None
+    entries = _entries(db.search_tasks(str(user_id), match_expression(terms), before_id, limit))
+    return Page(entries, str(entries[-1].id) if len(entries) == limit else None)
@@ -1,7 +1,7 @@
 from .date_validation import DateValidationMiddleware
 from .title_validation import TitlePrefixTruncateMiddleware
 from .just_me import JustMeInviteeMiddleware
-from .pipeline import MiddlewarePipeline
+from .pipeline import MiddlewarePipeline, PipelineResult, Rejection, middleware_stats
 from .not_task import NotTaskMiddleWare
 
 __all__ = [
@@ -10,4 +10,7 @@ __all__ = [
     "JustMeInviteeMiddleware",
     "MiddlewarePipeline",
     "NotTaskMiddleWare",
+    "PipelineResult",
+    "Rejection",
+    "middleware_stats",
 ]
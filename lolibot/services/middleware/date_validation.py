@@ -1,16 +1,35 @@
-from datetime import datetime
+from datetime import date, datetime
+from typing import List, Optional, Sequence, Tuple, Union
+
 from lolibot.services import TaskData
+from lolibot.services.middleware.pipeline import Rejection
 
 
 class DateValidationMiddleware:
     def process(self, message: str, data: TaskData) -> TaskData:
+        reason = self._rejection_reason(data, datetime.now().date())
+        if reason:
+            raise ValueError(reason)
+        return data
+
+    def process_batch(self, items: Sequence[Tuple[str, TaskData]]) -> List[Union[TaskData, Rejection]]:
+        # Every item is checked against the same day
+        today = datetime.now().date()
+        outcomes = []
+        for _, data in items:
+            reason = self._rejection_reason(data, today)
+            outcomes.append(Rejection(reason) if reason else data)
+        return outcomes
+
+    @staticmethod
+    def _rejection_reason(data: TaskData, today: date) -> Optional[str]:
         if data.task_type == "event" and not data.date:
-            raise ValueError("Event tasks must have a date specified.")
+            return "Event tasks must have a date specified."
         if data.date:
             try:
                 task_date = datetime.strptime(data.date, "%Y-%m-%d").date()
-                if task_date < datetime.now().date():
-                    raise ValueError("Task date cannot be in the past.")
             except ValueError as e:
-                raise ValueError(f"Invalid date format: {e}")
-        return data
+                return f"Invalid date format: {e}"
+            if task_date < today:
+                return "Invalid date format: Task date cannot be in the past."
+        return None
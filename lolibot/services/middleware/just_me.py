@@ -53,21 +53,7 @@ class JustMeInviteeMiddleware(TaskMiddleware):
             if re.search(pat, msg):
                 # Remove invitees
                 self.logger.info(f"Keyword '{pat}' matched. Setting invitees to empty list.")
-                return TaskData(
-                    task_type=data.task_type,
-                    title=data.title,
-                    description=data.description,
-                    date=data.date,
-                    time=data.time,
-                    invitees=[],
-                )
+                return data.replace(invitees=[])
 
         # If no "just me" pattern matched, add default invitees
-        return TaskData(
-            task_type=data.task_type,
-            title=data.title,
-            description=data.description,
-            date=data.date,
-            time=data.time,
-            invitees=self.default_invitees,
-        )
+        return data.replace(invitees=self.default_invitees)
@@ -18,6 +18,6 @@ class NotTaskMiddleWare:
 
         if data.time is not None and data.date is not None:
             self.logger.warning("Task has time and date, converting to event.")
-            data.task_type = "event"
+            return data.replace(task_type="event")
 
         return data
@@ -1,13 +1,136 @@
-from typing import List, Optional
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
 from lolibot.services import TaskData
 from lolibot.services.middleware.protocol import TaskMiddleware
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Rejection:
+    """Returned by a middleware, instead of raising ValueError, to stop the pipeline for one item."""
+
+    reason: str
+
+
+@dataclass(frozen=True)
+class PipelineResult:
+    """Outcome of running one (message, TaskData) item through a pipeline."""
+
+    data: Optional[TaskData]
+    rejection: Optional[Rejection] = None
+    # Name of the middleware that rejected the item
+    rejected_by: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.rejection is None
+
+
+Outcome = Union[TaskData, Rejection, None]
+
+
+class PipelineStats:
+    """Latency and rejection counters per middleware."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+
+    def record(self, stage: str, seconds: float, items: int = 1, rejected: int = 0):
+        with self._lock:
+            counters = self._stages.setdefault(stage, {"items": 0, "rejected": 0, "seconds": 0.0})
+            counters["items"] += items
+            counters["rejected"] += rejected
+            counters["seconds"] += seconds
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            stages = {stage: dict(counters) for stage, counters in self._stages.items()}
+        for counters in stages.values():
+            counters["avg_ms"] = counters["seconds"] / counters["items"] * 1000 if counters["items"] else 0.0
+        return stages
+
+
+# Shared by every pipeline unless one is given, so /status sees the whole process
+middleware_stats = PipelineStats()
+
 
 class MiddlewarePipeline:
-    def __init__(self, middlewares: List[TaskMiddleware]):
+    def __init__(self, middlewares: List[TaskMiddleware], stats: Optional[PipelineStats] = None):
         self.middlewares = middlewares
+        self.stats = stats or middleware_stats
 
     def process(self, message: str, data: Optional[TaskData] = None) -> TaskData:
+        """Run every middleware over one item, raising ValueError if any of them rejects it."""
+        result = self.run(message, data)
+        if not result.ok:
+            raise ValueError(result.rejection.reason)
+        return result.data
+
+    def run(self, message: str, data: Optional[TaskData] = None) -> PipelineResult:
+        """Run every middleware over one item, stopping at the first rejection."""
+        for mw in self.middlewares:
+            stage = type(mw).__name__
+            started = time.perf_counter()
+            outcome = _call(mw, message, data)
+            rejected = isinstance(outcome, Rejection)
+            self.stats.record(stage, time.perf_counter() - started, rejected=int(rejected))
+            if rejected:
+                logger.debug(f"{stage} rejected '{message}': {outcome.reason}")
+                return PipelineResult(data=data, rejection=outcome, rejected_by=stage)
+            data = outcome
+        return PipelineResult(data=data)
+
+    def process_batch(self, items: Sequence[Tuple[str, Optional[TaskData]]]) -> List[PipelineResult]:
+        """Run the pipeline over many items, one middleware at a time over the whole batch.
+
+        Middlewares with a `process_batch(items)` method get every pending item in one call; the rest
+        are called item by item. Rejected items leave the batch, the others go on to the next stage.
+        """
+        data = [item_data for _, item_data in items]
+        results: List[Optional[PipelineResult]] = [None] * len(items)
+        pending = list(range(len(items)))
+
         for mw in self.middlewares:
-            data = mw.process(message, data)
-        return data
+            if not pending:
+                break
+            stage = type(mw).__name__
+            batch = [(items[i][0], data[i]) for i in pending]
+            started = time.perf_counter()
+            outcomes = _call_batch(mw, batch)
+            still_pending = []
+            for i, outcome in zip(pending, outcomes):
+                if isinstance(outcome, Rejection):
+                    results[i] = PipelineResult(data=data[i], rejection=outcome, rejected_by=stage)
+                else:
+                    data[i] = outcome
+                    still_pending.append(i)
+            self.stats.record(stage, time.perf_counter() - started, items=len(batch), rejected=len(pending) - len(still_pending))
+            pending = still_pending
+
+        for i in pending:
+            results[i] = PipelineResult(data=data[i])
+        return results
+
+
+def _call(mw: TaskMiddleware, message: str, data: Optional[TaskData]) -> Outcome:
+    try:
+        return mw.process(message, data)
+    except ValueError as e:
+        return Rejection(str(e))
+
+
+def _call_batch(mw: TaskMiddleware, batch: List[Tuple[str, Optional[TaskData]]]) -> List[Outcome]:
+    process_batch = getattr(mw, "process_batch", None)
+    if process_batch is not None:
+        try:
+            return process_batch(batch)
+        except ValueError as e:
+            # A batch implementation cannot say which item failed, redo them one by one
+            logger.debug(f"{type(mw).__name__} batch failed ({e}), processing items one by one")
+    return [_call(mw, message, data) for message, data in batch]
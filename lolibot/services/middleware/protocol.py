@@ -1,6 +1,12 @@
-from typing import Optional, Protocol
+from typing import Any, List, Optional, Protocol, Sequence, Tuple, Union
 from lolibot.services import TaskData
 
 
 class TaskMiddleware(Protocol):
+    # Returning a Rejection (from .pipeline) or raising ValueError stops the pipeline for the item
     def process(self, message: str, data: Optional[TaskData] = None) -> TaskData: ...
+
+
+class BatchTaskMiddleware(TaskMiddleware, Protocol):
+    # Optional vectorized variant: one outcome per item, in order
+    def process_batch(self, items: Sequence[Tuple[str, Optional[TaskData]]]) -> List[Union[TaskData, Any]]: ...
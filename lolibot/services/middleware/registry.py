@@ -0,0 +1,49 @@
+"""Build middleware pipelines from the configuration.
+
+Pipelines are declared per context under `[pipelines]`, as lists of middleware names or tables
+with a `name`, an optional `enabled` flag and the middleware's parameters:
+
+    [pipelines]
+    processed = ["date_validation", { name = "title_prefix", bot_name = "[bot]" }, "just_me", "not_task"]
+"""
+
+from typing import Callable, Dict, List
+
+from lolibot.config import BotConfig
+from lolibot.services.middleware.date_validation import DateValidationMiddleware
+from lolibot.services.middleware.just_me import JustMeInviteeMiddleware
+from lolibot.services.middleware.not_task import NotTaskMiddleWare
+from lolibot.services.middleware.pipeline import MiddlewarePipeline
+from lolibot.services.middleware.protocol import TaskMiddleware
+from lolibot.services.middleware.test_message_check import TestCheckerMiddleware
+from lolibot.services.middleware.title_validation import TitlePrefixTruncateMiddleware
+
+MIDDLEWARES: Dict[str, Callable[[BotConfig, dict], TaskMiddleware]] = {
+    "message_check": lambda config, params: TestCheckerMiddleware(),
+    "date_validation": lambda config, params: DateValidationMiddleware(),
+    "title_prefix": lambda config, params: TitlePrefixTruncateMiddleware(params.get("bot_name", config.bot_name)),
+    "just_me": lambda config, params: JustMeInviteeMiddleware(params.get("default_invitees", getattr(config, "default_invitees", []))),
+    "not_task": lambda config, params: NotTaskMiddleWare(),
+}
+
+# Used for every pipeline the configuration does not declare
+DEFAULT_PIPELINES = {
+    # Checks on the raw segment, before any LLM call
+    "pre_work": ["message_check"],
+    # Checks and fixes on the extracted task, before it is created
+    "processed": ["date_validation", "title_prefix", "just_me", "not_task"],
+}
+
+
+def build_pipeline(config: BotConfig, pipeline: str) -> MiddlewarePipeline:
+    """Build the named pipeline as declared for the configuration's context."""
+    declared = (getattr(config, "pipelines", None) or {}).get(pipeline, DEFAULT_PIPELINES[pipeline])
+    middlewares: List[TaskMiddleware] = []
+    for entry in declared:
+        params = {"name": entry} if isinstance(entry, str) else dict(entry)
+        name = params.pop("name", None)
+        if name not in MIDDLEWARES:
+            raise ValueError(f"Unknown middleware '{name}' in pipeline '{pipeline}', expected one of: {', '.join(MIDDLEWARES)}")
+        if params.pop("enabled", True):
+            middlewares.append(MIDDLEWARES[name](config, params))
+    return MiddlewarePipeline(middlewares)
@@ -11,5 +11,4 @@ class TitlePrefixTruncateMiddleware:
             title = title[:50] + "..."
         title = f"{self.bot_name} {title}"
 
-        data.title = title
-        return data
+        return data.replace(title=title)
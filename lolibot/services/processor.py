@@ -1,42 +1,49 @@
 """Task processing module."""
 
 import logging
-from typing import List
+import threading
+from typing import Callable, Dict, List, Optional
 
 from lolibot import UserMessage
 from lolibot.config import BotConfig
 from lolibot.db import save_task_to_db
 from lolibot.llm.processor import LLMProcessor
 from lolibot.services import TaskResponse
-from lolibot.services.middleware.not_task import NotTaskMiddleWare
-from lolibot.services.middleware.test_message_check import TestCheckerMiddleware
+from lolibot.services.duplicates import DEFAULT_DUPLICATE_THRESHOLD, DuplicateDetector
+from lolibot.services.middleware import MiddlewarePipeline
+from lolibot.services.middleware.registry import build_pipeline
 from lolibot.services.task_manager import TaskData, TaskManager
-from lolibot.services.middleware import (
-    MiddlewarePipeline,
-    JustMeInviteeMiddleware,
-    DateValidationMiddleware,
-    TitlePrefixTruncateMiddleware,
-)
 
 logger = logging.getLogger(__name__)
 
+# Called after each segment with how many are done, how many there are and the segment's response
+ProgressCallback = Callable[[int, int, TaskResponse], None]
+
 
 def process_task_segment(
     segment: str,
     llm_processor: LLMProcessor,
     pipeline: MiddlewarePipeline,
     task_manager: TaskManager,
+    user_id: Optional[str] = None,
+    duplicates: Optional[DuplicateDetector] = None,
 ) -> TaskResponse:
-    """Process a single task segment."""
+    """Process a single task segment, skipping it when it most likely repeats an earlier task."""
     try:
-        raw_task_data = llm_processor.process_text(segment)
-        task_data = TaskData.from_dict(raw_task_data)
+        extraction = llm_processor.extract(segment)
+        task_data = TaskData.from_dict(extraction.task)
         processed_data = pipeline.process(segment, task_data)
         logger.debug(f"Processed task data: {processed_data}")
+
+        duplicate = duplicates.find(user_id, segment, processed_data) if duplicates else None
+        if duplicate:
+            msg = f"Not created, looks like a duplicate of '{duplicate.title}' ({duplicate.similarity:.0%} similar)"
+            return TaskResponse(task=processed_data, processed=False, feedback=msg, extraction=extraction)
+
         task_processed_ok = task_manager.process_task(processed_data)
 
         msg = f"Successfully created: {processed_data.title}" if task_processed_ok else f"Failed to create: {processed_data.title}"
-        task_response = TaskResponse(task=task_data, processed=task_processed_ok, feedback=msg)
+        task_response = TaskResponse(task=processed_data, processed=task_processed_ok, feedback=msg, extraction=extraction)
 
         return task_response
 
@@ -49,43 +56,86 @@ def process_task_segment(
     return TaskResponse(task=error_task, processed=False, feedback=error_msg)
 
 
-def process_user_message(config: BotConfig, user_message: UserMessage) -> List[TaskResponse]:
-    """Process user input to extract and create tasks."""
-    task_manager = TaskManager(config)
-    llm_processor = LLMProcessor(config)
-    task_responses = []
-
-    # Process each task segment independently
-    segments = llm_processor.split_text(user_message.message)
-
-    # Initialize pipeline for cleaning tasks
-    pre_work_pipeline = MiddlewarePipeline([TestCheckerMiddleware()])
-
-    # Initialize pipeline for processed tasks
-    processed_tasks_pipeline = MiddlewarePipeline(
-        [
-            DateValidationMiddleware(),
-            TitlePrefixTruncateMiddleware(config.bot_name),
-            JustMeInviteeMiddleware(getattr(config, "default_invitees", [])),
-            NotTaskMiddleWare(),
-        ]
-    )
-
-    # Process each segment
-    for segment in segments:
-        try:
-            pre_work_pipeline.process(segment)
-            task_response = process_task_segment(
-                segment=segment, llm_processor=llm_processor, pipeline=processed_tasks_pipeline, task_manager=task_manager
-            )
-        except ValueError as e:
-            msg = f"Text '{segment}' is invalid: {e}"
-            logger.info(msg)
-            task_data = TaskData.from_error(msg)
-            task_response = TaskResponse(task=task_data, processed=False, feedback=msg)
-
-        # Store info in the database for each task and append
-        save_task_to_db(user_message.user_id, segment, task_response=task_response)
-        task_responses.append(task_response)
-
-    return task_responses
+class ProcessingService:
+    """Everything needed to process messages in one context, built once and reused for every message."""
+
+    def __init__(self, config: BotConfig):
+        self.config = config
+        self.task_manager = TaskManager(config)
+        self.llm_processor = LLMProcessor(config)
+        self.pre_work_pipeline = build_pipeline(config, "pre_work")
+        self.processed_tasks_pipeline = build_pipeline(config, "processed")
+        threshold = getattr(config, "duplicate_threshold", None)
+        threshold = DEFAULT_DUPLICATE_THRESHOLD if threshold is None else threshold
+        self.duplicate_detector = DuplicateDetector(threshold) if threshold else None
+
+    def process(self, user_message: UserMessage, on_segment: Optional[ProgressCallback] = None) -> List[TaskResponse]:
+        """Process user input to extract and create tasks, reporting each segment as it completes."""
+        task_responses = []
+
+        # Process each task segment independently
+        segments = self.llm_processor.split_text(user_message.message)
+
+        # Check every segment before spending LLM calls on any of them
+        pre_work_results = self.pre_work_pipeline.process_batch([(segment, None) for segment in segments])
+
+        # Process each segment
+        for segment, pre_work in zip(segments, pre_work_results):
+            if pre_work.ok:
+                task_response = process_task_segment(
+                    segment=segment,
+                    llm_processor=self.llm_processor,
+                    pipeline=self.processed_tasks_pipeline,
+                    task_manager=self.task_manager,
+                    user_id=user_message.user_id,
+                    duplicates=self.duplicate_detector,
+                )
+            else:
+                msg = f"Text '{segment}' is invalid: {pre_work.rejection.reason}"
+                logger.info(msg)
+                task_data = TaskData.from_error(msg)
+                task_response = TaskResponse(task=task_data, processed=False, feedback=msg)
+
+            # Queue the task for the database writer; the detector sees it right away, so a
+            # repeated segment later in the same message is caught too
+            if self.duplicate_detector:
+                self.duplicate_detector.save(user_message.user_id, segment, task_response)
+            else:
+                save_task_to_db(user_message.user_id, segment, task_response=task_response)
+            task_responses.append(task_response)
+            if on_segment:
+                on_segment(len(task_responses), len(segments), task_response)
+
+        return task_responses
+
+
+class ProcessingServices:
+    """One ProcessingService per context, rebuilt only when the context's configuration changes.
+
+    Callers pass immutable configuration snapshots, which are shared per context, so a different
+    configuration object for a context means its configuration was reloaded.
+    """
+
+    def __init__(self):
+        self._services: Dict[str, ProcessingService] = {}
+        self._lock = threading.Lock()
+
+    def for_config(self, config: BotConfig) -> ProcessingService:
+        context = getattr(config, "current_context", "default")
+        service = self._services.get(context)
+        if service is None or service.config is not config:
+            with self._lock:
+                service = self._services.get(context)
+                if service is None or service.config is not config:
+                    logger.info(f"Building processing service for context '{context}'")
+                    service = self._services[context] = ProcessingService(config)
+        return service
+
+
+# Shared by Telegram and the CLI
+processing_services = ProcessingServices()
+
+
+def process_user_message(config: BotConfig, user_message: UserMessage, on_segment: Optional[ProgressCallback] = None) -> List[TaskResponse]:
+    """Process user input with the context's long-lived processing service."""
+    return processing_services.for_config(config).process(user_message, on_segment)
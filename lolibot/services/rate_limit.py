@@ -0,0 +1,161 @@
+"""Per-user and per-chat rate limiting, and admission control ahead of LLM calls."""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from lolibot.config import BotConfig
+
+logger = logging.getLogger(__name__)
+
+# Defaults used when the configuration does not set them
+DEFAULT_USER_BURST = 5
+DEFAULT_USER_PER_MINUTE = 10
+DEFAULT_CHAT_BURST = 10
+DEFAULT_CHAT_PER_MINUTE = 20
+DEFAULT_MAX_IN_FLIGHT = 4
+
+# Buckets tracked before the first sweep of the full, idle ones; the threshold grows with what a sweep keeps
+MIN_SWEEP_AT = 1024
+
+
+def _setting(value, default):
+    return default if value is None else value
+
+
+class TokenBucket:
+    """Classic token bucket: holds up to `capacity` tokens, refilled continuously."""
+
+    __slots__ = ("capacity", "refill_per_second", "tokens", "updated_at")
+
+    def __init__(self, capacity: float, refill_per_second: float, tokens: Optional[float] = None, updated_at: float = 0.0):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity if tokens is None else tokens
+        self.updated_at = updated_at
+
+    def refill(self, now: float):
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def retry_after(self, cost: float = 1) -> float:
+        """Seconds until `cost` tokens are available, assuming the bucket was just refilled."""
+        missing = cost - self.tokens
+        if missing <= 0:
+            return 0.0
+        if self.refill_per_second <= 0:
+            return float("inf")
+        return missing / self.refill_per_second
+
+
+@dataclass(frozen=True)
+class Admission:
+    """Outcome of asking the limiter to admit a message."""
+
+    admitted: bool
+    retry_after: float = 0.0
+    # Which limit rejected the message: "user" or "chat"
+    reason: Optional[str] = None
+
+
+class RateLimiter:
+    """Token buckets per user and per chat, plus a global cap on messages being processed.
+
+    A burst or rate of 0 disables that limit, and 0 messages in flight lifts the cap.
+    """
+
+    def __init__(self, config: BotConfig, buckets: Optional[Dict[str, Tuple[float, float]]] = None, clock: Callable[[], float] = time.time):
+        self.user_burst = _setting(config.rate_limit_user_burst, DEFAULT_USER_BURST)
+        self.user_refill = _setting(config.rate_limit_user_per_minute, DEFAULT_USER_PER_MINUTE) / 60
+        self.chat_burst = _setting(config.rate_limit_chat_burst, DEFAULT_CHAT_BURST)
+        self.chat_refill = _setting(config.rate_limit_chat_per_minute, DEFAULT_CHAT_PER_MINUTE) / 60
+        self.max_in_flight = _setting(config.max_in_flight_messages, DEFAULT_MAX_IN_FLIGHT)
+        self.clock = clock
+        self._sweep_at = MIN_SWEEP_AT
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        for key, (tokens, updated_at) in (buckets or {}).items():
+            bucket = self._bucket(key)
+            bucket.tokens, bucket.updated_at = tokens, updated_at
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._counters = {"admitted": 0, "rejected_user": 0, "rejected_chat": 0, "queued": 0}
+
+    def _bucket(self, key: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if key.startswith("user:"):
+                bucket = TokenBucket(self.user_burst, self.user_refill, updated_at=self.clock())
+            else:
+                bucket = TokenBucket(self.chat_burst, self.chat_refill, updated_at=self.clock())
+            self._buckets[key] = bucket
+        return bucket
+
+    def _sweep(self, now: float):
+        """Forget the buckets that refilled completely: a new bucket starts full, so nothing is lost."""
+        for key, bucket in list(self._buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.capacity:
+                del self._buckets[key]
+        self._sweep_at = max(MIN_SWEEP_AT, 2 * len(self._buckets))
+
+    def admit(self, user_id, chat_id) -> Admission:
+        """Charge one message to the user's and the chat's buckets, if both can afford it."""
+        now = self.clock()
+        with self._lock:
+            # Only new buckets grow the table, so sweeping when it reaches the threshold costs O(1) per bucket created
+            if len(self._buckets) >= self._sweep_at:
+                self._sweep(now)
+            buckets = []
+            if self.user_burst and self.user_refill:
+                buckets.append(("user", self._bucket(f"user:{user_id}")))
+            if self.chat_burst and self.chat_refill:
+                buckets.append(("chat", self._bucket(f"chat:{chat_id}")))
+
+            # Check all before charging any, so a rejection never costs a token
+            for reason, bucket in buckets:
+                bucket.refill(now)
+                if bucket.tokens < 1:
+                    self._counters[f"rejected_{reason}"] += 1
+                    logger.info(f"Rate limited {reason} (user {user_id}, chat {chat_id})")
+                    return Admission(admitted=False, retry_after=bucket.retry_after(), reason=reason)
+
+            for _, bucket in buckets:
+                bucket.tokens -= 1
+            self._counters["admitted"] += 1
+        return Admission(admitted=True)
+
+    def try_enter(self) -> bool:
+        """Take one of the global in-flight slots, if any is free."""
+        with self._lock:
+            if self.max_in_flight and self._in_flight >= self.max_in_flight:
+                return False
+            self._in_flight += 1
+            return True
+
+    def leave(self):
+        """Release an in-flight slot taken with `try_enter`."""
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+
+    def record_queued(self):
+        with self._lock:
+            self._counters["queued"] += 1
+
+    def bucket_states(self) -> Dict[str, Tuple[float, float]]:
+        """Return (tokens, updated_at) for every bucket, e.g. to persist them."""
+        with self._lock:
+            return {key: (bucket.tokens, bucket.updated_at) for key, bucket in self._buckets.items()}
+
+    def stats(self) -> dict:
+        """Limiter state and rejection counters, for monitoring."""
+        with self._lock:
+            return {
+                **self._counters,
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "tracked_buckets": len(self._buckets),
+            }
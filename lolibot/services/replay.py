@@ -0,0 +1,209 @@
+"""Replaying stored messages against providers, to pick models with evidence.
+
+Every created task keeps the message it came from, so the tasks table doubles as a regression
+corpus. A replay runs a sample of those messages through the same extraction and middlewares as
+live ones, against one provider and model at a time and with a task manager that creates nothing
+in Google, then compares what comes out with the stored tasks field by field.
+"""
+
+import logging
+import math
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+from lolibot import db
+from lolibot.config import BotConfig
+from lolibot.llm import AnthropicProvider, DefaultProvider, GeminiProvider, OpenAIProvider
+from lolibot.llm.processor import LLMProcessor
+from lolibot.llm.single_flight import SingleFlight
+from lolibot.services import TaskData
+from lolibot.services.middleware.registry import build_pipeline
+from lolibot.services.processor import process_task_segment
+from lolibot.services.task_manager import TaskManager
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = {
+    "openai": OpenAIProvider,
+    "anthropic": AnthropicProvider,
+    "gemini": GeminiProvider,
+    "regex": DefaultProvider,
+}
+
+COMPARED_FIELDS = ("task_type", "title", "date", "time")
+
+DEFAULT_SAMPLE_SIZE = 50
+DEFAULT_WORKERS = 4
+
+
+@dataclass(frozen=True)
+class Target:
+    """A provider, and optionally a model other than the configured one."""
+
+    provider: str
+    model: Optional[str] = None
+
+    @staticmethod
+    def parse(spec: str) -> "Target":
+        """Parse `provider` or `provider:model`, e.g. "openai:gpt-4.1-mini"."""
+        name, _, model = spec.partition(":")
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown provider '{name}', expected one of: {', '.join(PROVIDERS)}")
+        return Target(name, model or None)
+
+    def __str__(self):
+        return f"{self.provider}:{self.model}" if self.model else self.provider
+
+
+@dataclass(frozen=True)
+class Sample:
+    """A stored task and the message it was extracted from."""
+
+    id: int
+    message: str
+    created_at: str
+    task_type: str
+    title: Optional[str]
+    date: Optional[str]
+    time: Optional[str]
+    provider: Optional[str]
+    model: Optional[str]
+    latency_ms: Optional[float]
+    prompt_version: Optional[int]
+
+
+@dataclass
+class ReplayReport:
+    """How one target did on the sample."""
+
+    target: Target
+    # The model actually asked for, resolved from the configuration when the target names none
+    model: Optional[str]
+    replayed: int = 0
+    # Provider errors, including answers the regex fallback had to give instead
+    failed: int = 0
+    latencies_ms: List[float] = field(default_factory=list)
+    agreed: Counter = field(default_factory=Counter)
+    # Replays agreeing with the stored task on every compared field
+    exact: int = 0
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank percentile of the latencies, q between 0 and 1."""
+        if not self.latencies_ms:
+            return None
+        latencies = sorted(self.latencies_ms)
+        return latencies[max(math.ceil(q * len(latencies)) - 1, 0)]
+
+    def agreement(self, name: Optional[str] = None) -> Optional[float]:
+        """Share of successful replays agreeing on a field, or on every field without one."""
+        answered = self.replayed - self.failed
+        if not answered:
+            return None
+        return (self.agreed[name] if name else self.exact) / answered
+
+
+class NullTaskManager(TaskManager):
+    """Accepts every task without creating anything in Google."""
+
+    def process_task(self, task_data: TaskData) -> bool:
+        return True
+
+
+def default_targets(config: BotConfig) -> List[Target]:
+    """Every enabled LLM provider, with its configured model."""
+    return [Target(name) for name, provider in PROVIDERS.items() if provider is not DefaultProvider and provider(config).enabled()]
+
+
+def load_samples(size: int = DEFAULT_SAMPLE_SIZE, user_id: Optional[str] = None) -> List[Sample]:
+    return [Sample(*row) for row in db.load_replay_sample(size, user_id)]
+
+
+def _normalize_title(title: Optional[str]) -> str:
+    return " ".join((title or "").casefold().split())
+
+
+def _same_date(stored: Sample, replayed: Optional[str], today: date) -> bool:
+    if stored.date == replayed:
+        return True
+    # Relative dates ("tomorrow") resolve against the day the message is processed
+    try:
+        stored_offset = date.fromisoformat(stored.date) - date.fromisoformat(stored.created_at[:10])
+        return stored_offset == date.fromisoformat(replayed) - today
+    except (TypeError, ValueError):
+        return False
+
+
+def compare(stored: Sample, replayed: TaskData, today: date) -> Dict[str, bool]:
+    """Which fields of a replayed task agree with the stored one."""
+    return {
+        "task_type": stored.task_type == replayed.task_type,
+        "title": _normalize_title(stored.title) == _normalize_title(replayed.title),
+        "date": _same_date(stored, replayed.date, today),
+        "time": stored.time == replayed.time,
+    }
+
+
+def _processor(config: BotConfig, target: Target) -> LLMProcessor:
+    """A processor asking only the target, without the shortcuts that would skip it."""
+    processor = LLMProcessor(config, single_flight=SingleFlight())
+    processor.template_cache = None
+    processor.local_threshold = None
+    processor.local_shadow = False
+    provider_class = PROVIDERS[target.provider]
+    if provider_class is DefaultProvider:
+        processor.providers = [processor.default_provider]
+    else:
+        processor.providers = [provider_class(config, target.model)]
+    return processor
+
+
+def replay(
+    config: BotConfig,
+    samples: Sequence[Sample],
+    targets: Sequence[Target],
+    workers: int = DEFAULT_WORKERS,
+    today: Optional[date] = None,
+) -> List[ReplayReport]:
+    """Re-run the samples against every target, in parallel, and report on each target."""
+    today = today or date.today()
+    pipeline = build_pipeline(config, "processed")
+    task_manager = NullTaskManager(config)
+    runs = []
+    for target in targets:
+        processor = _processor(config, target)
+        provider = processor.providers[0]
+        runs.append((ReplayReport(target, provider.model), processor, provider.name()))
+
+    def run(report: ReplayReport, processor: LLMProcessor, expected: str, sample: Sample):
+        response = process_task_segment(sample.message, processor, pipeline, task_manager)
+        extraction = response.extraction
+        if extraction is None or extraction.provider != expected:
+            logger.warning(f"Replay of task {sample.id} against {report.target} failed: {response.feedback}")
+            return report, None, None
+        return report, extraction.latency_ms, compare(sample, response.task, today)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run, *run_args, sample) for run_args in runs for sample in samples]
+        for future in futures:
+            report, latency_ms, agreement = future.result()
+            report.replayed += 1
+            if agreement is None:
+                report.failed += 1
+                continue
+            report.latencies_ms.append(latency_ms)
+            report.agreed.update(name for name, agreed in agreement.items() if agreed)
+            report.exact += all(agreement.values())
+    return [report for report, _, _ in runs]
+
+
+def stored_sources(samples: Sequence[Sample]) -> Counter:
+    """How many samples each provider, model and prompt version extracted, as stored."""
+    return Counter((sample.provider, sample.model, sample.prompt_version) for sample in samples)
+
+
+def stored_report(samples: Sequence[Sample]) -> ReplayReport:
+    """The latencies the samples were extracted with, to compare replays against."""
+    return ReplayReport(Target("stored"), None, latencies_ms=[s.latency_ms for s in samples if s.latency_ms is not None])
@@ -0,0 +1,82 @@
+"""Retention of the tasks database: archiving old rows and giving their space back.
+
+Tasks older than `retention_days`, and rejected segments older than `rejected_retention_days`,
+move to a compressed archive database next to the working one, leaving per-day counts behind.
+The working database uses incremental auto-vacuum, so the pages they leave free are returned to
+the file system a few at a time while the bot is idle; `loli db compact` does it all at once.
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from lolibot import db
+from lolibot.config import BotConfig
+
+logger = logging.getLogger(__name__)
+
+# Days tasks stay in the working database, when the config does not set `retention_days`; 0 keeps them forever
+DEFAULT_RETENTION_DAYS = 365
+# Rejected segments, mostly chit-chat, are rarely looked at again
+DEFAULT_REJECTED_RETENTION_DAYS = 30
+# Seconds between idle maintenance rounds, when the config does not set `maintenance_interval`
+DEFAULT_MAINTENANCE_INTERVAL = 3600
+# Pages freed per idle round, small enough to never hold the database for long
+VACUUM_PAGES = 512
+
+
+@dataclass(frozen=True)
+class MaintenanceResult:
+    archived: int
+    size_before: int
+    size_after: int
+    # Pages still free in the working database after the round
+    free_pages: int = 0
+
+
+def _days(config: BotConfig, name: str, default: int) -> int:
+    value = getattr(config, name, None)
+    return default if value is None else value
+
+
+def _cutoff(days: int, now: datetime) -> str:
+    # Formatted like CURRENT_TIMESTAMP, the created_at default, so they compare as text
+    return (now - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def archive_old_tasks(config: BotConfig, now: Optional[datetime] = None) -> int:
+    """Archive the tasks the retention policy no longer keeps in the working database."""
+    retention = _days(config, "retention_days", DEFAULT_RETENTION_DAYS)
+    rejected_retention = _days(config, "rejected_retention_days", DEFAULT_REJECTED_RETENTION_DAYS)
+    if not retention and not rejected_retention:
+        return 0
+    now = now or datetime.now(timezone.utc)
+    # A disabled limit archives nothing, an empty cutoff is older than every row
+    older_than = _cutoff(retention, now) if retention else ""
+    rejected_older_than = _cutoff(rejected_retention, now) if rejected_retention else ""
+    archived = db.archive_tasks(older_than, rejected_older_than)
+    if archived:
+        logger.info(f"Archived {archived} tasks to {db.get_archive_path()}")
+    return archived
+
+
+def _size() -> int:
+    return os.path.getsize(db.get_db_path())
+
+
+def idle_maintenance(config: BotConfig, now: Optional[datetime] = None) -> MaintenanceResult:
+    """One short maintenance round: archive what expired and free a few pages."""
+    size_before = _size()
+    archived = archive_old_tasks(config, now)
+    free_pages = db.incremental_vacuum(VACUUM_PAGES)
+    return MaintenanceResult(archived, size_before, _size(), free_pages)
+
+
+def compact(config: BotConfig, now: Optional[datetime] = None) -> MaintenanceResult:
+    """Archive what expired, then rebuild the whole working database."""
+    size_before = _size()
+    archived = archive_old_tasks(config, now)
+    db.vacuum()
+    return MaintenanceResult(archived, size_before, _size())
@@ -1,11 +1,15 @@
+import time
+from datetime import datetime, timezone
 from typing import List
 
 from lolibot.config import BotConfig
 
 
-from lolibot.google_api import get_google_service
-from lolibot.llm.processor import LLMProcessor
+from lolibot.google_api import CredentialsError, get_google_service
 from lolibot.services import StatusItem, StatusType
+from lolibot.services.calendar_sync import calendar_sync
+from lolibot.services.processor import processing_services
+from lolibot.services.token_refresher import token_refresher
 
 
 def status_service(config: BotConfig) -> List[StatusItem]:
@@ -16,7 +20,7 @@ def status_service(config: BotConfig) -> List[StatusItem]:
     ]
 
     # Check LLM providers
-    llm_processor = LLMProcessor(config)
+    llm_processor = processing_services.for_config(config).llm_processor
     for provider in llm_processor.providers:
         if not provider.enabled():
             item = StatusItem(f"{provider.name()} DISABLED", status_type=StatusType.WARNING)
@@ -30,6 +34,8 @@ def status_service(config: BotConfig) -> List[StatusItem]:
         calendar = get_google_service(config, "calendar")
         calendar.events().list(calendarId="primary", maxResults=1).execute()
         status_list.append(StatusItem("Google Calendar API", status_type=StatusType.OK))
+    except CredentialsError as e:
+        status_list.append(StatusItem(f"Google Calendar API: {e}", status_type=StatusType.ERROR))
     except Exception:
         status_list.append(StatusItem("Google Calendar API", status_type=StatusType.ERROR))
 
@@ -37,6 +43,22 @@ def status_service(config: BotConfig) -> List[StatusItem]:
         tasks = get_google_service(config, "tasks")
         tasks.tasklists().list(maxResults=1).execute()
         status_list.append(StatusItem("Google Tasks API", status_type=StatusType.OK))
+    except CredentialsError as e:
+        status_list.append(StatusItem(f"Google Tasks API: {e}", status_type=StatusType.ERROR))
     except Exception:
         status_list.append(StatusItem("Google Tasks API", status_type=StatusType.ERROR))
+
+    for (_, service_name), state in sorted(token_refresher.status(config.current_context).items()):
+        if state.error:
+            status_list.append(StatusItem(f"Google {service_name} token refresh failed: {state.error}", status_type=StatusType.ERROR))
+        elif state.expiry:
+            minutes = (state.expiry - datetime.now(timezone.utc).replace(tzinfo=None)).total_seconds() // 60
+            status_list.append(StatusItem(f"Google {service_name} token valid for {minutes:.0f}m", status_type=StatusType.INFO))
+
+    sync_state = calendar_sync.status(config.current_context)
+    if sync_state and sync_state.error:
+        status_list.append(StatusItem(f"Calendar mirror sync failed: {sync_state.error}", status_type=StatusType.ERROR))
+    elif sync_state and sync_state.synced_at:
+        minutes = (time.time() - sync_state.synced_at) // 60
+        status_list.append(StatusItem(f"Calendar mirror synced {minutes:.0f}m ago", status_type=StatusType.INFO))
     return status_list
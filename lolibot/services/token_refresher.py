@@ -0,0 +1,128 @@
+"""Background renewal of Google OAuth access tokens.
+
+Access tokens last an hour. Left alone, they are refreshed on the request path once expired, so a
+user message pays for the round trip. The refresher renews them shortly before they expire and
+keeps the outcome, so failures show up in /status instead of in a user's request.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+from lolibot.google_api import cached_credentials, refresh_credentials
+
+logger = logging.getLogger(__name__)
+
+# Tokens expiring within this many seconds are renewed
+DEFAULT_REFRESH_MARGIN = 300
+# Seconds between checks; well below the margin, so no token slips through
+DEFAULT_CHECK_INTERVAL = 60
+
+
+def _utcnow() -> datetime:
+    # google-auth keeps expiries as naive UTC datetimes
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass
+class TokenState:
+    """What the refresher knows about one token."""
+
+    expiry: Optional[datetime] = None
+    refreshed_at: Optional[float] = None
+    error: Optional[str] = None
+
+
+class TokenRefresher:
+    """Renew the credentials of every built Google service before they expire."""
+
+    def __init__(
+        self,
+        margin: float = DEFAULT_REFRESH_MARGIN,
+        interval: float = DEFAULT_CHECK_INTERVAL,
+        credentials: Callable[[], dict] = cached_credentials,
+        refresh: Callable = refresh_credentials,
+        clock: Callable[[], datetime] = _utcnow,
+    ):
+        self.margin = timedelta(seconds=margin)
+        self.interval = interval
+        self.credentials = credentials
+        self.refresh = refresh
+        self.clock = clock
+        self._states: Dict[Tuple[str, str], TokenState] = {}
+        self._lock = threading.Lock()
+        # One check at a time, so a token is never refreshed twice concurrently
+        self._checking = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check_once(self):
+        """Renew every token expiring within the margin.
+
+        Refreshing goes over the network, so it happens outside the lock status() takes: a slow
+        token endpoint never holds up /status.
+        """
+        with self._checking:
+            now = self.clock()
+            due = []
+            credentials = self.credentials()
+            with self._lock:
+                for key, (creds, token_file) in credentials.items():
+                    state = self._states.setdefault(key, TokenState())
+                    if creds.expiry is not None and creds.expiry - now > self.margin:
+                        state.expiry = creds.expiry
+                    else:
+                        due.append((key, creds, token_file))
+
+            for key, creds, token_file in due:
+                error = None
+                try:
+                    if not creds.refresh_token:
+                        raise ValueError("no refresh token stored, log in again")
+                    self.refresh(creds, token_file)
+                    logger.info(f"Refreshed Google {key[1]} token for context '{key[0]}', valid until {creds.expiry}")
+                except Exception as e:
+                    error = str(e)
+                    logger.warning(f"Could not refresh Google {key[1]} token for context '{key[0]}': {e}")
+                with self._lock:
+                    state = self._states[key]
+                    if error is None:
+                        state.refreshed_at, state.error = time.time(), None
+                    else:
+                        state.error = error
+                    state.expiry = creds.expiry
+
+    def _run(self):
+        while True:
+            try:
+                self.check_once()
+            except Exception as e:
+                logger.error(f"Token refresher check failed: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="token-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self, context: Optional[str] = None) -> Dict[Tuple[str, str], TokenState]:
+        """Token states per (context, service name), optionally for one context only."""
+        with self._lock:
+            return {
+                key: TokenState(state.expiry, state.refreshed_at, state.error)
+                for key, state in self._states.items()
+                if context is None or key[0] == context
+            }
+
+
+# One refresher covers the tokens of every context
+token_refresher = TokenRefresher()
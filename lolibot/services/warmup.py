@@ -0,0 +1,90 @@
+"""Warm-up and keep-alive of connections, credentials and caches.
+
+The first message after a start used to pay for loading Google credentials, building discovery
+documents and a TLS handshake with every LLM endpoint. Warming up does all of that concurrently
+ahead of time; keep-alive pings stop the pooled connections from going cold while the bot is idle.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from lolibot.config import BotConfig
+from lolibot.google_api import SERVICE_NAMES, get_google_service
+from lolibot.services.processor import processing_services
+
+logger = logging.getLogger(__name__)
+
+# Seconds between keep-alive pings when the configuration does not set `keep_alive_interval`
+DEFAULT_KEEP_ALIVE_INTERVAL = 240
+
+# Exercises the regex parser's date and time patterns
+WARMUP_TEXT = "Warm up tomorrow at 10:00"
+
+
+@dataclass(frozen=True)
+class WarmupResult:
+    """How warming up one target went."""
+
+    target: str
+    ok: bool
+    seconds: float
+    error: Optional[str] = None
+
+
+def _ping_google(config: BotConfig, service_name: str) -> bool:
+    service = get_google_service(config, service_name)
+    # The cheapest call of each API, it opens the connection the service keeps
+    if service_name == "calendar":
+        service.calendarList().list(maxResults=1).execute()
+    else:
+        service.tasklists().list(maxResults=1).execute()
+    return True
+
+
+def _targets(config: BotConfig, prime_caches: bool) -> Dict[str, Callable[[], bool]]:
+    service = processing_services.for_config(config)
+    targets = {provider.name(): provider.check_connection for provider in service.llm_processor.providers if provider.enabled()}
+
+    for service_name in SERVICE_NAMES:
+        targets[f"Google {service_name}"] = lambda service_name=service_name: _ping_google(config, service_name)
+
+    if prime_caches:
+        targets["Regex parser"] = lambda: service.llm_processor.default_provider.process_text(WARMUP_TEXT) is not None
+    return targets
+
+
+def _run(target: str, fn: Callable[[], bool]) -> WarmupResult:
+    started = time.perf_counter()
+    try:
+        ok, error = bool(fn()), None
+    except Exception as e:
+        ok, error = False, str(e)
+    return WarmupResult(target=target, ok=ok, seconds=time.perf_counter() - started, error=error)
+
+
+def warm_up(config: BotConfig, prime_caches: bool = True) -> List[WarmupResult]:
+    """Open connections to enabled providers and Google, and load credentials and caches, concurrently.
+
+    Failures are reported in the results, never raised: a cold start is still better than no start.
+    """
+    targets = _targets(config, prime_caches)
+    if not targets:
+        return []
+    with ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="warmup") as pool:
+        futures = [pool.submit(_run, target, fn) for target, fn in targets.items()]
+        results = [future.result() for future in futures]
+
+    for result in results:
+        if result.ok:
+            logger.info(f"Warmed up {result.target} ({config.current_context}) in {result.seconds * 1000:.0f}ms")
+        else:
+            logger.warning(f"Could not warm up {result.target} ({config.current_context}): {result.error or 'not reachable'}")
+    return results
+
+
+def keep_alive(config: BotConfig) -> List[WarmupResult]:
+    """Ping every warmed-up connection, so it is not dropped for being idle."""
+    return warm_up(config, prime_caches=False)
@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import List, Tuple
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from lolibot.services.calendar_sync import PERIODS, AgendaEvent, agenda
+from lolibot.telegram.markdown import send_replies
+from lolibot.telegram.utils import escapeMarkdownCharacters
+
+
+def format_command(period: str, days: List[Tuple[datetime, List[AgendaEvent]]]) -> str:
+    if not days:
+        return escapeMarkdownCharacters(f"Nothing on the calendar {'this week' if period == 'week' else period} 🎉")
+    lines = []
+    for day, events in days:
+        lines.append(f"*{escapeMarkdownCharacters(f'{day:%a %d %b}')}*")
+        lines.extend(f"{escapeMarkdownCharacters(event.when)}  {escapeMarkdownCharacters(event.summary)}" for event in events)
+        lines.append("")
+    return "\n".join(lines)
+
+
+async def command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show upcoming events from the local calendar mirror: /agenda [today|tomorrow|week]."""
+    period = context.args[0].lower() if context.args else "today"
+    if period not in PERIODS:
+        await update.message.reply_text(f"Usage: /agenda [{'|'.join(PERIODS)}]")
+        return
+
+    config = context.application.bot_data["chat_contexts"].config_for(update.effective_chat.id)
+    await send_replies(update.message, [format_command(period, agenda(config, period))])
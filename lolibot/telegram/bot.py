@@ -1,17 +1,33 @@
 """Telegram bot application module."""
 
+import asyncio
+import signal
 import sys
 import time
 import logging
+from typing import Dict, List, Optional
 from telegram.ext import Application, CommandHandler, MessageHandler, filters
+from telegram.request import BaseRequest, HTTPXRequest
 from telegram import BotCommand
 
 from lolibot.config import BotConfig
+from lolibot.db_writer import db_writer
+from lolibot.services.calendar_sync import DEFAULT_SYNC_INTERVAL, calendar_sync
+from lolibot.services.chat_contexts import ChatContexts
+from lolibot.services.processor import processing_services
+from lolibot.services.rate_limit import RateLimiter
+from lolibot.services.retention import DEFAULT_MAINTENANCE_INTERVAL, idle_maintenance
+from lolibot.services.token_refresher import token_refresher
+from lolibot.services.warmup import DEFAULT_KEEP_ALIVE_INTERVAL, keep_alive, warm_up
+from lolibot.telegram.host import HostMemory, rss_bytes
 from lolibot.telegram import (
+    agenda_command,
     error_handler,
     get_context_command,
     help_command,
+    history_command,
     message_handler,
+    search_command,
     set_context_command,
     start_command,
     status_command,
@@ -20,28 +36,74 @@ from lolibot.telegram import (
 
 logger = logging.getLogger(__name__)
 
+# Connections kept to the Bot API by the request pool shared among the bots of one process
+SHARED_POOL_SIZE = 16
 
-def create_application(config: BotConfig) -> Application:
-    application = Application.builder().token(config.telegram_bot_token).build()
-    application.bot_data["config"] = config
+# Updates each bot handles at once. Above the rate limiter's in-flight cap on purpose: messages
+# beyond the cap are told they are queued and wait for a slot, while commands keep being answered
+CONCURRENT_UPDATES = 32
 
-    return application
 
+class SharedRequest(HTTPXRequest):
+    """A connection pool several bots use, which stays open when any one of them shuts down.
 
-def run_telegram_bot(config: BotConfig):  # noqa
-    """Start the Telegram bot."""
-    # Check bot token
-    if not config.telegram_bot_token:
-        logger.error("No Telegram bot token provided in config.")
-        sys.exit(1)
+    Application.shutdown() shuts its bot's request down; with a shared pool that would cut off the
+    bots still draining their handlers, so the pool is closed once, after all of them stopped.
+    """
 
-    application = create_application(config)
-    application.bot_data["start_time"] = time.time()
+    async def shutdown(self) -> None:
+        pass
+
+    async def close(self):
+        await super().shutdown()
+
+
+def bots_by_token(config: BotConfig) -> Dict[str, List[str]]:
+    """The contexts each configured Telegram token serves, in configuration order.
+
+    Contexts without a token of their own inherit the default one, so they share a bot.
+    """
+    bots: Dict[str, List[str]] = {}
+    for context in config.available_contexts or [config.current_context]:
+        token = config.snapshot(context).telegram_bot_token
+        if token:
+            bots.setdefault(token, []).append(context)
+    return bots
+
+
+def create_application(
+    config: BotConfig,
+    contexts: Optional[List[str]] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+    request: Optional[BaseRequest] = None,
+) -> Application:
+    """Build the bot serving `contexts`, every context of the configuration by default."""
+    chat_contexts = ChatContexts.from_db(config, contexts)
+    bot_config = chat_contexts.config_for_context(chat_contexts.default_context)
+    builder = Application.builder().token(bot_config.telegram_bot_token).concurrent_updates(CONCURRENT_UPDATES)
+    if request is not None:
+        builder = builder.request(request)
+    application = builder.build()
+    application.bot_data["config"] = bot_config
+    application.bot_data["chat_contexts"] = chat_contexts
+    application.bot_data["rate_limiter"] = rate_limiter or RateLimiter(config)
 
+    # Build the processing service of every context up front, so no message pays for it
+    for context in chat_contexts.contexts:
+        processing_services.for_config(chat_contexts.config_for_context(context))
+
+    return application
+
+
+def add_handlers(application: Application):
+    """Register the commands and the message handler, and remember the menu to publish."""
     application.add_handler(CommandHandler("start", start_command.command))
     application.add_handler(CommandHandler("help", help_command.command))
     application.add_handler(CommandHandler("status", status_command.command))
     application.add_handler(CommandHandler("contexts", get_context_command.command))
+    application.add_handler(CommandHandler("agenda", agenda_command.command))
+    application.add_handler(CommandHandler("history", history_command.command))
+    application.add_handler(CommandHandler("search", search_command.command))
 
     application.add_error_handler(error_handler.handler)
 
@@ -50,15 +112,184 @@ def run_telegram_bot(config: BotConfig):  # noqa
     menu_commands = [
         BotCommand("status", "Show status of APIs and services"),
         BotCommand("contexts", "Check or change the context for the bot configuration"),
+        BotCommand("agenda", "Show upcoming events: today, tomorrow or week"),
+        BotCommand("history", "List your latest tasks"),
+        BotCommand("search", "Search your tasks"),
     ]
 
-    for ctx_name in config.available_contexts:
+    for ctx_name in application.bot_data["chat_contexts"].contexts:
         application.add_handler(CommandHandler(f"set_{ctx_name}", set_context_command.command))
         menu_commands.append(BotCommand(f"set_{ctx_name}", f"Switch to context '{ctx_name}'"))
+    application.bot_data["menu_commands"] = menu_commands
+
+
+def context_configs(applications: List[Application]) -> List[BotConfig]:
+    """The configuration snapshot of every context the applications serve."""
+    return [
+        application.bot_data["chat_contexts"].config_for_context(context)
+        for application in applications
+        for context in application.bot_data["chat_contexts"].contexts
+    ]
+
+
+async def warm_up_contexts(application: Application, prime_caches: bool = True):
+    """Warm up every context concurrently, without blocking the event loop."""
+    warm = warm_up if prime_caches else keep_alive
+    await asyncio.gather(*(asyncio.to_thread(warm, config) for config in context_configs([application])))
+
+
+async def keep_alive_loop(application: Application, interval: float):
+    """Ping providers and Google every `interval` seconds, so connections never go cold."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await warm_up_contexts(application, prime_caches=False)
+        except Exception as e:
+            logger.warning(f"Keep-alive ping failed: {e}")
+
+
+async def maintenance_loop(config: BotConfig, rate_limiter: RateLimiter, interval: float):
+    """Archive expired tasks and free database pages every `interval` seconds, when no message is in flight."""
+    while True:
+        await asyncio.sleep(interval)
+        if rate_limiter.stats()["in_flight"]:
+            logger.debug("Skipping database maintenance, messages are being processed")
+            continue
+        try:
+            result = await asyncio.to_thread(idle_maintenance, config)
+            logger.debug(f"Database maintenance: {result}")
+        except Exception as e:
+            logger.warning(f"Database maintenance failed: {e}")
+
 
-    # Schedule the menu setup as a startup task
-    application.post_init = lambda x: application.bot.set_my_commands(menu_commands)
+async def start_bot(application: Application):
+    """Publish the menu and warm up the contexts of one bot."""
+    config = application.bot_data["config"]
+    await application.bot.set_my_commands(application.bot_data["menu_commands"])
+    # Pay for connections, credentials and caches now rather than on the first message
+    await warm_up_contexts(application)
+    interval = DEFAULT_KEEP_ALIVE_INTERVAL if config.keep_alive_interval is None else config.keep_alive_interval
+    if interval:
+        application.bot_data["keep_alive"] = asyncio.get_running_loop().create_task(keep_alive_loop(application, interval))
+
+
+async def stop_bot(application: Application):
+    task = application.bot_data.get("keep_alive")
+    if task:
+        task.cancel()
+
+
+def start_services(config: BotConfig, applications: List[Application]) -> List[asyncio.Task]:
+    """Start the background work the whole process shares, however many bots it serves."""
+    # Renew the Google tokens loaded by the warm-up before they expire, off the request path
+    token_refresher.start()
+    # Mirror upcoming calendar events locally, so /agenda never calls the Calendar API
+    sync_interval = DEFAULT_SYNC_INTERVAL if config.calendar_sync_interval is None else config.calendar_sync_interval
+    if sync_interval:
+        calendar_sync.interval = sync_interval
+        calendar_sync.start(context_configs(applications))
+    tasks = []
+    maintenance_interval = DEFAULT_MAINTENANCE_INTERVAL if config.maintenance_interval is None else config.maintenance_interval
+    if maintenance_interval:
+        # The bots share their rate limiter, so any of them tells whether the process is idle
+        rate_limiter = applications[0].bot_data["rate_limiter"]
+        tasks.append(asyncio.get_running_loop().create_task(maintenance_loop(config, rate_limiter, maintenance_interval)))
+    return tasks
+
+
+async def stop_services(tasks: List[asyncio.Task]):
+    # Commit whatever the handlers queued last
+    await asyncio.to_thread(db_writer.stop)
+    token_refresher.stop()
+    calendar_sync.stop()
+    for task in tasks:
+        task.cancel()
+
+
+def run_telegram_bot(config: BotConfig):  # noqa
+    """Start the Telegram bot."""
+    # Check bot token
+    if not config.telegram_bot_token:
+        logger.error("No Telegram bot token provided in config.")
+        sys.exit(1)
+
+    application = create_application(config)
+    application.bot_data["start_time"] = time.time()
+    add_handlers(application)
+
+    async def post_init(application: Application):
+        await start_bot(application)
+        application.bot_data["services"] = start_services(config, [application])
+
+    async def post_shutdown(application: Application):
+        await stop_bot(application)
+        await stop_services(application.bot_data.get("services", []))
+
+    # Schedule the menu setup and the warm-up as startup tasks
+    application.post_init = post_init
+    application.post_shutdown = post_shutdown
 
     # Start the Bot
     logger.info("Starting Telegram bot")
     application.run_polling()
+
+
+async def serve(config: BotConfig, applications: List[Application]):
+    """Poll every bot on this event loop until SIGINT or SIGTERM, measuring the memory each one adds."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    started, services = [], []
+    try:
+        for index, application in enumerate(applications):
+            rss_before = rss_bytes()
+            application.bot_data["start_time"] = time.time()
+            await application.initialize()
+            await start_bot(application)
+            await application.updater.start_polling()
+            await application.start()
+            started.append(application)
+            host: HostMemory = application.bot_data["host"]
+            host.added[index] += rss_bytes() - rss_before
+            logger.info(f"Started @{application.bot.username} for {', '.join(application.bot_data['chat_contexts'].contexts)}")
+        services = start_services(config, applications)
+        logger.info(f"Serving {host.summary()}")
+        await stop.wait()
+    finally:
+        for application in reversed(started):
+            await application.updater.stop()
+            await application.stop()
+            await stop_bot(application)
+            await application.shutdown()
+        for request in {application.bot.request for application in started}:
+            if isinstance(request, SharedRequest):
+                await request.close()
+        await stop_services(services)
+
+
+def run_all_telegram_bots(config: BotConfig):
+    """Serve the bot of every context with a Telegram token, all from this process."""
+    bots = bots_by_token(config)
+    if not bots:
+        logger.error("No Telegram bot token provided in any context.")
+        sys.exit(1)
+
+    # One limiter caps the messages in flight across every bot, they share LLM and database capacity
+    rate_limiter = RateLimiter(config)
+    # Bot API calls of every bot go through one connection pool; long polling keeps one connection per bot
+    request = SharedRequest(connection_pool_size=SHARED_POOL_SIZE)
+    host = HostMemory()
+    applications = []
+    for contexts in bots.values():
+        rss_before = rss_bytes()
+        application = create_application(config, contexts, rate_limiter, request)
+        add_handlers(application)
+        # Starting it, in serve(), adds to what building it took
+        host.added.append(rss_bytes() - rss_before)
+        application.bot_data["host"] = host
+        applications.append(application)
+
+    logger.info(f"Starting {len(applications)} Telegram bots")
+    asyncio.run(serve(config, applications))
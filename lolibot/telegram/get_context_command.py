@@ -1,20 +1,23 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from lolibot.config import BotConfig
+from lolibot.services.chat_contexts import ChatContexts
+from lolibot.telegram.markdown import send_replies
+from lolibot.telegram.utils import escapeMarkdownCharacters
 
 
-def format_command(config: BotConfig) -> str:
+def format_command(chat_contexts: ChatContexts, current_context: str) -> str:
     return f"""
-    Current context:    *{config.current_context}*
+    Current context:    *{escapeMarkdownCharacters(current_context)}*
 
-    Available contexts: {', '.join(config.available_contexts)}
+    Available contexts: {escapeMarkdownCharacters(', '.join(chat_contexts.contexts))}
 """
 
 
 async def command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Change the context for the bot."""
-    config: BotConfig = context.application.bot_data.get("config")
+    """Show the context this chat is using."""
+    chat_contexts: ChatContexts = context.application.bot_data["chat_contexts"]
+    current_context = chat_contexts.get(update.effective_chat.id)
 
-    response = format_command(config)
-    await update.message.reply_markdown_v2(response, reply_markup=None)
+    response = format_command(chat_contexts, current_context)
+    await send_replies(update.message, [response])
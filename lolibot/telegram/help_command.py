@@ -10,7 +10,10 @@ async def command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "Commands:\n"
         "/start - Start the bot\n"
         "/help - Show this help message\n"
-        "/status - Check status of APIs and services\n\n"
+        "/status - Check status of APIs and services\n"
+        "/agenda [today|tomorrow|week] - Show upcoming events\n"
+        "/history - List your latest tasks\n"
+        "/search <terms> - Search your tasks\n\n"
         "Examples of things you can say:\n"
         '- "Schedule a team meeting tomorrow at 3pm"\n'
         '- "Remind me to call John on Friday"\n'
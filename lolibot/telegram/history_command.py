@@ -0,0 +1,42 @@
+from typing import List, Optional, Tuple
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from lolibot.services.history import Page, history
+from lolibot.telegram.markdown import send_replies
+from lolibot.telegram.utils import escapeMarkdownCharacters
+
+CURSOR_PREFIX = "before:"
+
+
+def split_cursor(args: List[str]) -> Tuple[Optional[str], List[str]]:
+    """Take the `before:<cursor>` argument, if any, out of a command's arguments."""
+    cursors = [arg.removeprefix(CURSOR_PREFIX) for arg in args if arg.startswith(CURSOR_PREFIX)]
+    return (cursors[-1] if cursors else None), [arg for arg in args if not arg.startswith(CURSOR_PREFIX)]
+
+
+def format_page(page: Page, more_command: str) -> str:
+    """Render a page, ending with the command that shows the next one."""
+    lines = []
+    for entry in page.entries:
+        when = escapeMarkdownCharacters(entry.created_at[:16])
+        title = escapeMarkdownCharacters(entry.title or entry.message)
+        lines.append(f"{'✅' if entry.processed else '❌'} `{when}` {title}")
+    if page.cursor:
+        lines.append(f"\nOlder: {escapeMarkdownCharacters(f'{more_command} {CURSOR_PREFIX}{page.cursor}')}")
+    return "\n".join(lines)
+
+
+async def command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """List the user's tasks, newest first: /history [before:<cursor>]."""
+    cursor, _ = split_cursor(context.args or [])
+    try:
+        page = history(update.effective_user.id, cursor)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}")
+        return
+    if not page.entries:
+        await update.message.reply_text("No older tasks" if cursor else "No tasks yet")
+        return
+    await send_replies(update.message, [format_page(page, "/history")])
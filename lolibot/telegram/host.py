@@ -0,0 +1,38 @@
+"""Memory accounting of a process serving several bots."""
+
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+def rss_bytes() -> int:
+    """Resident memory of the process, or its peak where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@dataclass
+class HostMemory:
+    """Resident memory each bot added while it was built and started, in start order.
+
+    The first bot also pays for everything the bots share (providers, caches, the database
+    writer), so only the bots after it tell what one more bot costs.
+    """
+
+    added: List[int] = field(default_factory=list)
+
+    def per_additional_bot(self) -> Optional[float]:
+        additional = self.added[1:]
+        return sum(additional) / len(additional) if additional else None
+
+    def summary(self) -> str:
+        line = f"{len(self.added)} bots in this process, {rss_bytes() / 2**20:.1f} MiB resident"
+        per_bot = self.per_additional_bot()
+        if per_bot is not None:
+            line += f", {per_bot / 2**20:.1f} MiB per additional bot"
+        return line
@@ -0,0 +1,206 @@
+"""MarkdownV2 rendering of bot replies.
+
+Text is escaped in a single pass with a translation table. Replies are built as MarkdownV2 parts,
+packed into as few messages as Telegram's length limit allows, and checked before sending, so a
+message only goes out as plain text when it would not parse as MarkdownV2.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+from telegram import Message
+from telegram.error import BadRequest
+
+logger = logging.getLogger(__name__)
+
+# Telegram's limit on the length of a message, in UTF-16 code units
+MESSAGE_LIMIT = 4096
+
+# See https://core.telegram.org/bots/api#markdownv2-style; the backslash itself must be escaped too
+RESERVED = "\\_*[]()~`>#+-=|{}.!"
+ESCAPES = str.maketrans({c: f"\\{c}" for c in RESERVED})
+
+# Markers opening and closing an entity, longest first so "__" is not read as two "_"
+ENTITY_MARKERS = ("||", "__", "*", "_", "~")
+
+
+def escape(text: Optional[str]) -> str:
+    """Escape every character MarkdownV2 reserves; None renders as an empty string."""
+    return "" if text is None else text.translate(ESCAPES)
+
+
+def utf16_length(text: str) -> int:
+    """Length as Telegram counts it: characters outside the BMP, like most emoji, count twice."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _escapable(text: str, i: int) -> bool:
+    """Whether the backslash at `i` escapes something: any character with a code between 1 and 126 can be."""
+    return i + 1 < len(text) and 1 <= ord(text[i + 1]) <= 126
+
+
+def _closing(text: str, start: int, delimiter: str) -> int:
+    """Index of the unescaped delimiter closing a span starting at `start`, or -1."""
+    i = start
+    while i < len(text):
+        if text[i] == "\\":
+            if not _escapable(text, i):
+                return -1
+            i += 2
+        elif text.startswith(delimiter, i):
+            return i
+        else:
+            i += 1
+    return -1
+
+
+def is_valid(text: str) -> bool:
+    """Whether Telegram would parse the text as MarkdownV2.
+
+    Checks escapes, that bold, italic, underline, strikethrough and spoiler markers are properly
+    nested and closed, and the shape of code spans, pre blocks, links and block quotes.
+    """
+    if utf16_length(text) > MESSAGE_LIMIT:
+        return False
+    entities: List[str] = []
+    links = 0
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if c not in RESERVED:
+            i += 1
+            continue
+        if c == "\\":
+            if not _escapable(text, i):
+                return False
+            i += 2
+            continue
+        if text.startswith("```", i):
+            end = _closing(text, i + 3, "```")
+            if end < 0:
+                return False
+            i = end + 3
+            continue
+        if c == "`":
+            end = _closing(text, i + 1, "`")
+            if end < 0:
+                return False
+            i = end + 1
+            continue
+        marker = next((m for m in ENTITY_MARKERS if text.startswith(m, i)), None)
+        if marker:
+            if entities and entities[-1] == marker:
+                entities.pop()
+            elif marker in entities:
+                return False
+            else:
+                entities.append(marker)
+            i += len(marker)
+            continue
+        if c == "[":
+            links += 1
+        elif c == "]":
+            if not links or not text.startswith("(", i + 1):
+                return False
+            end = _closing(text, i + 2, ")")
+            if end < 0:
+                return False
+            links -= 1
+            i = end + 1
+            continue
+        elif c == ">":
+            if i > 0 and text[i - 1] != "\n":
+                return False
+        else:
+            return False
+        i += 1
+    return not entities and not links
+
+
+def to_plain_text(text: str) -> str:
+    """The text MarkdownV2 would display, without markup: escapes resolved and markers dropped."""
+    plain = []
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if c == "\\" and i + 1 < len(text):
+            plain.append(text[i + 1])
+            i += 2
+            continue
+        if c in "*_~|`" or (c == ">" and (i == 0 or text[i - 1] == "\n")):
+            i += 1
+            continue
+        plain.append(c)
+        i += 1
+    return "".join(plain)
+
+
+def _pieces(part: str, limit: int) -> Iterator[str]:
+    """The part itself, or its lines when it is too long for one message, cut further if needed."""
+    if utf16_length(part) <= limit:
+        yield part
+        return
+    for line in part.splitlines(keepends=True):
+        while utf16_length(line) > limit:
+            # Half the limit in characters is within the limit in UTF-16 code units
+            cut = limit // 2
+            # Never between a backslash and the character it escapes
+            if (len(line[:cut]) - len(line[:cut].rstrip("\\"))) % 2:
+                cut -= 1
+            yield line[:cut]
+            line = line[cut:]
+        yield line
+
+
+def pack(parts: Iterable[str], limit: int = MESSAGE_LIMIT) -> List[str]:
+    """Join parts into as few messages as fit in `limit`, splitting only between parts when possible."""
+    messages: List[str] = []
+    current = ""
+    for part in parts:
+        for piece in _pieces(part, limit):
+            if current and utf16_length(current) + utf16_length(piece) > limit:
+                messages.append(current)
+                current = ""
+            current += piece.lstrip("\n") if not current else piece
+    if current:
+        messages.append(current)
+    return messages
+
+
+@dataclass(frozen=True)
+class Reply:
+    text: str
+    # Sent as MarkdownV2 when True, as plain text otherwise
+    markdown: bool
+
+
+def render(parts: Iterable[str], limit: int = MESSAGE_LIMIT) -> List[Reply]:
+    """Pack MarkdownV2 parts into messages, each one validated before it is sent."""
+    replies = []
+    for message in pack(parts, limit):
+        if is_valid(message):
+            replies.append(Reply(message, True))
+        else:
+            logger.warning(f"Sending as plain text, not valid MarkdownV2: {message!r}")
+            replies.append(Reply(to_plain_text(message), False))
+    return replies
+
+
+async def send_reply(message: Message, reply: Reply):
+    """Reply to a message with a rendered reply."""
+    if not reply.markdown:
+        await message.reply_text(reply.text)
+        return
+    try:
+        await message.reply_markdown_v2(reply.text)
+    except BadRequest as e:
+        # A rule the validator does not know about; losing the reply would be worse
+        logger.error(f"Telegram rejected validated MarkdownV2 ({e}): {reply.text!r}")
+        await message.reply_text(to_plain_text(reply.text))
+
+
+async def send_replies(message: Message, parts: Iterable[str]):
+    """Reply to a message with MarkdownV2 parts, in as few messages as they fit in."""
+    for reply in render(parts):
+        await send_reply(message, reply)
@@ -1,46 +1,54 @@
+import asyncio
 import logging
-from typing import List
+import math
+from typing import List, Optional
 from lolibot import UserMessage
 from lolibot.services.processor import TaskResponse, process_user_message
 from telegram import Update
 from telegram.ext import ContextTypes
+from .progress import DEFAULT_PROGRESS_INTERVAL, ProgressReply
 from .utils import escapeMarkdownCharacters
 
 logger = logging.getLogger(__name__)
 
+# How often a queued message checks for a free processing slot
+QUEUE_POLL_SECONDS = 0.5
+
+
+def format_task(task_response: TaskResponse) -> Optional[str]:
+    """One line for a processed or failed task, None for a failure without feedback."""
+    if not task_response.processed:
+        return f"\n>❌ {escapeMarkdownCharacters(task_response.feedback)}" if task_response.feedback else None
+
+    task = task_response.task
+    time_date_str = ""
+    if task.task_type == "event":
+        date = escapeMarkdownCharacters(task.date)
+        time_date_str = f", *{date}@{escapeMarkdownCharacters(task.time)}h*" if task.time else f", *{date}*"
+
+    return f"\n✅ {escapeMarkdownCharacters(task.title)}{time_date_str}"
+
 
 def format_command(task_responses: List[TaskResponse]) -> List[str]:
     """Format a task response into a Markdown message for Telegram."""
     # Start with a summary
     total = len(task_responses)  # Total attempted tasks
     success = sum(1 for p in task_responses if p.processed)  # Count successful tasks
-    if success == 0:
-        return ["No tasks were created 👎\n"]
-
-    responses = [f"Processed {success}/{total} tasks 👍"]
-
-    # Add details for successful tasks
-    for task_response in task_responses:
-        if not task_response.processed:
-            continue
+    responses = [f"Processed {success}/{total} tasks 👍" if success else "No tasks were created 👎"]
 
-        task = task_response.task
-        time_date_str = ""
-        if task.task_type == "event":
-            date = escapeMarkdownCharacters(task.date)
-            time = escapeMarkdownCharacters(task.time)
-            time_date_str = f", *{date}@{time}h*"
+    # Details for successful tasks first, then for failed ones, so skipped duplicates say why
+    for task_response in sorted(task_responses, key=lambda r: not r.processed):
+        line = format_task(task_response)
+        if line:
+            responses.append(line)
 
-        title = escapeMarkdownCharacters(task.title)
-        responses.append(f"\n✅ {title}{time_date_str}")
+    return responses
 
-    # Add details for failed tasks
-    for task_response in task_responses:
-        if task_response.processed or not task_response.feedback:
-            continue
-        responses.append(f"\n>❌ {escapeMarkdownCharacters(task_response.feedback)}")
 
-    return responses
+def format_progress(done: int, total: int, task_responses: List[TaskResponse]) -> List[str]:
+    """Format the tasks processed so far, in the order they completed."""
+    lines = (format_task(task_response) for task_response in task_responses)
+    return [f"⏳ Processing {done}/{total}\\.\\.\\."] + [line for line in lines if line]
 
 
 async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -50,21 +58,34 @@ async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_message = UserMessage(message=message, user_id=user_id)
     logger.debug(f"Received {user_message}...")
 
-    # Inform the user that we're processing their message
-    # await update.message.reply_text("Procesando...")
-
-    config = context.application.bot_data.get("config")
+    limiter = context.application.bot_data["rate_limiter"]
+    admission = limiter.admit(user_id, update.effective_chat.id)
+    if not admission.admitted:
+        wait = math.ceil(admission.retry_after)
+        await update.message.reply_text(f"⏳ Too many messages, please wait {wait}s and send it again.")
+        return
+
+    config = context.application.bot_data["chat_contexts"].config_for(update.effective_chat.id)
+    interval = DEFAULT_PROGRESS_INTERVAL if config.progress_interval is None else config.progress_interval
+    async with ProgressReply(update.message, interval) as progress:
+        if not limiter.try_enter():
+            limiter.record_queued()
+            await progress.start("⏳ Busy right now, your message is queued.")
+            while not limiter.try_enter():
+                await asyncio.sleep(QUEUE_POLL_SECONDS)
+
+        # Acknowledge at once, then show each segment as it completes
+        task_responses_so_far = []
+
+        def on_segment(done: int, total: int, task_response: TaskResponse):
+            task_responses_so_far.append(task_response)
+            progress.update(format_progress(done, total, list(task_responses_so_far)))
 
-    task_responses = process_user_message(config, user_message)
-
-    # render a nice response using HTML
-    responses = format_command(task_responses)
-
-    # try to send the response as HTML first
-    for response in responses:
         try:
-            await update.message.reply_markdown_v2(response)
-        except Exception as e:
-            logger.warning(f"Failed to send message as HTML: {response}: {e}")
-            # fallback to plain text
-            await update.message.reply_text(response)
+            await progress.start("⏳ Processing...")
+            task_responses = await asyncio.to_thread(process_user_message, config, user_message, on_segment)
+        finally:
+            limiter.leave()
+
+        # The acknowledgement becomes the summary, with any overflow in as few messages as fit
+        await progress.finish(format_command(task_responses))
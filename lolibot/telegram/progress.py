@@ -0,0 +1,127 @@
+"""A reply sent as soon as a message arrives and edited in place while it is processed."""
+
+import asyncio
+import logging
+from datetime import timedelta
+from typing import List, Optional
+
+from telegram import Message
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+from lolibot.telegram.markdown import Reply, render, send_reply, to_plain_text
+
+logger = logging.getLogger(__name__)
+
+# Seconds between progress edits when the configuration does not set `progress_interval`.
+# Telegram allows about one message a second in a chat, and edits count towards it
+DEFAULT_PROGRESS_INTERVAL = 1.0
+
+
+class ProgressReply:
+    """One message acknowledging a user message, edited as its segments complete and finally into the summary.
+
+    Segments complete on a worker thread, which hands each update to the event loop. An editor task
+    applies at most one edit per interval, always with the latest progress, so updates arriving
+    faster than that are coalesced rather than queued. An interval of 0 skips the progress edits,
+    leaving only the acknowledgement and the summary.
+    """
+
+    def __init__(self, message: Message, interval: float = DEFAULT_PROGRESS_INTERVAL):
+        self.message = message
+        self.interval = interval
+        self.sent: Optional[Message] = None
+        self.edits = 0
+        self._parts: List[str] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._editor: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "ProgressReply":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self, text: str):
+        """Acknowledge the message with plain text; later calls edit the acknowledgement instead."""
+        if self.sent is not None:
+            try:
+                await self._edit(Reply(text, False))
+            except TelegramError as e:
+                logger.warning(f"Could not edit reply {self.sent.message_id}: {e}")
+            return
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        self.sent = await self.message.reply_text(text)
+        if self.interval:
+            self._editor = asyncio.create_task(self._edit_loop())
+
+    def update(self, parts: List[str]):
+        """Show MarkdownV2 parts as the progress so far; safe to call from any thread."""
+        if self._editor is None:
+            return
+        self._parts = parts
+        self._loop.call_soon_threadsafe(self._changed.set)
+
+    async def _edit_loop(self):
+        while True:
+            await self._changed.wait()
+            self._changed.clear()
+            delay = self.interval
+            try:
+                # Progress too long for one message shows what fits; the summary is sent in full
+                await self._edit(render(self._parts)[0])
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                delay = max(delay, retry_after.total_seconds() if isinstance(retry_after, timedelta) else retry_after)
+                logger.info(f"Progress edits flood limited, retrying in {delay}s")
+                # Show the latest progress once allowed again
+                self._changed.set()
+            except TelegramError as e:
+                # Progress is best effort; the next update or the summary replaces it
+                logger.warning(f"Could not edit reply {self.sent.message_id}: {e}")
+            await asyncio.sleep(delay)
+
+    async def _edit(self, reply: Reply):
+        if reply.markdown:
+            await self.sent.edit_text(reply.text, parse_mode=ParseMode.MARKDOWN_V2)
+        else:
+            await self.sent.edit_text(reply.text)
+        self.edits += 1
+
+    async def close(self):
+        """Stop editing the progress."""
+        if self._editor is None:
+            return
+        editor, self._editor = self._editor, None
+        editor.cancel()
+        try:
+            await editor
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"Progress edits of reply {self.sent.message_id} stopped: {e}")
+
+    async def _edit_summary(self, reply: Reply):
+        try:
+            await self._edit(reply)
+        except BadRequest as e:
+            if not reply.markdown:
+                raise
+            # A rule the validator does not know about; show the summary without markup
+            logger.error(f"Telegram rejected validated MarkdownV2 ({e}): {reply.text!r}")
+            await self._edit(Reply(to_plain_text(reply.text), False))
+
+    async def finish(self, parts: List[str]):
+        """Turn the acknowledgement into the summary, replying with whatever does not fit in it."""
+        await self.close()
+        first, *rest = render(parts)
+        try:
+            await self._edit_summary(first)
+        except TelegramError as e:
+            # The tasks exist either way; the user must hear about them
+            logger.warning(f"Could not edit reply {self.sent.message_id} into the summary, sending it instead: {e}")
+            rest.insert(0, first)
+        for reply in rest:
+            await send_reply(self.message, reply)
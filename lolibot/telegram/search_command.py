@@ -0,0 +1,24 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from lolibot.services.history import search
+from lolibot.telegram.history_command import format_page, split_cursor
+from lolibot.telegram.markdown import send_replies
+
+
+async def command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Search the user's tasks: /search <terms> [before:<cursor>]."""
+    cursor, terms = split_cursor(context.args or [])
+    if not terms:
+        await update.message.reply_text("Usage: /search <terms>")
+        return
+    terms = " ".join(terms)
+    try:
+        page = search(update.effective_user.id, terms, cursor)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}")
+        return
+    if not page.entries:
+        await update.message.reply_text(f"Nothing {'more ' if cursor else ''}found for '{terms}'")
+        return
+    await send_replies(update.message, [format_page(page, f"/search {terms}")])
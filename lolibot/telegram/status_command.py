@@ -3,8 +3,13 @@ from typing import List
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from lolibot.db_writer import db_writer
+from lolibot.llm.processor import llm_fast_path_stats, llm_template_cache
 from lolibot.services import StatusItem, StatusType
+from lolibot.services.duplicates import duplicate_stats
+from lolibot.services.middleware import middleware_stats
 from lolibot.services.status import status_service
+from lolibot.telegram.markdown import send_replies
 from lolibot.telegram.utils import escapeMarkdownCharacters
 
 
@@ -32,7 +37,7 @@ def format_command(status_list: List[StatusItem]) -> str:
 
 async def command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Check the connection status to Google services."""
-    config = context.application.bot_data.get("config")
+    config = context.application.bot_data["chat_contexts"].config_for(update.effective_chat.id)
     start_time = context.application.bot_data.get("start_time")
     uptime = time.time() - start_time
     uptime_str = f"{uptime // 3600:.0f}h {uptime % 3600 // 60:.0f}m {uptime % 60:.0f}s"
@@ -40,5 +45,61 @@ async def command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     status_list = status_service(config)
     status_list.append(StatusItem(f"Uptime: {uptime_str}", StatusType.INFO))
 
-    response = format_command(status_list)
-    await update.message.reply_markdown_v2(response)
+    limiter_stats = context.application.bot_data["rate_limiter"].stats()
+    status_list.append(
+        StatusItem(
+            f"Rate limiter: {limiter_stats['in_flight']}/{limiter_stats['max_in_flight']} in flight, "
+            f"{limiter_stats['admitted']} admitted, {limiter_stats['queued']} queued, "
+            f"{limiter_stats['rejected_user'] + limiter_stats['rejected_chat']} rejected",
+            StatusType.INFO,
+        )
+    )
+
+    cache_stats = llm_template_cache.stats()
+    accuracy = "n/a" if cache_stats["accuracy"] is None else f"{cache_stats['accuracy']:.0%}"
+    status_list.append(
+        StatusItem(
+            f"LLM template cache: {cache_stats['hit_ratio']:.0%} hits "
+            f"({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}), accuracy {accuracy}",
+            StatusType.INFO,
+        )
+    )
+
+    fast_path = llm_fast_path_stats.stats()
+    disagreement = "n/a" if fast_path["disagreement_rate"] is None else f"{fast_path['disagreement_rate']:.0%}"
+    status_list.append(
+        StatusItem(f"Local fast path: {fast_path['local_hit_rate']:.0%} local, disagreement {disagreement}", StatusType.INFO)
+    )
+    status_list.append(StatusItem(f"Split calls skipped: {fast_path['split_skip_rate']:.0%}", StatusType.INFO))
+
+    duplicates = duplicate_stats.stats()
+    status_list.append(
+        StatusItem(
+            f"Duplicate check: {duplicates['lookups']} lookups, avg {duplicates['avg_ms']:.2f}ms, "
+            f"{duplicates['duplicates']} writes avoided",
+            StatusType.INFO,
+        )
+    )
+
+    writer = db_writer.stats()
+    status_list.append(
+        StatusItem(
+            f"DB writer: {writer['queue_depth']} queued (max {writer['max_depth']}), {writer['commits']} commits "
+            f"of avg {writer['avg_batch']:.1f} writes in {writer['avg_commit_ms']:.2f}ms, {writer['failed']} failed",
+            StatusType.INFO,
+        )
+    )
+
+    host = context.application.bot_data.get("host")
+    if host is not None:
+        status_list.append(StatusItem(f"Serving {host.summary()}", StatusType.INFO))
+
+    for stage, stage_stats in middleware_stats.stats().items():
+        status_list.append(
+            StatusItem(
+                f"{stage}: {stage_stats['items']} items, avg {stage_stats['avg_ms']:.2f}ms, {stage_stats['rejected']} rejected",
+                StatusType.INFO,
+            )
+        )
+
+    await send_replies(update.message, [format_command(status_list)])
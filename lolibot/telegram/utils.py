@@ -1,6 +1,7 @@
+from .markdown import escape
+
+
 def escapeMarkdownCharacters(response: str) -> str:
-    # Escapes Telegram MarkdownV2 special characters
+    # Escapes Telegram MarkdownV2 special characters in a single pass
     # See: https://core.telegram.org/bots/api#markdownv2-style
-    for c in set(["_", "*", "[", "]", "(", ")", "~", "`", "#", "+", "-", "=", "|", "{", "}", ".", "!", "<", ">"]):
-        response = response.replace(c, f"\\{c}")
-    return response
+    return escape(response)
@@ -2,71 +2,32 @@
 """
 Google API Authentication Setup Script
 This script helps with setting up authentication for Google Calendar and Tasks.
+It is equivalent to `loli auth [CONTEXT]`, which the bot points to when credentials are missing.
 """
-import os
-import json
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+import sys
+from pathlib import Path
 
-# Google API scopes
-SCOPES = [
-    "https://www.googleapis.com/auth/calendar",
-    "https://www.googleapis.com/auth/tasks",
-]
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from lolibot.config import BotConfig  # noqa: E402
+from lolibot.google_api import CredentialsError, authorize  # noqa: E402
 
-def setup_auth():
+
+def setup_auth(context: str = None):
     """Set up authentication with Google APIs."""
     print("Setting up Google API authentication...")
-
-    # Check for credentials.json
-    if not os.path.exists("credentials.json"):
-        print(
-            """
-ERROR: credentials.json not found!
-
-Please follow these steps:
-1. Go to https://console.developers.google.com/
-2. Create a new project
-3. Enable the Google Calendar API and Google Tasks API
-4. Create OAuth 2.0 Client ID credentials (Desktop application)
-5. Download the credentials JSON file and save it as 'credentials.json' in this directory
-6. Run this script again
-        """
-        )
+    config = BotConfig.from_file(Path("config.toml")).snapshot(context)
+    try:
+        outcome = authorize(config)
+    except CredentialsError as e:
+        print(f"\nERROR: {e}")
         return False
 
-    print("Found credentials.json file.")
-
-    # Set up both Calendar and Tasks authentication
-    for service in ["calendar", "tasks"]:
-        token_file = f"token_{service}.json"
-        creds = None
-
-        # Load existing token if available
-        if os.path.exists(token_file):
-            creds = Credentials.from_authorized_user_info(json.load(open(token_file)), SCOPES)
-
-        # Refresh token if expired
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            print(f"Refreshed existing {service} token.")
-
-        # Get new credentials if none exist
-        if not creds or not creds.valid:
-            print(f"\nStarting authentication flow for Google {service.capitalize()}...")
-            flow = InstalledAppFlow.from_client_secrets_file("credentials.json", SCOPES)
-            creds = flow.run_local_server(port=0)
-
-            # Save credentials
-            with open(token_file, "w") as token:
-                token.write(creds.to_json())
-            print(f"Authentication for Google {service.capitalize()} completed and saved.")
-
+    for service, done in outcome.items():
+        print(f"Google {service.capitalize()}: {done}.")
     print("\nSetup completed successfully! You can now run the Task Manager Bot.")
     return True
 
 
 if __name__ == "__main__":
-    setup_auth()
+    setup_auth(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -5,6 +5,8 @@ import pytest
 import logging
 
 from lolibot.config import BotConfig
+from lolibot.db import init_db
+from lolibot.db_writer import db_writer
 from lolibot.llm.base import LLMProvider
 from lolibot.llm.default import DefaultProvider
 
@@ -72,6 +74,17 @@ def test_config(tmp_path) -> BotConfig:
     return BotConfig.from_file(config_path)
 
 
+@pytest.fixture(autouse=True)
+def db_path(tmp_path, monkeypatch):
+    """Point every test at its own freshly migrated database."""
+    path = tmp_path / "taskbot.db"
+    monkeypatch.setenv("DB_PATH", str(path))
+    init_db()
+    yield path
+    # Nothing a test queued may land in the next test's database
+    db_writer.flush()
+
+
 @pytest.fixture(autouse=True)
 def setup_logging():
     """Configure logging for tests."""
@@ -1,10 +1,23 @@
 """Tests for the main application module."""
 
 import logging
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import click
 import pytest
 from click.testing import CliRunner
 from app import configure_logging, main
 
+# Cold start budget for lightweight commands, in milliseconds of cumulative import time as reported by
+# `python -X importtime`. About three times what set-context takes, benchmarks.bench_cold_start tells where it goes
+LIGHTWEIGHT_IMPORT_BUDGET_MS = 150
+# Modules lightweight commands must not import
+HEAVY_MODULES = ("telegram", "googleapiclient", "google_auth_oauthlib", "requests")
+HEAVY_LOLIBOT_MODULES = ("lolibot.telegram", "lolibot.google_api", "lolibot.llm")
+
 
 @pytest.fixture
 def cli_runner():
@@ -47,7 +60,7 @@ def test_logging_configuration():
 
 def test_cli_commands_registered():
     """Test that all CLI commands are properly registered."""
-    command_names = [cmd.name for cmd in main.commands.values()]
+    command_names = main.list_commands(click.Context(main))
     assert "apunta" in command_names
     assert "telegram" in command_names
     assert "status" in command_names
@@ -88,3 +101,39 @@ def test_verbosity_levels(cli_runner, temp_config):
         v_args = ["-" + "v" * v_count] if v_count > 0 else []
         result = cli_runner.invoke(main, ["--config-path", str(temp_config), *v_args, "status"])
         assert result.exit_code == 0
+
+
+def test_lightweight_command_skips_heavy_imports(tmp_path):
+    """`set-context` must not import the Telegram, Google or LLM provider stacks."""
+    config_path = tmp_path / "config.toml"
+    config_path.write_text('current_context = "work"\n[context.work]\n[context.personal]\n')
+    script = (
+        "import sys, app; "
+        f"app.main(['--config-path', {str(config_path)!r}, 'set-context', 'personal'], standalone_mode=False); "
+        "print(*sys.modules)"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, cwd=Path(__file__).parent.parent, check=True)
+
+    # The last line, after whatever the command printed
+    imported = result.stdout.splitlines()[-1].split()
+    assert not [name for name in imported if name.split(".")[0] in HEAVY_MODULES or name.startswith(HEAVY_LOLIBOT_MODULES)]
+
+
+@pytest.mark.slow
+def test_lightweight_command_import_budget(tmp_path):
+    """`set-context` must start within the import budget, the best of a few runs so a busy machine does not fail it."""
+    config_path = tmp_path / "config.toml"
+    config_path.write_text('current_context = "work"\n[context.work]\n[context.personal]\n')
+    script = f"import app; app.main(['--config-path', {str(config_path)!r}, 'set-context', 'personal'], standalone_mode=False)"
+
+    import_times_ms = []
+    for _ in range(3):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script], capture_output=True, text=True, cwd=Path(__file__).parent.parent, check=True
+        )
+        # Keep only top-level imports from `app` onwards, so interpreter startup is not counted
+        top_level = re.findall(r"^import time:\s+\d+ \|\s+(\d+) \| (\S+)$", result.stderr, re.MULTILINE)
+        app_start = [name for _, name in top_level].index("app")
+        import_times_ms.append(sum(int(cumulative) for cumulative, _ in top_level[app_start:]) / 1000)
+
+    assert min(import_times_ms) < LIGHTWEIGHT_IMPORT_BUDGET_MS
@@ -0,0 +1,175 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from lolibot import db
+from lolibot.services.calendar_sync import CalendarSync, agenda, agenda_range
+from lolibot.services.chat_contexts import ChatContexts
+from lolibot.telegram.agenda_command import command as agenda_command
+
+NOW = datetime(2030, 1, 7, 8, 0, tzinfo=timezone.utc)
+
+
+def event(event_id, start, end, summary="Meeting", status="confirmed"):
+    return {"id": event_id, "status": status, "summary": summary, "start": start, "end": end}
+
+
+def timed(event_id, start, end, **kwargs):
+    return event(event_id, {"dateTime": start}, {"dateTime": end}, **kwargs)
+
+
+class FakeCalendar:
+    """Serves scripted events().list() responses and records the parameters of each call."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def events(self):
+        return self
+
+    def list(self, **params):
+        self.calls.append(dict(params))
+        response = self.responses.pop(0)
+        return SimpleNamespace(execute=lambda: self._raise_or_return(response))
+
+    @staticmethod
+    def _raise_or_return(response):
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def make_sync(calendar):
+    return CalendarSync(service=lambda config: calendar, clock=lambda: NOW)
+
+
+def test_full_sync_pages_and_stores_local_times(bot_config):
+    calendar = FakeCalendar(
+        {"items": [timed("a", "2030-01-07T10:00:00+01:00", "2030-01-07T11:00:00+01:00")], "nextPageToken": "page2"},
+        {"items": [event("b", {"date": "2030-01-08"}, {"date": "2030-01-09"}, summary="Holiday")], "nextSyncToken": "sync1"},
+    )
+    state = make_sync(calendar).sync(bot_config)
+
+    assert state.full and state.changes == 2 and state.error is None
+    assert "timeMin" in calendar.calls[0] and "syncToken" not in calendar.calls[0]
+    assert calendar.calls[1]["pageToken"] == "page2"
+    assert db.load_calendar_sync_token("work") == "sync1"
+    # The config's time zone is UTC
+    assert db.load_calendar_events("work", "2030-01-07T00:00:00", "2030-01-10T00:00:00") == [
+        ("Meeting", "2030-01-07T09:00:00", "2030-01-07T10:00:00", 0),
+        ("Holiday", "2030-01-08T00:00:00", "2030-01-09T00:00:00", 1),
+    ]
+
+
+def test_incremental_sync_applies_changes_only(bot_config):
+    calendar = FakeCalendar(
+        {"items": [timed("a", "2030-01-07T10:00:00Z", "2030-01-07T11:00:00Z"), timed("b", "2030-01-07T12:00:00Z", "2030-01-07T13:00:00Z")]},
+        {
+            "items": [
+                {"id": "a", "status": "cancelled"},
+                timed("b", "2030-01-07T14:00:00Z", "2030-01-07T15:00:00Z", summary="Moved"),
+            ],
+            "nextSyncToken": "sync2",
+        },
+    )
+    calendar.responses[0]["nextSyncToken"] = "sync1"
+    sync = make_sync(calendar)
+    sync.sync(bot_config)
+    state = sync.sync(bot_config)
+
+    assert not state.full and state.changes == 2
+    assert calendar.calls[1]["syncToken"] == "sync1" and "timeMin" not in calendar.calls[1]
+    assert db.load_calendar_sync_token("work") == "sync2"
+    assert db.load_calendar_events("work", "2030-01-07T00:00:00", "2030-01-08T00:00:00") == [
+        ("Moved", "2030-01-07T14:00:00", "2030-01-07T15:00:00", 0)
+    ]
+
+
+def test_invalidated_token_triggers_full_resync(bot_config):
+    gone = HttpError(httplib2.Response({"status": 410}), b"Sync token is no longer valid")
+    calendar = FakeCalendar(
+        {"items": [timed("old", "2030-01-07T10:00:00Z", "2030-01-07T11:00:00Z", summary="Old")], "nextSyncToken": "sync1"},
+        gone,
+        {"items": [timed("new", "2030-01-07T12:00:00Z", "2030-01-07T13:00:00Z", summary="New")], "nextSyncToken": "sync2"},
+    )
+    sync = make_sync(calendar)
+    sync.sync(bot_config)
+    state = sync.sync(bot_config)
+
+    assert state.full and state.error is None
+    assert "timeMin" in calendar.calls[2]
+    assert db.load_calendar_sync_token("work") == "sync2"
+    # Nothing of the old mirror survives, the old event may have been deleted meanwhile
+    assert [row[0] for row in db.load_calendar_events("work", "2030-01-07T00:00:00", "2030-01-08T00:00:00")] == ["New"]
+
+
+def test_sync_errors_are_kept_not_raised(bot_config):
+    calendar = FakeCalendar(HttpError(httplib2.Response({"status": 500}), b"Backend error"))
+    state = make_sync(calendar).sync(bot_config)
+
+    assert state.error and state.synced_at is None
+    assert db.load_calendar_sync_token("work") is None
+
+
+def test_past_events_are_pruned(bot_config):
+    calendar = FakeCalendar(
+        {"items": [timed("past", "2030-01-07T06:00:00Z", "2030-01-07T07:00:00Z")], "nextSyncToken": "sync1"},
+    )
+    make_sync(calendar).sync(bot_config)
+
+    assert db.load_calendar_events("work", "2030-01-07T00:00:00", "2030-01-08T00:00:00") == []
+
+
+def test_agenda_groups_events_by_day(bot_config):
+    calendar = FakeCalendar(
+        {
+            "items": [
+                timed("a", "2030-01-07T10:00:00Z", "2030-01-07T11:00:00Z", summary="Standup"),
+                timed("b", "2030-01-09T09:00:00Z", "2030-01-09T09:30:00Z", summary="Dentist"),
+                timed("c", "2030-01-20T09:00:00Z", "2030-01-20T09:30:00Z", summary="Later"),
+            ],
+            "nextSyncToken": "sync1",
+        },
+    )
+    make_sync(calendar).sync(bot_config)
+    now = NOW.replace(tzinfo=None)
+
+    today = agenda(bot_config, "today", now=now)
+    assert [(day.day, [e.summary for e in events]) for day, events in today] == [(7, ["Standup"])]
+    assert today[0][1][0].when == "10:00-11:00"
+    assert agenda(bot_config, "tomorrow", now=now) == []
+    week = agenda(bot_config, "week", now=now)
+    assert [(day.day, [e.summary for e in events]) for day, events in week] == [(7, ["Standup"]), (9, ["Dentist"])]
+
+
+def test_agenda_range_rejects_unknown_periods():
+    with pytest.raises(ValueError):
+        agenda_range("month", datetime(2030, 1, 7))
+
+
+@pytest.mark.asyncio
+async def test_agenda_command_reads_the_mirror(bot_config, monkeypatch):
+    db.save_calendar_changes("work", [("a", "Standup", "2030-01-07T10:00:00", "2030-01-07T11:00:00", False)], [], "sync1")
+    monkeypatch.setattr("lolibot.services.calendar_sync.local_now", lambda config: datetime(2030, 1, 7, 8, 0))
+
+    update = AsyncMock()
+    context = SimpleNamespace(args=["today"], application=SimpleNamespace(bot_data={"chat_contexts": ChatContexts(bot_config)}))
+    await agenda_command(update, context)
+
+    text = update.message.reply_markdown_v2.call_args[0][0]
+    assert "*Mon 07 Jan*" in text
+    assert "10:00\\-11:00  Standup" in text
+
+
+@pytest.mark.asyncio
+async def test_agenda_command_rejects_unknown_periods(bot_config):
+    update = AsyncMock()
+    context = SimpleNamespace(args=["month"], application=SimpleNamespace(bot_data={"chat_contexts": ChatContexts(bot_config)}))
+    await agenda_command(update, context)
+
+    assert "Usage: /agenda" in update.message.reply_text.call_args[0][0]
@@ -0,0 +1,54 @@
+import pytest
+
+from lolibot.config import BotConfig
+from lolibot.services.chat_contexts import ChatContexts
+
+
+def test_chats_switch_independently(multi_contexts_config: BotConfig):
+    chat_contexts = ChatContexts(multi_contexts_config)
+    config_file = multi_contexts_config.config_path.read_text()
+
+    chat_contexts.set(1, "personal")
+
+    assert chat_contexts.get(1) == "personal"
+    assert chat_contexts.get(2) == "test"
+    assert chat_contexts.config_for(1).openai_api_key == "personal_openai_key"
+    assert chat_contexts.config_for(2).openai_api_key == "test_openai_key"
+
+    # Neither the shared configuration nor its file change
+    assert multi_contexts_config.current_context == "test"
+    assert multi_contexts_config.config_path.read_text() == config_file
+
+
+def test_chat_contexts_are_persisted(multi_contexts_config: BotConfig):
+    ChatContexts(multi_contexts_config).set(42, "personal")
+
+    reloaded = ChatContexts.from_db(multi_contexts_config)
+    assert reloaded.get(42) == "personal"
+    assert reloaded.get("42") == "personal"
+
+
+def test_unknown_context_is_rejected(multi_contexts_config: BotConfig):
+    chat_contexts = ChatContexts(multi_contexts_config)
+    with pytest.raises(ValueError):
+        chat_contexts.set(1, "default")
+    with pytest.raises(ValueError):
+        chat_contexts.set(1, "missing")
+    assert chat_contexts.get(1) == "test"
+
+
+def test_snapshots_are_shared_per_context(multi_contexts_config: BotConfig):
+    chat_contexts = ChatContexts(multi_contexts_config, {"1": "personal", "2": "personal"})
+    assert chat_contexts.config_for(1) is chat_contexts.config_for(2)
+    assert chat_contexts.config_for(1).get_creds_path().name == "personal"
+
+
+def test_a_bot_only_switches_among_its_contexts(multi_contexts_config: BotConfig):
+    ChatContexts(multi_contexts_config).set(7, "test")
+
+    personal_bot = ChatContexts.from_db(multi_contexts_config, ["personal"])
+    assert personal_bot.default_context == "personal"
+    # Chosen in another bot, which serves that context
+    assert personal_bot.get(7) == "personal"
+    with pytest.raises(ValueError):
+        personal_bot.set(7, "test")
@@ -1,7 +1,10 @@
+from datetime import datetime
 from unittest.mock import patch
 from click.testing import CliRunner
-from lolibot.cli.commands import apunta_command, change_context_command
+from lolibot.cli.commands import agenda_command, apunta_command, auth_command, change_context_command
 from lolibot.config import BotConfig
+from lolibot.db import save_calendar_changes
+from lolibot.google_api import CredentialsError
 from lolibot.services import TaskData, TaskResponse
 
 
@@ -43,3 +46,45 @@ def test_apunta_command(test_config: BotConfig):
     assert "Task created 👍" in result.output
     assert "test the CLI command" in result.output
     assert "Invitees" not in result.output
+
+
+def test_apunta_command_tells_why_nothing_was_created(test_config: BotConfig):
+    runner = CliRunner()
+    duplicate = TaskData.from_dict({"task_type": "task", "title": "Renew passport"})
+    feedback = "Not created, looks like a duplicate of 'Renew passport' (92% similar)"
+    processor_patch = patch(
+        "lolibot.services.processor.process_user_message",
+        autospec=True,
+        return_value=[TaskResponse(processed=False, feedback=feedback, task=duplicate)],
+    )
+    with processor_patch:
+        result = runner.invoke(apunta_command, ["Renew the passport"], obj={"config": test_config})
+
+    assert result.exit_code == 0
+    assert feedback in result.output
+
+
+def test_auth_command_reports_missing_client_secrets(test_config: BotConfig):
+    runner = CliRunner()
+    with patch("lolibot.google_api.authorize", side_effect=CredentialsError("credentials.json not found")):
+        result = runner.invoke(auth_command, [], obj={"config": test_config})
+    assert result.exit_code == 1
+    assert "credentials.json not found" in result.output
+
+    with patch("lolibot.google_api.authorize", return_value={"calendar": "valid", "tasks": "logged in"}):
+        result = runner.invoke(auth_command, [], obj={"config": test_config})
+    assert result.exit_code == 0
+    assert "Google tasks: logged in" in result.output
+
+
+def test_agenda_command_reads_the_mirror(bot_config: BotConfig):
+    runner = CliRunner()
+    result = runner.invoke(agenda_command, ["today"], obj={"config": bot_config})
+    assert "never synced" in result.output
+
+    save_calendar_changes("work", [("a", "Standup", "2030-01-07T10:00:00", "2030-01-07T11:00:00", False)], [], "sync1")
+    with patch("lolibot.services.calendar_sync.local_now", return_value=datetime(2030, 1, 7, 8, 0)):
+        result = runner.invoke(agenda_command, ["today"], obj={"config": bot_config})
+    assert result.exit_code == 0
+    assert "Mon 07 Jan" in result.output
+    assert "10:00-11:00  Standup" in result.output
@@ -1,4 +1,5 @@
 from pathlib import Path
+import pickle
 
 import pytest
 from lolibot.config import BotConfig
@@ -151,3 +152,75 @@ def test_change_context(tmp_path):
     with pytest.raises(ValueError) as error:
         current_config.change_context("invalid_context")
     assert str(error.value) == "Context 'invalid_context' not found in available contexts."
+
+
+def test_missing_keys_resolve_to_none(test_config: BotConfig):
+    assert test_config.telegram_bot_token is None
+    assert test_config.default_event_duration == 30
+    with pytest.raises(AttributeError):
+        test_config._not_a_setting
+
+
+def test_snapshot_is_immutable_and_isolated(multi_contexts_config: BotConfig):
+    snapshot = multi_contexts_config.snapshot()
+    assert snapshot.current_context == "test"
+    assert snapshot.openai_api_key == "test_openai_key"
+
+    with pytest.raises(AttributeError):
+        snapshot.current_context = "personal"
+    with pytest.raises(AttributeError):
+        snapshot.change_context("personal")
+
+    # Switching the shared configuration does not affect snapshots already handed out
+    multi_contexts_config.change_context("personal")
+    assert multi_contexts_config.openai_api_key == "personal_openai_key"
+    assert snapshot.current_context == "test"
+    assert snapshot.openai_api_key == "test_openai_key"
+
+
+def test_change_context_drops_stale_keys(tmp_path):
+    config_path = tmp_path / "config.toml"
+    with open(config_path, "w") as f:
+        f.write(
+            """
+            bot_name = "TestBot"
+            current_context = "work"
+
+            [context.work]
+            default_invitees = ["boss@example.com"]
+            default_event_duration = 60
+
+            [context.personal]
+            openai_api_key = "personal_openai_key"
+            """
+        )
+    config = BotConfig.from_file(config_path)
+    assert config.default_invitees == ["boss@example.com"]
+    assert config.default_event_duration == 60
+
+    config.change_context("personal")
+    assert config.default_invitees is None
+    assert config.default_event_duration == 30
+    assert config.openai_api_key == "personal_openai_key"
+    assert config.bot_name == "TestBot"
+
+
+def test_snapshot_owns_its_contexts(multi_contexts_config: BotConfig):
+    snapshot = multi_contexts_config.snapshot()
+    multi_contexts_config.contexts["test"]["openai_api_key"] = "changed"
+    assert snapshot.contexts["test"]["openai_api_key"] == "test_openai_key"
+    with pytest.raises(TypeError):
+        snapshot.contexts["test"] = {}
+
+    # Snapshots survive pickling, which turns their contexts back into a plain dict
+    assert pickle.loads(pickle.dumps(snapshot)).openai_api_key == "test_openai_key"
+
+
+def test_snapshots_are_cached_until_reload(multi_contexts_config: BotConfig):
+    snapshot = multi_contexts_config.snapshot()
+    assert multi_contexts_config.snapshot("test") is snapshot
+    assert snapshot.snapshot() is snapshot
+    assert multi_contexts_config.snapshot("personal") is not snapshot
+
+    multi_contexts_config.contexts = dict(multi_contexts_config.contexts)
+    assert multi_contexts_config.snapshot() is not snapshot
@@ -1,14 +1,16 @@
 import os
 import sqlite3
 
+import pytest
+
 from lolibot.services import TaskData, TaskResponse
 
 
-def test_init_db_creates_table(tmp_path):
+def test_init_db_creates_table(tmp_path, monkeypatch):
     db_path = tmp_path / "test.db"
     import lolibot.db as dbmod
 
-    dbmod.get_db_path = lambda: str(db_path)
+    monkeypatch.setattr(dbmod, "get_db_path", lambda: str(db_path))
     if db_path.exists():
         db_path.unlink()
     dbmod.init_db()
@@ -20,11 +22,11 @@ def test_init_db_creates_table(tmp_path):
     conn.close()
 
 
-def test_save_task_to_db(tmp_path):
+def test_save_task_to_db(tmp_path, monkeypatch):
     db_path = tmp_path / "test2.db"
     import lolibot.db as dbmod
 
-    dbmod.get_db_path = lambda: str(db_path)
+    monkeypatch.setattr(dbmod, "get_db_path", lambda: str(db_path))
     if db_path.exists():
         db_path.unlink()
     dbmod.init_db()
@@ -46,7 +48,7 @@ def test_save_task_to_db(tmp_path):
             self.processed = True
             self.feedback = "Task saved successfully"
 
-    dbmod.save_task_to_db("u1", "msg", DummyTaskResponse())
+    dbmod.save_task_to_db("u1", "msg", DummyTaskResponse()).result()
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM tasks WHERE user_id=?", ("u1",))
@@ -55,3 +57,41 @@ def test_save_task_to_db(tmp_path):
     assert row[1] == "u1"
     assert row[10] == 1  # processed
     conn.close()
+
+
+def test_init_db_skips_current_schema(tmp_path, monkeypatch):
+    db_path = tmp_path / "test3.db"
+    import lolibot.db as dbmod
+
+    monkeypatch.setattr(dbmod, "get_db_path", lambda: str(db_path))
+    dbmod.init_db()
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == dbmod.SCHEMA_VERSION
+    conn.close()
+
+    # A second run finds the schema current and applies nothing
+    monkeypatch.setattr(dbmod, "MIGRATIONS", None)
+    dbmod.init_db()
+
+
+def test_failed_migration_is_retried_alone(tmp_path, monkeypatch):
+    db_path = tmp_path / "test4.db"
+    import lolibot.db as dbmod
+
+    monkeypatch.setattr(dbmod, "get_db_path", lambda: str(db_path))
+    migrations = dbmod.MIGRATIONS
+    monkeypatch.setattr(dbmod, "MIGRATIONS", migrations[:-1] + [migrations[-1] + "ALTER TABLE missing ADD COLUMN nothing TEXT;"])
+    with pytest.raises(sqlite3.OperationalError):
+        dbmod.init_db()
+    conn = sqlite3.connect(db_path)
+    # Every migration before the broken one is kept, and none of the broken one is
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == dbmod.SCHEMA_VERSION - 1
+    assert "provider" not in [row[1] for row in conn.execute("PRAGMA table_info(tasks)")]
+    conn.close()
+
+    monkeypatch.setattr(dbmod, "MIGRATIONS", migrations)
+    dbmod.init_db()
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == dbmod.SCHEMA_VERSION
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == dbmod.AUTO_VACUUM_INCREMENTAL
+    conn.close()
@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+
+import pytest
+
+from lolibot.db_writer import DBWriter
+
+
+@pytest.fixture
+def writer():
+    writer = DBWriter(batch_size=10, batch_delay=0.05)
+    yield writer
+    writer.stop()
+
+
+@pytest.fixture
+def notes_db(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE notes (text TEXT NOT NULL)")
+    conn.commit()
+    conn.close()
+    return str(db_path)
+
+
+def insert(text):
+    return lambda conn: conn.execute("INSERT INTO notes (text) VALUES (?)", (text,)).lastrowid
+
+
+def notes(path):
+    conn = sqlite3.connect(path)
+    rows = [row[0] for row in conn.execute("SELECT text FROM notes ORDER BY rowid")]
+    conn.close()
+    return rows
+
+
+def test_writes_are_committed_in_groups(writer, notes_db):
+    futures = [writer.submit(insert(f"note {i}"), notes_db) for i in range(25)]
+
+    assert [future.result(timeout=5) for future in futures] == list(range(1, 26))
+    assert notes(notes_db) == [f"note {i}" for i in range(25)]
+    stats = writer.stats()
+    assert stats["jobs"] == 25
+    # At most 10 per commit, and usually exactly that
+    assert 3 <= stats["commits"] < 25
+
+
+def test_a_failing_write_does_not_undo_its_batch(writer, notes_db):
+    ok = writer.submit(insert("kept"), notes_db)
+    failing = writer.submit(insert(None), notes_db)
+    also_ok = writer.submit(insert("also kept"), notes_db)
+
+    assert ok.result(timeout=5) and also_ok.result(timeout=5)
+    with pytest.raises(sqlite3.IntegrityError):
+        failing.result(timeout=5)
+    assert notes(notes_db) == ["kept", "also kept"]
+    assert writer.stats()["failed"] == 1
+
+
+def test_stop_commits_everything_queued(notes_db):
+    writer = DBWriter(batch_size=1000, batch_delay=60)
+    for i in range(5):
+        writer.submit(insert(f"note {i}"), notes_db)
+    writer.stop(timeout=5)
+
+    assert len(notes(notes_db)) == 5
+
+
+def test_flush_waits_for_queued_writes(writer, notes_db):
+    writer.batch_delay = 60
+    writer.submit(insert("note"), notes_db)
+    assert writer.flush(timeout=5)
+    assert notes(notes_db) == ["note"]
+
+
+def test_full_queue_blocks_callers(notes_db):
+    writer = DBWriter(batch_size=1, batch_delay=0, queue_size=1)
+    started, release = threading.Event(), threading.Event()
+    writer.submit(lambda conn: started.set() or release.wait(5), notes_db)
+    started.wait(5)
+    # The writer holds the first job; the second fills the queue, the third must wait
+    writer.submit(insert("queued"), notes_db)
+    blocked = threading.Thread(target=lambda: writer.submit(insert("blocked"), notes_db))
+    blocked.start()
+    blocked.join(0.2)
+    assert blocked.is_alive()
+
+    release.set()
+    blocked.join(5)
+    writer.stop(timeout=5)
+    assert notes(notes_db) == ["queued", "blocked"]
+    assert writer.stats()["blocked"] == 1
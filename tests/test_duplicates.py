@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+from lolibot import UserMessage
+from lolibot.services import Extraction, TaskData, TaskResponse
+from lolibot.services.duplicates import DuplicateDetector, DuplicateStats, trigrams
+from lolibot.services.processor import ProcessingService
+from lolibot.telegram.message_handler import format_command
+
+DATE = "2030-01-02"
+
+
+class DummyConfig:
+    bot_name = "TestBot"
+    default_invitees = []
+    current_context = "default"
+    default_timezone = "UTC"
+    openai_api_key = None
+    gemini_api_key = None
+    claude_api_key = None
+    config_path = None
+
+
+def created(detector, user_id, message, title, date=DATE):
+    task = TaskData(task_type="task", title=title, date=date)
+    return detector.save(user_id, message, TaskResponse(task=task, processed=True)).result()
+
+
+def test_trigrams_ignore_case_and_punctuation():
+    assert trigrams("Call Bob!") == trigrams("call bob")
+    assert "  c" in trigrams("call") and "ll " in trigrams("call")
+    assert trigrams("") == frozenset()
+
+
+def test_reworded_task_is_a_duplicate():
+    stats = DuplicateStats()
+    detector = DuplicateDetector(threshold=0.6, stats=stats)
+    task_id = created(detector, "u1", "Call the dentist tomorrow to book an appointment", "Call the dentist")
+
+    task = TaskData(task_type="task", title="Call the dentist", date=DATE)
+    duplicate = detector.find("u1", "call the dentist tomorrow, book an appointment", task)
+    assert duplicate is not None and duplicate.task_id == task_id and duplicate.similarity >= 0.6
+
+    assert detector.find("u1", "Pay the electricity bill", TaskData(task_type="task", title="Pay the bill", date=DATE)) is None
+    assert stats.stats()["lookups"] == 2
+    assert stats.stats()["duplicates"] == 1
+
+
+def test_lookups_stay_within_user_and_date():
+    detector = DuplicateDetector(threshold=0.6, stats=DuplicateStats())
+    created(detector, "u1", "Send the invoice", "Send the invoice")
+    task = TaskData(task_type="task", title="Send the invoice", date=DATE)
+
+    assert detector.find("u1", "Send the invoice", task) is not None
+    assert detector.find("u2", "Send the invoice", task) is None
+    assert detector.find("u1", "Send the invoice", task.replace(date="2030-01-03")) is None
+    assert detector.find("u1", "Send the invoice", task.replace(date=None)) is None
+
+
+def test_tasks_at_other_times_are_not_duplicates():
+    detector = DuplicateDetector(threshold=0.6, stats=DuplicateStats())
+    task = TaskData(task_type="event", title="Standup", date=DATE, time="10:00")
+    detector.save("u1", "Standup at 10", TaskResponse(task=task, processed=True)).result()
+
+    assert detector.find("u1", "Standup at 10", task) is not None
+    assert detector.find("u1", "Standup at 10", task.replace(time="15:00")) is None
+
+
+def test_repeated_segment_is_not_created_twice():
+    extracted = Extraction({"task_type": "task", "title": "Renew passport", "description": None, "date": DATE, "time": None})
+    patch_split = patch(
+        "lolibot.llm.processor.LLMProcessor.split_text",
+        side_effect=[["Renew the passport", "please renew the passport"], ["Renew the passport, please"]],
+    )
+    patch_llm = patch("lolibot.llm.processor.LLMProcessor.extract", return_value=extracted)
+    patch_create = patch("lolibot.services.task_manager.TaskManager.process_task", return_value=True)
+
+    with patch_split, patch_llm, patch_create as create:
+        service = ProcessingService(DummyConfig())
+        responses = service.process(UserMessage(message="Renew the passport, please renew the passport", user_id="u1"))
+        # Sent again later, in other words
+        responses += service.process(UserMessage(message="Renew the passport, please", user_id="u1"))
+
+    assert [r.processed for r in responses] == [True, False, False]
+    assert "duplicate" in responses[1].feedback
+    assert create.call_count == 1
+
+    # The re-sent message created nothing, and the reply says why
+    summary = "".join(format_command(responses[2:]))
+    assert "No tasks were created" in summary
+    assert "looks like a duplicate of" in summary
+
+
+def test_threshold_zero_disables_the_check():
+    config = DummyConfig()
+    config.duplicate_threshold = 0
+    assert ProcessingService(config).duplicate_detector is None
@@ -0,0 +1,58 @@
+from lolibot.llm.fast_path import FastPathStats, overall_confidence
+from lolibot.llm.processor import LLMProcessor
+
+
+def test_confidence_scores(provider):
+    result, confidence = provider.process_text_with_confidence("reunión con Ana el 2025-11-03 a las 10:00")
+    assert result["date"] == "2025-11-03"
+    assert result["time"] == "10:00"
+    assert overall_confidence(confidence) >= 0.85
+
+    # Unparsed time expressions, ambiguous dates and defaulted dates lower the score
+    _, confidence = provider.process_text_with_confidence("Meeting tomorrow at 10")
+    assert confidence["time"] < 0.5
+    _, confidence = provider.process_text_with_confidence("Meeting on 03/11/2030 at 10:00")
+    assert confidence["date"] < 0.85
+    _, confidence = provider.process_text_with_confidence("Buy milk")
+    assert confidence["date"] < 0.85
+
+
+def make_processor(config, threshold, shadow=False):
+    processor = LLMProcessor(config)
+    processor.template_cache = None
+    processor.local_threshold = threshold
+    processor.local_shadow = shadow
+    processor.fast_path_stats = FastPathStats()
+    llm_calls = []
+
+    def fake_providers(text):
+        llm_calls.append(text)
+        return {"task_type": "event", "title": "Reunión con Ana", "date": "2025-11-03", "time": "11:00"}, processor.providers[0]
+
+    processor._process_text_with_providers = fake_providers
+    return processor, llm_calls
+
+
+def test_confident_results_skip_the_llm(test_config):
+    processor, llm_calls = make_processor(test_config, threshold=0.85)
+
+    local = processor.process_text("reunión con Ana el 2025-11-03 a las 10:00")
+    assert local["time"] == "10:00"
+    assert llm_calls == []
+
+    processor.process_text("Meeting tomorrow at 10")
+    assert llm_calls == ["Meeting tomorrow at 10"]
+    assert processor.fast_path_stats.stats()["local_hit_rate"] == 0.5
+
+
+def test_shadow_mode_compares_without_skipping(test_config):
+    processor, llm_calls = make_processor(test_config, threshold=0.85, shadow=True)
+
+    result = processor.process_text("reunión con Ana el 2025-11-03 a las 10:00")
+    assert result["time"] == "11:00"
+    assert len(llm_calls) == 1
+
+    stats = processor.fast_path_stats.stats()
+    assert stats["shadow_compared"] == 1
+    assert stats["disagreement_rate"] == 1.0
+    assert stats["disagreed_fields"]["time"] == 1
@@ -1,4 +1,11 @@
-from lolibot.google_api import create_task, create_calendar_event
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from google.auth.exceptions import RefreshError, TransportError
+
+from lolibot.google_api import CredentialsError, create_task, create_calendar_event, get_google_service
 from lolibot.services import TaskData
 
 
@@ -21,3 +28,107 @@ def test_create_task_handles_error(monkeypatch, test_config):
 def test_create_calendar_event_handles_error(monkeypatch, test_config):
     monkeypatch.setattr("lolibot.google_api.get_google_service", lambda *a, **k: (_ for _ in ()).throw(Exception("fail")))
     assert create_calendar_event(test_config, make_task()) is None
+
+
+@pytest.fixture
+def google_state(tmp_path, monkeypatch):
+    """Run in a scratch directory, with no cached services or credentials."""
+    import lolibot.google_api as google_api
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(google_api, "_services", {})
+    monkeypatch.setattr(google_api, "_credentials", {})
+    monkeypatch.setattr(google_api, "_invalid", {})
+    monkeypatch.setattr(google_api, "InstalledAppFlow", None)  # any interactive login would blow up
+    return google_api
+
+
+def test_missing_token_fails_fast_without_logging_in(google_state, test_config):
+    with pytest.raises(CredentialsError, match="loli auth default"):
+        get_google_service(test_config, "calendar")
+
+
+def test_invalid_credentials_are_cached_until_the_token_changes(google_state, test_config, monkeypatch):
+    loads = []
+
+    def load(context, service_name, token_file):
+        loads.append(service_name)
+        raise CredentialsError("token revoked")
+
+    monkeypatch.setattr(google_state, "_load_credentials", load)
+    for _ in range(3):
+        with pytest.raises(CredentialsError, match="token revoked"):
+            get_google_service(test_config, "calendar")
+    assert loads == ["calendar"]
+
+    # A new token, e.g. written by `loli auth`, is tried again
+    (test_config.get_creds_path() / "token_calendar.json").write_text("{}")
+    with pytest.raises(CredentialsError):
+        get_google_service(test_config, "calendar")
+    assert loads == ["calendar", "calendar"]
+
+
+def write_expired_token(config):
+    token = {"token": "old", "refresh_token": "refresh", "client_id": "id", "client_secret": "secret", "expiry": "2020-01-01T00:00:00Z"}
+    (config.get_creds_path() / "token_calendar.json").write_text(json.dumps(token))
+
+
+def test_transient_refresh_failures_are_not_cached(google_state, test_config, monkeypatch):
+    write_expired_token(test_config)
+    refreshes = []
+
+    def refresh(creds, token_file):
+        refreshes.append(token_file)
+        raise TransportError("Temporary failure in name resolution")
+
+    monkeypatch.setattr(google_state, "refresh_credentials", refresh)
+    for _ in range(2):
+        with pytest.raises(TransportError):
+            get_google_service(test_config, "calendar")
+    # Tried again on the next call, the login itself is fine
+    assert len(refreshes) == 2
+    assert google_state._invalid == {}
+
+
+def test_refused_refresh_asks_to_log_in_again(google_state, test_config, monkeypatch):
+    write_expired_token(test_config)
+
+    def refresh(creds, token_file):
+        raise RefreshError("invalid_grant: Token has been expired or revoked.")
+
+    monkeypatch.setattr(google_state, "refresh_credentials", refresh)
+    with pytest.raises(CredentialsError, match="invalid_grant.*loli auth default"):
+        get_google_service(test_config, "calendar")
+    assert ("default", "calendar") in google_state._invalid
+
+
+def test_http_pool_never_shares_a_connection_between_threads(google_state, monkeypatch):
+    in_use, built = set(), []
+    # Holds every request until all four are in flight, so none can reuse another's Http
+    barrier = threading.Barrier(4)
+
+    class FakeHttp:
+        def __init__(self):
+            built.append(self)
+
+        def request(self, uri, method="GET", **kwargs):
+            assert self not in in_use, "Http used by two threads at once"
+            in_use.add(self)
+            if barrier:
+                barrier.wait(timeout=5)
+            in_use.discard(self)
+            return {"status": "200"}, b"{}"
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(google_state, "build_http", FakeHttp)
+    pool = google_state.HttpPool()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda _: pool.request("https://example.com"), range(4)))
+    assert len(built) == 4
+
+    # Idle connections are reused, not rebuilt
+    barrier = None
+    pool.request("https://example.com")
+    assert len(built) == 4
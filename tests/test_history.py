@@ -0,0 +1,124 @@
+import sqlite3
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from click.testing import CliRunner
+
+from lolibot import db
+from lolibot.cli.commands import history_command, search_command
+from lolibot.services import TaskData, TaskResponse
+from lolibot.services.history import history, match_expression, search
+from lolibot.telegram.history_command import command as telegram_history_command
+from lolibot.telegram.search_command import command as telegram_search_command
+
+
+def save(user_id, message, title, processed=True):
+    task = TaskData(task_type="task", title=title, date="2030-01-02")
+    return db.save_task_to_db(user_id, message, TaskResponse(task=task, processed=processed)).result()
+
+
+def test_history_pages_by_keyset():
+    # Saved within the same second, the id breaks the tie
+    ids = [save("u1", f"message {i}", f"Task {i}") for i in range(5)]
+    save("u2", "someone else", "Other")
+
+    first = history("u1", limit=2)
+    assert [entry.id for entry in first.entries] == ids[:-3:-1]
+    second = history("u1", first.cursor, limit=2)
+    assert [entry.id for entry in second.entries] == ids[2:0:-1]
+    last = history("u1", second.cursor, limit=2)
+    assert [entry.id for entry in last.entries] == ids[:1]
+    assert last.cursor is None
+
+
+def test_history_rejects_bad_cursors():
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        history("u1", "yesterday")
+
+
+def test_search_matches_words_of_any_field_for_one_user():
+    dentist = save("u1", "Call the dentist about my teeth", "Dentist appointment")
+    save("u1", "Pay the electricity bill", "Pay bill")
+    save("u2", "Call the dentist", "Dentist")
+
+    assert [entry.id for entry in search("u1", "dentist").entries] == [dentist]
+    assert [entry.id for entry in search("u1", "appointments").entries] == [dentist]
+    assert search("u1", "dentist bill").entries == []
+
+
+def test_search_pages_by_keyset():
+    ids = [save("u1", f"Renew passport {i}", "Passport") for i in range(3)]
+
+    first = search("u1", "passport", limit=2)
+    assert [entry.id for entry in first.entries] == [ids[2], ids[1]]
+    assert [entry.id for entry in search("u1", "passport", first.cursor, limit=2).entries] == [ids[0]]
+
+
+def test_search_index_follows_updates_and_deletes():
+    task_id = save("u1", "Buy milk", "Groceries")
+    conn = sqlite3.connect(db.get_db_path())
+    with conn:
+        conn.execute("UPDATE tasks SET message = 'Buy bread' WHERE id = ?", (task_id,))
+    assert search("u1", "bread").entries and not search("u1", "milk").entries
+    with conn:
+        conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+    conn.close()
+    assert search("u1", "bread").entries == []
+
+
+def test_user_input_is_never_fts_syntax():
+    assert match_expression('dentist" OR user_id:*') == '"dentist" "OR" "user_id"'
+    with pytest.raises(ValueError):
+        match_expression("!?")
+
+
+def test_migration_indexes_existing_tasks(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "old.db"))
+    conn = sqlite3.connect(db.get_db_path())
+    for migration in db.MIGRATIONS[:5]:
+        conn.executescript(migration)
+    conn.execute("INSERT INTO tasks (user_id, message, task_title) VALUES ('u1', 'Book flights', 'Flights')")
+    conn.execute("PRAGMA user_version = 5")
+    conn.commit()
+    conn.close()
+
+    db.init_db()
+    assert [entry.title for entry in search("u1", "flights").entries] == ["Flights"]
+
+
+@pytest.mark.asyncio
+async def test_telegram_commands_link_the_next_page():
+    for i in range(12):
+        save("42", f"Water the plants {i}", f"Plants {i}")
+
+    update = AsyncMock()
+    update.effective_user.id = 42
+    await telegram_history_command(update, SimpleNamespace(args=[]))
+    text = update.message.reply_markdown_v2.call_args[0][0]
+    assert "Plants 11" in text and "Plants 1\n" not in text
+    assert "Older: /history before:" in text
+
+    await telegram_search_command(update, SimpleNamespace(args=["plants"]))
+    text = update.message.reply_markdown_v2.call_args[0][0]
+    assert "Older: /search plants before:" in text
+    cursor = text.rsplit("before:", 1)[1]
+    await telegram_search_command(update, SimpleNamespace(args=["plants", f"before:{cursor}"]))
+    assert "Plants 0" in update.message.reply_markdown_v2.call_args[0][0]
+
+    await telegram_search_command(update, SimpleNamespace(args=[]))
+    assert "Usage: /search" in update.message.reply_text.call_args[0][0]
+
+
+def test_cli_commands(test_config):
+    save("cli_user", "Schedule the car service", "Car service")
+    runner = CliRunner()
+
+    result = runner.invoke(history_command, [], obj={"config": test_config})
+    assert result.exit_code == 0 and "Car service" in result.output
+
+    result = runner.invoke(search_command, ["car"], obj={"config": test_config})
+    assert result.exit_code == 0 and "Car service" in result.output
+
+    result = runner.invoke(search_command, ["boat"], obj={"config": test_config})
+    assert "Nothing found for 'boat'" in result.output
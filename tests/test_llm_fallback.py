@@ -1,7 +1,11 @@
+from lolibot.llm.base import Capability
 from lolibot.llm.processor import LLMProcessor
 
 
 class DummyProvider:
+    capabilities = frozenset({Capability.SPLIT, Capability.EXTRACT})
+    model = None
+
     def __init__(self, config):
         pass
 
@@ -22,9 +26,15 @@ class DummyDefault:
     def __init__(self, config):
         pass
 
+    def name(self):
+        return "DummyDefault"
+
     def process_text(self, text):
         return {"fallback": True}
 
+    def mask_temporal(self, text):
+        return None
+
 
 def test_llmprocessor_fallback(monkeypatch, test_config):
     # All providers fail, should fallback to default
@@ -40,6 +50,9 @@ def test_llmprocessor_fallback(monkeypatch, test_config):
 
 def test_llmprocessor_first_success(monkeypatch, test_config):
     class SuccessProvider:
+        capabilities = frozenset({Capability.EXTRACT})
+        model = "success-1"
+
         def __init__(self, config):
             pass
 
@@ -62,3 +75,41 @@ def test_llmprocessor_first_success(monkeypatch, test_config):
     proc = LLMProcessor(test_config)
     result = proc.process_text("hi")
     assert result["ok"] is True
+
+
+def test_llmprocessor_routes_split_to_capable_providers(monkeypatch, test_config):
+    class ExtractOnlyProvider(DummyProvider):
+        capabilities = frozenset({Capability.EXTRACT})
+
+        def split_text(self, text):
+            raise AssertionError("split routed to a provider without the capability")
+
+    class SplitProvider(DummyProvider):
+        def split_text(self, text):
+            return ["Buy milk", "call mom"]
+
+    monkeypatch.setattr("lolibot.llm.processor.OpenAIProvider", lambda c: ExtractOnlyProvider(c))
+    monkeypatch.setattr("lolibot.llm.processor.AnthropicProvider", lambda c: ExtractOnlyProvider(c))
+    monkeypatch.setattr("lolibot.llm.processor.GeminiProvider", lambda c: SplitProvider(c))
+    proc = LLMProcessor(test_config)
+    for _ in range(5):
+        assert proc._split_text("Buy milk and call mom") == ["Buy milk", "call mom"]
+
+
+def test_llmprocessor_splits_with_json_mode_providers_first(monkeypatch, test_config):
+    class PromptedProvider(DummyProvider):
+        def split_text(self, text):
+            raise AssertionError("split routed to a prompted provider while a JSON mode one was available")
+
+    class JsonModeProvider(DummyProvider):
+        capabilities = frozenset({Capability.SPLIT, Capability.EXTRACT, Capability.JSON_MODE})
+
+        def split_text(self, text):
+            return ["Buy milk", "call mom"]
+
+    monkeypatch.setattr("lolibot.llm.processor.OpenAIProvider", lambda c: PromptedProvider(c))
+    monkeypatch.setattr("lolibot.llm.processor.AnthropicProvider", lambda c: JsonModeProvider(c))
+    monkeypatch.setattr("lolibot.llm.processor.GeminiProvider", lambda c: PromptedProvider(c))
+    proc = LLMProcessor(test_config)
+    for _ in range(5):
+        assert proc._split_text("Buy milk and call mom") == ["Buy milk", "call mom"]
@@ -1,4 +1,8 @@
-from lolibot.llm import LLMProvider, OpenAIProvider, AnthropicProvider, GeminiProvider, DefaultProvider
+import pytest
+
+from lolibot.llm import Capability, LLMProvider, OpenAIProvider, AnthropicProvider, GeminiProvider, DefaultProvider
+from lolibot.llm import http
+from lolibot.llm.base import parse_segments
 
 
 def test_llm_provider_abstract_methods(test_config):
@@ -107,3 +111,89 @@ def test_support_multilingual_separators(test_config):
     assert len(expected) == len(segments)
     for task in expected:
         assert any(task in segment for segment in segments)
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+def test_parse_segments_accepts_arrays_and_wrapped_arrays():
+    assert parse_segments('["a", "b"]') == ["a", "b"]
+    assert parse_segments('{"tasks": ["a"]}') == ["a"]
+    assert parse_segments('```json\n["a", "b"]\n```') == ["a", "b"]
+    with pytest.raises(Exception):
+        parse_segments('{"title": "a"}')
+
+
+def test_openai_split_text_uses_json_mode(monkeypatch, test_config):
+    requests_sent = []
+
+    def fake_post(url, headers, json):
+        requests_sent.append(json)
+        return FakeResponse({"choices": [{"message": {"content": '{"tasks": ["Buy milk", "Call mom"]}'}}]})
+
+    monkeypatch.setattr(http.session, "post", fake_post)
+    assert OpenAIProvider(test_config).split_text("Buy milk and call mom") == ["Buy milk", "Call mom"]
+    assert requests_sent[0]["response_format"] == {"type": "json_object"}
+
+
+def test_anthropic_split_text_prefills_json_array(monkeypatch, test_config):
+    requests_sent = []
+
+    def fake_post(url, headers, json):
+        requests_sent.append(json)
+        return FakeResponse({"content": [{"type": "text", "text": '"Buy milk", "Call mom"]'}]})
+
+    monkeypatch.setattr(http.session, "post", fake_post)
+    assert AnthropicProvider(test_config).split_text("Buy milk and call mom") == ["Buy milk", "Call mom"]
+    assert requests_sent[0]["messages"][-1] == {"role": "assistant", "content": "["}
+
+
+def test_llm_providers_declare_capabilities(test_config):
+    for provider in (OpenAIProvider, GeminiProvider):
+        assert provider.capabilities == {Capability.SPLIT, Capability.EXTRACT, Capability.JSON_MODE}
+    for provider in (AnthropicProvider, DefaultProvider):
+        assert provider.capabilities == {Capability.SPLIT, Capability.EXTRACT}
+
+
+def test_gemini_split_text_uses_json_mode(monkeypatch, test_config):
+    requests_sent = []
+
+    def fake_post(url, headers, json):
+        requests_sent.append(json)
+        return FakeResponse({"candidates": [{"content": {"parts": [{"text": '["Buy milk", "Call mom"]'}]}}]})
+
+    monkeypatch.setattr(http.session, "post", fake_post)
+    assert GeminiProvider(test_config).split_text("Buy milk and call mom") == ["Buy milk", "Call mom"]
+    assert requests_sent[0]["generationConfig"]["responseMimeType"] == "application/json"
+
+
+def test_openai_process_text_uses_structured_outputs(monkeypatch, test_config):
+    requests_sent = []
+
+    def fake_post(url, headers, json):
+        requests_sent.append(json)
+        return FakeResponse({"choices": [{"message": {"content": '{"task_type": "task", "title": "Buy milk", "time": "9:30"}'}}]})
+
+    monkeypatch.setattr(http.session, "post", fake_post)
+    task = OpenAIProvider(test_config).process_text("Buy milk at 9:30")
+    assert task["title"] == "Buy milk" and task["time"] == "09:30"
+    assert requests_sent[0]["response_format"]["json_schema"]["strict"] is True
+
+
+def test_anthropic_process_text_reads_tool_input(monkeypatch, test_config):
+    requests_sent = []
+
+    def fake_post(url, headers, json):
+        requests_sent.append(json)
+        tool_use = {"type": "tool_use", "name": "record_task", "input": {"task_type": "event", "title": "Standup", "date": "2030-01-02"}}
+        return FakeResponse({"content": [tool_use]})
+
+    monkeypatch.setattr(http.session, "post", fake_post)
+    task = AnthropicProvider(test_config).process_text("Standup on January 2nd")
+    assert task["task_type"] == "event" and task["date"] == "2030-01-02"
+    assert requests_sent[0]["tool_choice"] == {"type": "tool", "name": "record_task"}
@@ -0,0 +1,104 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from lolibot.telegram.markdown import MESSAGE_LIMIT, escape, is_valid, pack, render, send_replies, to_plain_text, utf16_length
+from lolibot.telegram.message_handler import format_command
+from lolibot.services import TaskData, TaskResponse
+
+
+def test_escape_every_reserved_character():
+    text = "a_b*c[d]e(f)g~h`i>j#k+l-m=n|o{p}q.r!s\\t"
+    escaped = escape(text)
+    assert escaped == "a\\_b\\*c\\[d\\]e\\(f\\)g\\~h\\`i\\>j\\#k\\+l\\-m\\=n\\|o\\{p\\}q\\.r\\!s\\\\t"
+    assert is_valid(escaped)
+    assert to_plain_text(escaped) == text
+    assert escape(None) == ""
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "*bold _italic_ __underline__* ~strike~ ||spoiler||",
+        "`code with * and \\` inside` ```\npre\n```",
+        "[a link](https://example.com/a\\)b)",
+        ">quoted\n>lines",
+        "*2025\\-05\\-23@12:00h*",
+    ],
+)
+def test_valid_markdown(text):
+    assert is_valid(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Processed 1/1 tasks.",  # unescaped reserved character
+        "*unclosed bold",
+        "*bold _crossed* italic_",
+        "`unclosed code",
+        "[text without url]",
+        "not at line start > here",
+        "trailing backslash \\",
+        "x" * (MESSAGE_LIMIT + 1),
+    ],
+)
+def test_invalid_markdown(text):
+    assert not is_valid(text)
+
+
+def test_pack_coalesces_parts_under_the_limit():
+    assert pack(["Processed 2/2 tasks", "\n✅ one", "\n✅ two"]) == ["Processed 2/2 tasks\n✅ one\n✅ two"]
+
+    parts = ["Summary"] + [f"\n✅ task {i}" for i in range(10)]
+    messages = pack(parts, limit=40)
+    assert all(utf16_length(m) <= 40 for m in messages)
+    # No message starts with the newline separating it from the previous one
+    assert not any(m.startswith("\n") for m in messages)
+    assert "".join(messages).replace("\n", "") == "".join(parts).replace("\n", "")
+
+
+def test_pack_splits_long_parts_without_breaking_escapes():
+    part = escape("a.b" * 20)
+    messages = pack([part], limit=10)
+    assert all(utf16_length(m) <= 10 and is_valid(m) for m in messages)
+    assert "".join(messages) == part
+
+
+def test_emoji_count_twice_towards_the_limit():
+    assert utf16_length("✅👍") == 3
+    assert len(pack(["👍" * 3, "👍"], limit=7)) == 2
+
+
+def test_render_falls_back_to_plain_text_only_when_invalid():
+    assert [r.markdown for r in render(["*fine*", "\nbroken."], limit=10)] == [True, False]
+    [reply] = render(["*bold* and 1.5"])
+    assert (reply.text, reply.markdown) == ("bold and 1.5", False)
+
+
+def test_format_command_renders_valid_markdown():
+    task_responses = [
+        TaskResponse(task=TaskData(task_type="event", title="Dentist (Dr. O'Neil)", date="2025-05-23", time="12:00"), processed=True),
+        TaskResponse(task=TaskData(task_type="event", title="All-day #offsite", date="2025-05-24"), processed=True),
+        TaskResponse(task=None, processed=False, feedback="Error: Invalid date [2025-13-01]"),
+    ]
+    [reply] = render(format_command(task_responses))
+    assert reply.markdown
+    assert to_plain_text(reply.text).splitlines() == [
+        "Processed 2/3 tasks 👍",
+        "✅ Dentist (Dr. O'Neil), 2025-05-23@12:00h",
+        "✅ All-day #offsite, 2025-05-24",
+        "❌ Error: Invalid date [2025-13-01]",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_send_replies_sends_as_few_messages_as_fit():
+    message = MagicMock()
+    message.reply_markdown_v2 = AsyncMock()
+    message.reply_text = AsyncMock()
+
+    await send_replies(message, [escape("line.") * 600, "\n" + escape("more.") * 600])
+
+    assert message.reply_markdown_v2.call_count == 2
+    message.reply_text.assert_not_called()
@@ -212,3 +212,18 @@ def test_suspicious_words_mw(message, expected):
             mw.process(message, None)
     else:
         assert mw.process(message, None) != ""
+
+
+def test_just_me_invitee_keeps_duration():
+    mw = JustMeInviteeMiddleware(["default@example.com"])
+    data = TaskData(task_type="event", title="Meeting", date="2025-05-14", time="10:00", duration=90)
+    assert mw.process("Schedule a meeting just me", data).duration == 90
+    assert mw.process("Schedule a meeting", data).duration == 90
+
+
+def test_middlewares_do_not_modify_their_input():
+    data = TaskData(task_type="task", title="Task", date="2025-05-14", time="10:00")
+    pipeline = MiddlewarePipeline([TitlePrefixTruncateMiddleware("Bot"), NotTaskMiddleWare()])
+    result = pipeline.process("msg", data)
+    assert (result.title, result.task_type) == ("Bot Task", "event")
+    assert (data.title, data.task_type) == ("Task", "task")
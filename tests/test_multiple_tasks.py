@@ -4,6 +4,7 @@ import pytest
 from unittest.mock import patch
 
 from lolibot import UserMessage
+from lolibot.services import Extraction
 from lolibot.services.processor import TaskResponse, process_user_message
 
 
@@ -35,10 +36,14 @@ def config():
 
 def test_multiple_tasks_success(config, day_in_the_future):
     patch_llm = patch(
-        "lolibot.llm.processor.LLMProcessor.process_text",
+        "lolibot.llm.processor.LLMProcessor.extract",
         side_effect=[
-            {"task_type": "task", "title": "Task 1", "description": "D1", "date": day_in_the_future, "time": None, "invitees": None},
-            {"task_type": "task", "title": "Task 2", "description": "D2", "date": day_in_the_future, "time": None, "invitees": None},
+            Extraction(
+                {"task_type": "task", "title": "Task 1", "description": "D1", "date": day_in_the_future, "time": None, "invitees": None}
+            ),
+            Extraction(
+                {"task_type": "task", "title": "Task 2", "description": "D2", "date": day_in_the_future, "time": None, "invitees": None}
+            ),
         ],
     )
 
@@ -57,10 +62,14 @@ def test_multiple_tasks_success(config, day_in_the_future):
 
 def test_multiple_tasks_partial_failure(config, day_in_the_future):
     patch_llm = patch(
-        "lolibot.llm.processor.LLMProcessor.process_text",
+        "lolibot.llm.processor.LLMProcessor.extract",
         side_effect=[
-            {"task_type": "task", "title": "Task 1", "description": "D1", "date": day_in_the_future, "time": None, "invitees": None},
-            {"task_type": "task", "title": "Task 2", "description": "D2", "date": day_in_the_future, "time": None, "invitees": None},
+            Extraction(
+                {"task_type": "task", "title": "Task 1", "description": "D1", "date": day_in_the_future, "time": None, "invitees": None}
+            ),
+            Extraction(
+                {"task_type": "task", "title": "Task 2", "description": "D2", "date": day_in_the_future, "time": None, "invitees": None}
+            ),
         ],
     )
 
@@ -76,3 +85,17 @@ def test_multiple_tasks_partial_failure(config, day_in_the_future):
     assert len(response) == 2
     assert response[0].processed is True
     assert response[1].processed is False
+
+
+def test_each_segment_is_reported_as_it_completes(config, day_in_the_future):
+    task = {"task_type": "task", "title": "Task", "description": None, "date": day_in_the_future, "time": None, "invitees": None}
+    patch_llm = patch("lolibot.llm.processor.LLMProcessor.extract", return_value=Extraction(task))
+    patch_process = patch("lolibot.services.task_manager.TaskManager.process_task", autospec=True, side_effect=[True, False])
+    user_message = UserMessage(message="Do something first and then do something else", user_id="test_user")
+    progress = []
+
+    with patch_llm, patch_process:
+        response = process_user_message(config, user_message, lambda done, total, r: progress.append((done, total, r)))
+
+    assert [(done, total, r.processed) for done, total, r in progress] == [(1, 2, True), (2, 2, False)]
+    assert [r for _, _, r in progress] == response
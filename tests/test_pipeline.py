@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from lolibot.services import TaskData
+from lolibot.services.middleware import DateValidationMiddleware, MiddlewarePipeline, Rejection, TitlePrefixTruncateMiddleware
+from lolibot.services.middleware.pipeline import PipelineStats
+
+TOMORROW = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+YESTERDAY = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+class RejectShort:
+    def process(self, message, data):
+        return Rejection("too short") if len(message) < 5 else data
+
+
+class Counting:
+    def __init__(self):
+        self.batches = []
+
+    def process(self, message, data):
+        raise AssertionError("batch implementation not used")
+
+    def process_batch(self, items):
+        self.batches.append(len(items))
+        return [data.replace(description="seen") for _, data in items]
+
+
+def test_run_returns_rejection_instead_of_raising():
+    stats = PipelineStats()
+    pipeline = MiddlewarePipeline([RejectShort(), TitlePrefixTruncateMiddleware("Bot")], stats=stats)
+    result = pipeline.run("hi", TaskData(task_type="task", title="T"))
+    assert not result.ok
+    assert (result.rejection.reason, result.rejected_by) == ("too short", "RejectShort")
+    # The rejection short-circuits the remaining stages
+    assert "TitlePrefixTruncateMiddleware" not in stats.stats()
+    assert stats.stats()["RejectShort"]["rejected"] == 1
+
+
+def test_process_still_raises_value_error_on_rejection():
+    pipeline = MiddlewarePipeline([RejectShort()], stats=PipelineStats())
+    with pytest.raises(ValueError, match="too short"):
+        pipeline.process("hi", TaskData(task_type="task", title="T"))
+
+
+def test_stats_record_latency_per_stage():
+    stats = PipelineStats()
+    pipeline = MiddlewarePipeline([TitlePrefixTruncateMiddleware("Bot")], stats=stats)
+    for _ in range(3):
+        pipeline.process("a message", TaskData(task_type="task", title="T"))
+    stage = stats.stats()["TitlePrefixTruncateMiddleware"]
+    assert stage["items"] == 3 and stage["rejected"] == 0
+    assert stage["avg_ms"] >= 0
+
+
+def test_process_batch_drops_rejected_items_from_later_stages():
+    counting = Counting()
+    stats = PipelineStats()
+    pipeline = MiddlewarePipeline([DateValidationMiddleware(), counting], stats=stats)
+    items = [
+        ("meeting tomorrow", TaskData(task_type="event", title="A", date=TOMORROW)),
+        ("meeting yesterday", TaskData(task_type="event", title="B", date=YESTERDAY)),
+        ("event without date", TaskData(task_type="event", title="C")),
+        ("task", TaskData(task_type="task", title="D")),
+    ]
+    results = pipeline.process_batch(items)
+
+    assert [result.ok for result in results] == [True, False, False, True]
+    assert results[1].rejected_by == "DateValidationMiddleware"
+    assert results[2].rejection.reason == "Event tasks must have a date specified."
+    assert [result.data.description for result in results if result.ok] == ["seen", "seen"]
+    assert counting.batches == [2]
+    stage = stats.stats()["DateValidationMiddleware"]
+    assert (stage["items"], stage["rejected"]) == (4, 2)
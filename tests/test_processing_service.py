@@ -0,0 +1,59 @@
+import pytest
+
+from lolibot.config import BotConfig
+from lolibot.services.middleware import DateValidationMiddleware, NotTaskMiddleWare, TitlePrefixTruncateMiddleware
+from lolibot.services.middleware.registry import build_pipeline
+from lolibot.services.processor import ProcessingServices
+
+CONFIG = """
+bot_name = "TestBot"
+default_timezone = "UTC"
+current_context = "work"
+
+[pipelines]
+processed = ["date_validation", { name = "title_prefix", bot_name = "[bot]" }, { name = "just_me", enabled = false }, "not_task"]
+
+[context.work]
+default_invitees = ["me@example.com"]
+
+[context.personal]
+pipelines = { processed = ["not_task"] }
+"""
+
+
+@pytest.fixture
+def pipelines_config(tmp_path) -> BotConfig:
+    config_path = tmp_path / "config.toml"
+    config_path.write_text(CONFIG)
+    return BotConfig.from_file(config_path)
+
+
+def test_pipelines_follow_the_configuration(pipelines_config):
+    pipeline = build_pipeline(pipelines_config, "processed")
+    assert [type(mw) for mw in pipeline.middlewares] == [DateValidationMiddleware, TitlePrefixTruncateMiddleware, NotTaskMiddleWare]
+    assert pipeline.middlewares[1].bot_name == "[bot]"
+
+    personal = build_pipeline(pipelines_config.snapshot("personal"), "processed")
+    assert [type(mw) for mw in personal.middlewares] == [NotTaskMiddleWare]
+
+
+def test_undeclared_pipelines_use_the_defaults(test_config):
+    assert len(build_pipeline(test_config, "processed").middlewares) == 4
+
+
+def test_unknown_middleware_is_a_configuration_error(tmp_path):
+    config_path = tmp_path / "config.toml"
+    config_path.write_text('bot_name = "TestBot"\n[pipelines]\npre_work = ["spellcheck"]\n')
+    with pytest.raises(ValueError, match="spellcheck"):
+        build_pipeline(BotConfig.from_file(config_path), "pre_work")
+
+
+def test_services_are_reused_per_context(pipelines_config):
+    services = ProcessingServices()
+    work = pipelines_config.snapshot()
+    service = services.for_config(work)
+    assert services.for_config(work) is service
+    assert services.for_config(pipelines_config.snapshot("personal")) is not service
+    # A reloaded configuration for the same context rebuilds its service
+    pipelines_config.contexts = dict(pipelines_config.contexts)
+    assert services.for_config(pipelines_config.snapshot()) is not service
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from telegram.constants import ParseMode
+from telegram.error import RetryAfter, TimedOut
+
+from lolibot.services import TaskData, TaskResponse
+from lolibot.services.chat_contexts import ChatContexts
+from lolibot.services.rate_limit import RateLimiter
+from lolibot.telegram.markdown import MESSAGE_LIMIT, escape
+from lolibot.telegram.message_handler import handler as message_handler
+from lolibot.telegram.progress import ProgressReply
+
+
+def message():
+    message = MagicMock()
+    message.reply_text = AsyncMock()
+    message.reply_markdown_v2 = AsyncMock()
+    return message
+
+
+def edits(message):
+    return [c[0][0] for c in message.reply_text.return_value.edit_text.await_args_list]
+
+
+@pytest.mark.asyncio
+async def test_updates_faster_than_the_interval_are_coalesced():
+    user_message = message()
+    async with ProgressReply(user_message, interval=0.05) as progress:
+        await progress.start("⏳ Processing...")
+
+        def segments():
+            for i in range(20):
+                progress.update([f"step {i}"])
+                time.sleep(0.005)
+
+        await asyncio.to_thread(segments)
+        await asyncio.sleep(0.1)
+
+        # The latest progress is shown, with far fewer edits than updates
+        assert 2 <= progress.edits < 10
+        assert edits(user_message)[-1] == "step 19"
+
+        await progress.finish(["*done*"])
+
+    user_message.reply_text.assert_called_once_with("⏳ Processing...")
+    user_message.reply_text.return_value.edit_text.assert_called_with("*done*", parse_mode=ParseMode.MARKDOWN_V2)
+
+
+@pytest.mark.asyncio
+async def test_a_summary_too_long_for_one_message_continues_in_replies():
+    user_message = message()
+    async with ProgressReply(user_message, interval=0) as progress:
+        await progress.start("⏳ Processing...")
+        progress.update(["ignored without an interval"])
+        await progress.finish([escape("task.") * 600, "\n" + escape("task.") * 600])
+
+    assert progress.edits == 1
+    assert len(edits(user_message)[0]) <= MESSAGE_LIMIT
+    user_message.reply_markdown_v2.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_message_handler_shows_each_segment_as_it_completes(bot_config):
+    update = MagicMock()
+    update.message = message()
+    context = MagicMock()
+    context.application.bot_data = {"chat_contexts": ChatContexts(bot_config), "rate_limiter": RateLimiter(bot_config)}
+    update.message.text = "task1 and task2"
+    responses = [
+        TaskResponse(task=TaskData(task_type="task", title="Task1"), processed=True),
+        TaskResponse(task=None, processed=False, feedback="Error: no date"),
+    ]
+    handler_thread = threading.get_ident()
+    threads = []
+
+    def process(config, user_message, on_segment):
+        threads.append(threading.get_ident())
+        for done, response in enumerate(responses, 1):
+            on_segment(done, len(responses), response)
+            # Slower than the edit interval, so every segment gets its own edit
+            time.sleep(0.1)
+        return responses
+
+    with (
+        patch("lolibot.telegram.message_handler.process_user_message", side_effect=process),
+        patch("lolibot.telegram.message_handler.DEFAULT_PROGRESS_INTERVAL", 0.05),
+    ):
+        await message_handler(update, context)
+
+    # Processing ran off the event loop
+    assert threads and threads[0] != handler_thread
+    update.message.reply_text.assert_called_once_with("⏳ Processing...")
+    assert edits(update.message) == [
+        "⏳ Processing 1/2\\.\\.\\.\n✅ Task1",
+        "⏳ Processing 2/2\\.\\.\\.\n✅ Task1\n>❌ Error: no date",
+        "Processed 1/2 tasks 👍\n✅ Task1\n>❌ Error: no date",
+    ]
+    assert context.application.bot_data["rate_limiter"].stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_edit_errors_never_cost_the_summary():
+    user_message = message()
+    edit_text = user_message.reply_text.return_value.edit_text
+    edit_text.side_effect = RetryAfter(5)
+    async with ProgressReply(user_message, interval=0.01) as progress:
+        await progress.start("⏳ Processing...")
+        progress.update(["step 1"])
+        await asyncio.sleep(0.05)
+
+        # Flood limited, the editor backs off for as long as Telegram asks
+        assert edit_text.call_count == 1
+        await progress.finish(["*done*"])
+
+    # Editing the summary in failed too, so it is sent as a reply
+    assert edit_text.call_count == 2
+    user_message.reply_markdown_v2.assert_called_once_with("*done*")
+
+
+@pytest.mark.asyncio
+async def test_network_errors_during_progress_are_skipped():
+    user_message = message()
+    edit_text = user_message.reply_text.return_value.edit_text
+    edit_text.side_effect = [TimedOut(), None, None]
+    async with ProgressReply(user_message, interval=0.01) as progress:
+        await progress.start("⏳ Processing...")
+        progress.update(["step 1"])
+        await asyncio.sleep(0.05)
+        progress.update(["step 2"])
+        await asyncio.sleep(0.05)
+        await progress.finish(["*done*"])
+
+    assert edits(user_message) == ["step 1", "step 2", "*done*"]
+    user_message.reply_markdown_v2.assert_not_called()
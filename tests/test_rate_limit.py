@@ -0,0 +1,94 @@
+from lolibot.config import BotConfig
+from lolibot.services import rate_limit
+from lolibot.services.rate_limit import DEFAULT_MAX_IN_FLIGHT, RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_config(tmp_path, **settings) -> BotConfig:
+    config_path = tmp_path / "config.toml"
+    config_path.write_text("\n".join(f"{key} = {value}" for key, value in settings.items()))
+    return BotConfig.from_file(config_path)
+
+
+def test_burst_then_refill(tmp_path):
+    clock = FakeClock()
+    limiter = RateLimiter(make_config(tmp_path, rate_limit_user_burst=2, rate_limit_user_per_minute=6), clock=clock)
+
+    assert limiter.admit("u1", "c1").admitted
+    assert limiter.admit("u1", "c1").admitted
+    rejected = limiter.admit("u1", "c1")
+    assert not rejected.admitted
+    assert rejected.reason == "user"
+    assert rejected.retry_after == 10
+
+    # Other users are not affected
+    assert limiter.admit("u2", "c2").admitted
+
+    clock.now += 10
+    assert limiter.admit("u1", "c1").admitted
+
+
+def test_chat_limit_applies_across_users(tmp_path):
+    limiter = RateLimiter(make_config(tmp_path, rate_limit_chat_burst=2), clock=FakeClock())
+
+    assert limiter.admit("u1", "group").admitted
+    assert limiter.admit("u2", "group").admitted
+    rejected = limiter.admit("u3", "group")
+    assert rejected.reason == "chat"
+    assert limiter.stats()["rejected_chat"] == 1
+    # The user bucket was not charged for the rejected message
+    assert limiter.bucket_states()["user:u3"][0] == limiter.user_burst
+
+
+def test_in_flight_cap(tmp_path):
+    limiter = RateLimiter(make_config(tmp_path, max_in_flight_messages=1))
+
+    assert limiter.try_enter()
+    assert not limiter.try_enter()
+    limiter.leave()
+    assert limiter.try_enter()
+    assert limiter.stats()["in_flight"] == 1
+
+
+def test_bucket_states_round_trip(tmp_path):
+    clock = FakeClock()
+    config = make_config(tmp_path, rate_limit_user_burst=1)
+    limiter = RateLimiter(config, clock=clock)
+    limiter.admit("cli_user", "cli")
+
+    restored = RateLimiter(config, limiter.bucket_states(), clock=clock)
+    assert not restored.admit("cli_user", "cli").admitted
+
+
+def test_zero_disables_a_limit(tmp_path):
+    limiter = RateLimiter(make_config(tmp_path, rate_limit_user_burst=0, max_in_flight_messages=0), clock=FakeClock())
+
+    assert all(limiter.admit("u1", f"c{i}").admitted for i in range(limiter.chat_burst * 3))
+    assert all(limiter.try_enter() for _ in range(DEFAULT_MAX_IN_FLIGHT * 3))
+    assert not any(key.startswith("user:") for key in limiter.bucket_states())
+
+
+def test_full_idle_buckets_are_forgotten(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, "MIN_SWEEP_AT", 4)
+    clock = FakeClock()
+    limiter = RateLimiter(make_config(tmp_path, rate_limit_user_burst=2, rate_limit_user_per_minute=6), clock=clock)
+
+    limiter.admit("u1", "c1")
+    limiter.admit("u2", "c2")
+    # A minute later every bucket is full again, and the table reached the sweep threshold
+    clock.now += 60
+    limiter.admit("u2", "c2")
+    limiter.admit("u3", "c3")
+
+    # Only the buckets charged since the sweep are left
+    assert set(limiter.bucket_states()) == {"user:u2", "chat:c2", "user:u3", "chat:c3"}
+    # A forgotten user starts over with a full bucket
+    assert limiter.admit("u1", "c1").admitted
+    assert limiter.bucket_states()["user:u1"][0] == 1
@@ -0,0 +1,107 @@
+import sqlite3
+from datetime import date, timedelta
+
+from click.testing import CliRunner
+
+from lolibot import db
+from lolibot.cli.commands import replay_command
+from lolibot.llm.base import LLMProvider
+from lolibot.services import Extraction, TaskData, TaskResponse
+from lolibot.services import replay as replay_module
+from lolibot.services.replay import Target, load_samples, replay
+
+TODAY = date.today()
+TOMORROW = (TODAY + timedelta(days=1)).isoformat()
+
+
+class FakeProvider(LLMProvider):
+    answer = {"task_type": "task", "title": "buy  Milk", "description": None, "date": TOMORROW, "time": None}
+
+    def __init__(self, config, model=None):
+        self.model = model or "fake-1"
+
+    def name(self):
+        return "Fake"
+
+    def process_text(self, text) -> dict:
+        return dict(self.answer)
+
+    def split_text(self, text) -> list:
+        return [text]
+
+    def check_connection(self):
+        return True
+
+    def enabled(self):
+        return True
+
+
+class BrokenProvider(FakeProvider):
+    def process_text(self, text) -> dict:
+        raise Exception("model overloaded")
+
+
+def store(message="Buy milk tomorrow", title="TestBot Buy milk", task_date=TOMORROW, created_at=None):
+    task = TaskData(task_type="task", title=title, date=task_date)
+    extraction = Extraction({"task_type": "task", "title": "Buy milk"}, "OpenAI", "gpt-4o-mini", 812.5, 2)
+    task_id = db.save_task_to_db("u1", message, TaskResponse(task=task, processed=True, extraction=extraction)).result()
+    if created_at:
+        conn = sqlite3.connect(db.get_db_path())
+        with conn:
+            conn.execute("UPDATE tasks SET created_at = ? WHERE id = ?", (created_at, task_id))
+        conn.close()
+    return task_id
+
+
+def test_extraction_is_stored_with_the_task():
+    task_id = store()
+
+    [sample] = load_samples(10)
+    assert (sample.id, sample.provider, sample.model, sample.latency_ms, sample.prompt_version) == (
+        task_id,
+        "OpenAI",
+        "gpt-4o-mini",
+        812.5,
+        2,
+    )
+    assert db.load_extracted_json(task_id) == {"task_type": "task", "title": "Buy milk"}
+
+
+def test_replay_compares_fields_with_the_stored_tasks(test_config, monkeypatch):
+    monkeypatch.setitem(replay_module.PROVIDERS, "openai", FakeProvider)
+    store()
+    # Asked a week ago for "tomorrow", which is tomorrow again when replayed today
+    store(created_at=f"{TODAY - timedelta(days=7)} 09:00:00", task_date=(TODAY - timedelta(days=6)).isoformat())
+    store(message="Buy milk at 10:00", title="TestBot Buy oat milk")
+
+    [report] = replay(test_config, load_samples(10), [Target("openai", "fake-2")])
+
+    assert (report.model, report.replayed, report.failed, len(report.latencies_ms)) == ("fake-2", 3, 0, 3)
+    assert report.agreement("task_type") == 1.0
+    assert report.agreement("date") == 1.0
+    assert report.agreement("title") == 2 / 3
+    assert report.agreement() == 2 / 3
+
+
+def test_provider_errors_count_as_failures(test_config, monkeypatch):
+    monkeypatch.setitem(replay_module.PROVIDERS, "openai", BrokenProvider)
+    store()
+
+    [report] = replay(test_config, load_samples(10), [Target.parse("openai")])
+
+    # The regex fallback answered instead, which says nothing about the target
+    assert (report.replayed, report.failed, report.latencies_ms) == (1, 1, [])
+    assert report.agreement() is None
+
+
+def test_replay_command(test_config):
+    store()
+
+    result = CliRunner().invoke(replay_command, ["--target", "regex", "--sample", "5"], obj={"config": test_config})
+    assert result.exit_code == 0, result.output
+    assert "Replaying 1 tasks, stored from: OpenAI gpt-4o-mini v2 (1)" in result.output
+    assert "regex" in result.output
+
+    result = CliRunner().invoke(replay_command, ["--target", "mistral"], obj={"config": test_config})
+    assert result.exit_code == 1
+    assert "Unknown provider 'mistral'" in result.output
@@ -0,0 +1,130 @@
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+from click.testing import CliRunner
+
+from lolibot import db
+from lolibot.cli.commands import db_group
+from lolibot.services import Extraction, TaskData, TaskResponse
+from lolibot.services.history import search
+from lolibot.services.retention import archive_old_tasks, compact, idle_maintenance
+
+NOW = datetime(2030, 6, 1, tzinfo=timezone.utc)
+
+
+class DummyConfig:
+    retention_days = 365
+    rejected_retention_days = 30
+
+
+def insert(created_at, message="Book the flights", processed=True, user_id="u1"):
+    conn = sqlite3.connect(db.get_db_path())
+    with conn:
+        task_id = conn.execute(
+            "INSERT INTO tasks (user_id, message, task_type, task_title, created_at, processed) VALUES (?, ?, 'task', ?, ?, ?)",
+            (user_id, message, message[:20], created_at, processed),
+        ).lastrowid
+    conn.close()
+    return task_id
+
+
+def task_ids():
+    conn = sqlite3.connect(db.get_db_path())
+    ids = [row[0] for row in conn.execute("SELECT id FROM tasks ORDER BY id")]
+    conn.close()
+    return ids
+
+
+def test_old_and_rejected_tasks_move_to_the_archive():
+    old = insert("2029-01-10 09:00:00")
+    old_rejected = insert("2029-01-10 10:00:00", message="hello there", processed=False)
+    recent = insert("2030-05-20 09:00:00")
+    recent_rejected = insert("2030-04-01 09:00:00", message="thanks!", processed=False)
+
+    assert archive_old_tasks(DummyConfig(), now=NOW) == 3
+    assert task_ids() == [recent]
+
+    archived = db.load_archived_tasks("2029-01-10")
+    assert [row["id"] for row in archived] == [old, old_rejected]
+    assert archived[0]["message"] == "Book the flights"
+    assert [row["id"] for row in db.load_archived_tasks("2030-04-01")] == [recent_rejected]
+    assert db.load_daily_stats("u1", "2029-01-01") == [("2029-01-10", "task", 2, 1), ("2030-04-01", "task", 1, 0)]
+    # Archived tasks leave the search index with the table
+    assert [entry.id for entry in search("u1", "flights").entries] == [recent]
+
+
+def test_archiving_a_day_twice_merges_it():
+    first = insert("2029-01-10 09:00:00")
+    archive_old_tasks(DummyConfig(), now=NOW)
+    second = insert("2029-01-10 18:00:00")
+    archive_old_tasks(DummyConfig(), now=NOW)
+
+    assert [row["id"] for row in db.load_archived_tasks("2029-01-10")] == [first, second]
+    assert db.load_daily_stats("u1", "2029-01-10") == [("2029-01-10", "task", 2, 2)]
+
+
+def test_zero_retention_keeps_everything():
+    config = DummyConfig()
+    config.retention_days = config.rejected_retention_days = 0
+    insert("2001-01-01 00:00:00", processed=False)
+
+    assert archive_old_tasks(config, now=NOW) == 0
+    assert len(task_ids()) == 1
+
+
+def test_freed_pages_go_back_to_the_file_system():
+    for i in range(300):
+        insert(f"2028-01-{i % 28 + 1:02d} 09:00:00", message=f"Water the plants {i} " * 50)
+    size_before = os.path.getsize(db.get_db_path())
+
+    result = idle_maintenance(DummyConfig(), now=NOW)
+    assert result.archived == 300
+    assert result.size_before == size_before
+    assert result.size_after < result.size_before
+
+    compacted = compact(DummyConfig(), now=NOW)
+    assert compacted.size_after <= result.size_after
+
+
+def test_db_compact_command(test_config):
+    insert("2001-01-01 00:00:00")
+
+    result = CliRunner().invoke(db_group, ["compact"], obj={"config": test_config})
+    assert result.exit_code == 0
+    assert "Archived 1 tasks" in result.output
+    assert task_ids() == []
+
+
+def test_db_stats_and_archived_commands(test_config):
+    insert("2001-01-01 09:00:00")
+    insert("2001-01-01 10:00:00", message="hello there", processed=False)
+    insert("2001-01-02 09:00:00", user_id="u2")
+    CliRunner().invoke(db_group, ["compact"], obj={"config": test_config})
+
+    result = CliRunner().invoke(db_group, ["stats", "--user", "u1"], obj={"config": test_config})
+    assert result.exit_code == 0
+    assert "2001-01-01  task             1       2" in result.output
+    assert "2001-01-02" not in result.output
+
+    result = CliRunner().invoke(db_group, ["archived", "2001-01-01"], obj={"config": test_config})
+    assert result.exit_code == 0
+    assert result.output.splitlines() == ["✅ 09:00 u1: Book the flights", "❌ 10:00 u1: hello there"]
+    result = CliRunner().invoke(db_group, ["archived", "2001-01-02", "--user", "u1"], obj={"config": test_config})
+    assert "No archived tasks on 2001-01-02" in result.output
+
+
+def test_archived_tasks_keep_their_extracted_json():
+    extraction = Extraction({"task_type": "task", "title": "Book the flights"}, "OpenAI", "gpt-4o-mini", 640.0, 2)
+    response = TaskResponse(task=TaskData(task_type="task", title="Book the flights"), processed=True, extraction=extraction)
+    task_id = db.save_task_to_db("u1", "Book the flights", response).result()
+    conn = sqlite3.connect(db.get_db_path())
+    with conn:
+        conn.execute("UPDATE tasks SET created_at = '2029-01-10 09:00:00' WHERE id = ?", (task_id,))
+    conn.close()
+
+    archive_old_tasks(DummyConfig(), now=NOW)
+
+    [archived] = db.load_archived_tasks("2029-01-10")
+    assert archived["extracted_json"] == {"task_type": "task", "title": "Book the flights"}
+    assert (archived["provider"], archived["latency_ms"]) == ("OpenAI", 640.0)
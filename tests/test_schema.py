@@ -0,0 +1,34 @@
+import pytest
+
+from lolibot.llm.schema import TASK_SCHEMA, SchemaValidationError, gemini_schema, task_validator
+
+
+def test_validator_normalizes_answer():
+    task = task_validator.validate(
+        {"task_type": "Event", "title": " Standup ", "date": "2030-01-02", "time": "9:00:00", "duration": "45", "extra": 1}
+    )
+    assert task == {"task_type": "event", "title": "Standup", "description": None, "date": "2030-01-02", "time": "09:00", "duration": 45}
+
+
+def test_validator_reads_missing_nullable_fields_as_null():
+    task = task_validator.validate({"task_type": "task", "title": "Buy milk"})
+    assert task["date"] is None and task["time"] is None and task["duration"] is None
+
+
+def test_validator_reports_every_bad_field():
+    with pytest.raises(SchemaValidationError) as excinfo:
+        task_validator.validate({"task_type": "meeting", "date": "tomorrow", "time": "25:00"})
+    assert [field for field, _ in excinfo.value.errors] == ["task_type", "title", "date", "time"]
+
+
+def test_validator_rejects_non_objects():
+    with pytest.raises(SchemaValidationError):
+        task_validator.validate(["not", "a", "task"])
+
+
+def test_gemini_schema_uses_nullable_flags():
+    schema = gemini_schema()
+    assert schema["properties"]["date"] == {"type": "string", "nullable": True, "description": "YYYY-MM-DD"}
+    assert "additionalProperties" not in schema
+    # The shared schema is left untouched
+    assert TASK_SCHEMA["properties"]["date"]["type"] == ["string", "null"]
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from lolibot.llm.processor import LLMProcessor
+from lolibot.llm.single_flight import SingleFlight
+from lolibot.services import Extraction
+
+
+def wait_for_waiters(single_flight: SingleFlight, count: int):
+    deadline = time.time() + 5
+    while single_flight.stats()["coalesced"] < count:
+        assert time.time() < deadline, "waiters never joined the in-flight call"
+        time.sleep(0.001)
+
+
+def run_concurrently(single_flight: SingleFlight, fn, callers: int):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(single_flight.do("key", fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_callers_share_one_call():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return {"title": "shared", "invitees": []}
+
+    threads, results, errors = run_concurrently(single_flight, slow, callers=4)
+    wait_for_waiters(single_flight, 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert errors == []
+    assert results == [{"title": "shared", "invitees": []}] * 4
+    # Every caller owns its result
+    assert len({id(r) for r in results}) == 4
+    assert single_flight.in_flight() == 0
+
+
+def test_errors_propagate_to_waiters():
+    single_flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("provider down")
+
+    threads, results, errors = run_concurrently(single_flight, failing, callers=3)
+    wait_for_waiters(single_flight, 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == []
+    assert len(errors) == 3
+    assert all(str(e) == "provider down" for e in errors)
+
+
+def test_interrupted_leader_lets_waiter_retry():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    attempts = []
+
+    def interrupted_once():
+        attempts.append(1)
+        if len(attempts) == 1:
+            release.wait(5)
+            raise KeyboardInterrupt()
+        return "second attempt"
+
+    leader_outcome = []
+
+    def leader():
+        try:
+            single_flight.do("key", interrupted_once)
+        except KeyboardInterrupt:
+            leader_outcome.append("interrupted")
+
+    leader_thread = threading.Thread(target=leader)
+    leader_thread.start()
+    while single_flight.in_flight() == 0:
+        time.sleep(0.001)
+
+    threads, results, errors = run_concurrently(single_flight, interrupted_once, callers=1)
+    wait_for_waiters(single_flight, 1)
+    release.set()
+    for thread in [leader_thread, *threads]:
+        thread.join()
+
+    assert leader_outcome == ["interrupted"]
+    assert results == ["second attempt"]
+    assert len(attempts) == 2
+
+
+@pytest.mark.asyncio
+async def test_processor_coalesces_async_callers(test_config):
+    processor = LLMProcessor(test_config, single_flight=SingleFlight())
+    calls = []
+
+    def slow_process(text):
+        calls.append(text)
+        time.sleep(0.1)
+        return Extraction({"task_type": "task", "title": text})
+
+    processor._process_text = slow_process
+    results = await asyncio.gather(
+        processor.process_text_async("buy  milk tomorrow"),
+        processor.process_text_async("buy milk tomorrow "),
+    )
+
+    assert len(calls) == 1
+    assert results[0] == results[1]
+
+
+def test_processor_keys_on_operation_and_context(test_config, multi_contexts_config):
+    processor = LLMProcessor(test_config)
+    other_context = LLMProcessor(multi_contexts_config)
+
+    assert processor._flight_key("split", "text") != processor._flight_key("process", "text")
+    assert processor._flight_key("process", "a  b") == processor._flight_key("process", "a b")
+    assert processor._flight_key("process", "text") != other_context._flight_key("process", "text")
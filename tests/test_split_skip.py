@@ -0,0 +1,51 @@
+import pytest
+
+from lolibot.llm.fast_path import FastPathStats
+from lolibot.llm.processor import LLMProcessor
+
+# Compound messages: skipping the LLM splitter for any of these would lose tasks
+MUST_NOT_SKIP = [
+    "Buy milk, call mom, send email",
+    "Comprar leche y llamar a mamá",
+    "Meeting at 10:30, call mom at 11:15",
+    "Standup at 10:00 retro at 16:00",
+    "Send the report tomorrow. Call Ana on friday",
+    "Meeting tomorrow at 10:00 call bob friday",
+    "Dentist on monday gym on wednesday",
+    "Reunión el 2030-01-10 revisión el 2030-01-12",
+    "Prepare slides then send them to Ana",
+    "Llamar a Pedro luego enviar el informe",
+    "Buy milk\nCall mom",
+    "Review PR also update the changelog",
+    "crear una reunión el próximo martes a las 10h además enviar el informe",
+]
+
+SINGLE_CLAUSE = [
+    "Buy milk",
+    "reunión con Ana el 2025-11-03 a las 10:00",
+    "Meeting with the design team tomorrow at 14:00",
+    "Call mom on friday at 9pm",
+    "Dentist next monday 12:30",
+]
+
+
+@pytest.mark.parametrize("text", MUST_NOT_SKIP)
+def test_compound_messages_are_not_skipped(provider, text):
+    assert not provider.is_single_clause(text)
+
+
+@pytest.mark.parametrize("text", SINGLE_CLAUSE)
+def test_single_clause_messages_are_skipped(provider, text):
+    assert provider.is_single_clause(text)
+
+
+def test_processor_skips_split_call_and_reports_rate(test_config):
+    processor = LLMProcessor(test_config)
+    processor.fast_path_stats = FastPathStats()
+    llm_calls = []
+    processor._split_text = lambda text: llm_calls.append(text) or ["Buy milk", "call mom"]
+
+    assert processor.split_text("Buy milk tomorrow") == ["Buy milk tomorrow"]
+    assert processor.split_text("Buy milk and call mom") == ["Buy milk", "call mom"]
+    assert llm_calls == ["Buy milk and call mom"]
+    assert processor.fast_path_stats.stats()["split_skip_rate"] == 0.5
@@ -24,7 +24,9 @@ def test_status_service_types(provider_factory, test_config: BotConfig):
         provider_factory(False, True),  # Warning
         provider_factory(False, False),  # Warning
     ]
-    llm_procesor_mock = patch("lolibot.services.status.LLMProcessor", autospec=True, return_value=providers_mock)
+    services_mock = MagicMock()
+    services_mock.for_config.return_value.llm_processor = providers_mock
+    llm_procesor_mock = patch("lolibot.services.status.processing_services", services_mock)
     with llm_procesor_mock, google_services_mock:
         items = status_service(test_config)
 
@@ -0,0 +1,45 @@
+import copy
+import dataclasses
+import pickle
+
+import pytest
+
+from lolibot.services import TaskData
+
+
+def test_task_data_is_immutable():
+    data = TaskData(task_type="task", title="Buy milk")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        data.title = "Buy bread"
+
+
+def test_replace_keeps_every_other_field():
+    data = TaskData(
+        task_type="event", title="Standup", description="desc", date="2030-01-02", time="10:00", invitees=["a@example.com"], duration=15
+    )
+    replaced = data.replace(title="Daily standup")
+    assert replaced == dataclasses.replace(data, title="Daily standup")
+    assert data.title == "Standup"
+
+
+def test_replace_rejects_unknown_fields():
+    with pytest.raises(TypeError):
+        TaskData(task_type="task", title="Buy milk").replace(priority="high")
+
+
+def test_task_types_are_interned():
+    event = TaskData(task_type="event", title="b").task_type
+    assert TaskData(task_type="".join(["ev", "ent"]), title="a").task_type is event
+    assert TaskData(task_type="task", title="a").replace(task_type="".join(["ev", "ent"])).task_type is event
+
+
+def test_db_row_layout():
+    data = TaskData(task_type="task", title="Buy milk", description="desc", date="2030-01-02", time="10:00", duration=5)
+    assert data.db_row() == ("task", "Buy milk", "desc", "2030-01-02", "10:00")
+
+
+def test_copies_and_pickles_are_task_data():
+    data = TaskData(task_type="event", title="Standup", date="2030-01-02", invitees=["a@example.com"], duration=15)
+    for copied in (copy.copy(data), copy.deepcopy(data), pickle.loads(pickle.dumps(data))):
+        assert type(copied) is TaskData
+        assert copied == data
@@ -1,7 +1,14 @@
+import asyncio
 import time
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
+from telegram.constants import ParseMode
+from telegram.error import BadRequest
+from telegram.ext import CommandHandler
+from lolibot.config import BotConfig
 from lolibot.services import TaskData
+from lolibot.services.chat_contexts import ChatContexts
+from lolibot.services.rate_limit import RateLimiter
 from lolibot.services.processor import TaskResponse
 from lolibot.telegram.start_command import command as start_command
 from lolibot.telegram.help_command import command as help_command
@@ -10,7 +17,15 @@ from lolibot.telegram.get_context_command import command as get_context_command
 from lolibot.telegram.set_context_command import command as set_context_command
 from lolibot.telegram.error_handler import handler as error_handler
 from lolibot.telegram.message_handler import handler as message_handler
-from lolibot.telegram.bot import run_telegram_bot
+from lolibot.telegram.bot import (
+    CONCURRENT_UPDATES,
+    SharedRequest,
+    bots_by_token,
+    create_application,
+    run_all_telegram_bots,
+    run_telegram_bot,
+)
+from lolibot.telegram.host import HostMemory
 
 
 def test_bot_start_fails_no_token(test_config):
@@ -58,7 +73,12 @@ async def test_help_command(bot_config):
 async def test_status_command(bot_config, provider_factory):
     update = MagicMock()
     context = MagicMock()
-    context.application.bot_data = {"config": bot_config, "start_time": time.time() - 1}
+    context.application.bot_data = {
+        "config": bot_config,
+        "chat_contexts": ChatContexts(bot_config),
+        "rate_limiter": RateLimiter(bot_config),
+        "start_time": time.time() - 1,
+    }
     update.message.reply_markdown_v2 = AsyncMock()
 
     # TODO - mock google services
@@ -82,7 +102,9 @@ async def test_status_command(bot_config, provider_factory):
         provider_factory(False, True),  # Warning
         provider_factory(False, False),  # Warning
     ]
-    llm_procesor_mock = patch("lolibot.services.status.LLMProcessor", autospec=True, return_value=providers_mock)
+    services_mock = MagicMock()
+    services_mock.for_config.return_value.llm_processor = providers_mock
+    llm_procesor_mock = patch("lolibot.services.status.processing_services", services_mock)
 
     with llm_procesor_mock, google_services_mock:
         await status_command(update, context)
@@ -98,7 +120,11 @@ async def test_status_command(bot_config, provider_factory):
 async def test_get_context_command(bot_config):
     update = MagicMock()
     context = MagicMock()
-    context.application.bot_data = {"config": bot_config}
+    context.application.bot_data = {
+        "config": bot_config,
+        "chat_contexts": ChatContexts(bot_config),
+        "rate_limiter": RateLimiter(bot_config),
+    }
     update.message.reply_markdown_v2 = AsyncMock()
     await get_context_command(update, context)
     update.message.reply_markdown_v2.assert_called_once()
@@ -109,7 +135,11 @@ async def test_set_context_command_success(bot_config):
     update = MagicMock()
     update.message.text = "set_work"
     context = MagicMock()
-    context.application.bot_data = {"config": bot_config}
+    context.application.bot_data = {
+        "config": bot_config,
+        "chat_contexts": ChatContexts(bot_config),
+        "rate_limiter": RateLimiter(bot_config),
+    }
     update.message.reply_text = AsyncMock()
     await set_context_command(update, context)
     update.message.reply_text.assert_called()
@@ -120,7 +150,11 @@ async def test_set_context_command_error(bot_config):
     update = MagicMock()
     update.message.text = "set_invalid"
     context = MagicMock()
-    context.application.bot_data = {"config": bot_config}
+    context.application.bot_data = {
+        "config": bot_config,
+        "chat_contexts": ChatContexts(bot_config),
+        "rate_limiter": RateLimiter(bot_config),
+    }
     update.message.reply_text = AsyncMock()
     await set_context_command(update, context)
     update.message.reply_text.assert_called()
@@ -130,7 +164,11 @@ async def test_set_context_command_error(bot_config):
 async def test_error_handler_with_feedback(bot_config):
     update = MagicMock()
     context = MagicMock()
-    context.application.bot_data = {"config": bot_config}
+    context.application.bot_data = {
+        "config": bot_config,
+        "chat_contexts": ChatContexts(bot_config),
+        "rate_limiter": RateLimiter(bot_config),
+    }
     context.error = Exception("fail")
     context.error.__traceback__ = None
     context.bot.send_message = AsyncMock()
@@ -155,7 +193,11 @@ async def test_error_handler_no_feedback(test_config):
 async def test_message_handler_multi_task_success(bot_config):
     update = MagicMock()
     context = MagicMock()
-    context.application.bot_data = {"config": bot_config}
+    context.application.bot_data = {
+        "config": bot_config,
+        "chat_contexts": ChatContexts(bot_config),
+        "rate_limiter": RateLimiter(bot_config),
+    }
     update.message.text = "do task1 and task2"
     update.message.reply_markdown_v2 = AsyncMock()
     update.message.reply_text = AsyncMock()
@@ -175,17 +217,27 @@ async def test_message_handler_multi_task_success(bot_config):
     with mock_process:
         await message_handler(update, context)
 
-    assert update.message.reply_markdown_v2.call_count == 3
+    # One acknowledgement, edited into the summary with both tasks
+    update.message.reply_text.assert_called_once_with("⏳ Processing...")
+    update.message.reply_markdown_v2.assert_not_called()
+    acknowledgement = update.message.reply_text.return_value
+    acknowledgement.edit_text.assert_called_with("Processed 2/2 tasks 👍\n✅ Task1\n✅ Task2", parse_mode=ParseMode.MARKDOWN_V2)
 
 
 @pytest.mark.asyncio
 async def test_message_handler_fallback(bot_config):
     update = MagicMock()
     context = MagicMock()
-    context.application.bot_data = {"config": bot_config}
+    context.application.bot_data = {
+        "config": bot_config,
+        "chat_contexts": ChatContexts(bot_config),
+        "rate_limiter": RateLimiter(bot_config),
+    }
     update.message.text = "do task1 and task2"
-    update.message.reply_markdown_v2 = AsyncMock(side_effect=Exception("fail"))
+    update.message.reply_markdown_v2 = AsyncMock()
     update.message.reply_text = AsyncMock()
+    acknowledgement = update.message.reply_text.return_value
+    acknowledgement.edit_text.side_effect = [BadRequest("Can't parse entities"), None]
 
     task = TaskData(task_type="task", title="Task1", description="desc1", date="2025-05-23", time="12:00", invitees=["me"])
     message = "Successfully created: Task1"
@@ -196,15 +248,21 @@ async def test_message_handler_fallback(bot_config):
     with mock_process:
         await message_handler(update, context)
 
-    assert update.message.reply_markdown_v2.call_count == 2
-    assert update.message.reply_text.call_count == 2
+    # Rejected as MarkdownV2, the summary is edited again without the markup
+    assert acknowledgement.edit_text.call_count == 2
+    acknowledgement.edit_text.assert_called_with("Processed 1/1 tasks 👍\n✅ Task1")
+    update.message.reply_markdown_v2.assert_not_called()
 
 
 @pytest.mark.asyncio
 async def test_message_handler_with_failed_tasks(bot_config):
     update = MagicMock()
     context = MagicMock()
-    context.application.bot_data = {"config": bot_config}
+    context.application.bot_data = {
+        "config": bot_config,
+        "chat_contexts": ChatContexts(bot_config),
+        "rate_limiter": RateLimiter(bot_config),
+    }
     update.message.text = "do task1, invalid task and duplicate task1"
     update.message.reply_markdown_v2 = AsyncMock()
     update.message.reply_text = AsyncMock()
@@ -224,12 +282,147 @@ async def test_message_handler_with_failed_tasks(bot_config):
     with mock_process:
         await message_handler(update, context)
 
-    assert update.message.reply_markdown_v2.call_count == 4
-    update.message.reply_text.assert_not_called()
+    update.message.reply_markdown_v2.assert_not_called()
+    update.message.reply_text.assert_called_once()
 
     # Verify the response includes failure messages
-    response = " ".join(c[0][0] for c in update.message.reply_markdown_v2.await_args_list)
+    response = update.message.reply_text.return_value.edit_text.call_args[0][0]
     assert "Processed 1/3 tasks" in response
     assert "✅ Task1" in response
     assert "❌ Error: Invalid date format" in response
     assert "❌ Skipped duplicate task" in response
+
+
+@pytest.mark.asyncio
+async def test_message_handler_rate_limited(bot_config):
+    update = MagicMock()
+    context = MagicMock()
+    limiter = RateLimiter(bot_config)
+    context.application.bot_data = {"config": bot_config, "chat_contexts": ChatContexts(bot_config), "rate_limiter": limiter}
+    update.message.text = "do task1"
+    update.message.reply_markdown_v2 = AsyncMock()
+    update.message.reply_text = AsyncMock()
+
+    task = TaskData(task_type="task", title="Task1", description="desc1", date="2025-05-23", time="12:00")
+    mock_process = patch(
+        "lolibot.telegram.message_handler.process_user_message",
+        return_value=[TaskResponse(task=task, processed=True, feedback="ok")],
+    )
+    with mock_process as process:
+        for _ in range(limiter.user_burst + 1):
+            await message_handler(update, context)
+
+    assert process.call_count == limiter.user_burst
+    assert "Too many messages" in update.message.reply_text.call_args[0][0]
+    assert limiter.stats()["rejected_user"] == 1
+    assert limiter.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_message_handler_queues_messages_beyond_the_in_flight_cap(bot_config):
+    limiter = RateLimiter(bot_config)
+    limiter.max_in_flight = 1
+    context = MagicMock()
+    context.application.bot_data = {"config": bot_config, "chat_contexts": ChatContexts(bot_config), "rate_limiter": limiter}
+    updates = []
+    for user_id in (1, 2):
+        update = MagicMock()
+        update.effective_user.id = user_id
+        update.message.text = "do task1"
+        update.message.reply_text = AsyncMock()
+        updates.append(update)
+
+    task = TaskData(task_type="task", title="Task1")
+
+    def process(config, user_message, on_segment):
+        time.sleep(0.1)
+        return [TaskResponse(task=task, processed=True)]
+
+    with (
+        patch("lolibot.telegram.message_handler.process_user_message", side_effect=process),
+        patch("lolibot.telegram.message_handler.QUEUE_POLL_SECONDS", 0.01),
+    ):
+        await asyncio.gather(*(message_handler(update, context) for update in updates))
+
+    first, second = (update.message.reply_text.call_args_list for update in updates)
+    assert [c[0][0] for c in first] == ["⏳ Processing..."]
+    assert [c[0][0] for c in second] == ["⏳ Busy right now, your message is queued."]
+    # The queued notice is the acknowledgement, edited once a slot is free and again into the summary
+    edits = [c[0][0] for c in updates[1].message.reply_text.return_value.edit_text.call_args_list]
+    assert edits[0] == "⏳ Processing..."
+    assert edits[-1] == "Processed 1/1 tasks 👍\n✅ Task1"
+    assert limiter.stats()["queued"] == 1
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_bots_handle_updates_concurrently(bot_config):
+    application = create_application(bot_config)
+    assert application.concurrent_updates == CONCURRENT_UPDATES > application.bot_data["rate_limiter"].max_in_flight
+
+
+@pytest.fixture
+def tokens_config(tmp_path):
+    config_path = tmp_path / "tokens_config.toml"
+    config_path.write_text(
+        """
+        bot_name = "TestBot"
+        current_context = "personal"
+        telegram_bot_token = "1:shared"
+        max_in_flight_messages = 3
+
+        [context.work]
+        telegram_bot_token = "2:work"
+
+        [context.personal]
+
+        [context.family]
+        telegram_bot_token = "3:family"
+        """
+    )
+    return BotConfig.from_file(config_path)
+
+
+def test_contexts_are_grouped_by_token(tokens_config):
+    assert bots_by_token(tokens_config) == {"2:work": ["work"], "1:shared": ["personal"], "3:family": ["family"]}
+
+
+def test_all_contexts_share_one_process(tokens_config):
+    served = []
+
+    async def fake_serve(config, applications):
+        served.extend(applications)
+
+    with patch("lolibot.telegram.bot.serve", fake_serve):
+        run_all_telegram_bots(tokens_config)
+
+    assert [application.bot.token for application in served] == ["2:work", "1:shared", "3:family"]
+    work, personal, family = served
+    assert work.bot_data["config"].current_context == "work"
+    assert work.bot_data["chat_contexts"].contexts == ["work"]
+    assert family.bot_data["chat_contexts"].get(1) == "family"
+    # One limiter, one Bot API connection pool and one memory account for all of them
+    assert work.bot_data["rate_limiter"] is family.bot_data["rate_limiter"]
+    assert work.bot.request is personal.bot.request is family.bot.request
+    assert len(work.bot_data["host"].added) == 3
+    assert any(handler.commands == frozenset({"set_work"}) for handler in work.handlers[0] if isinstance(handler, CommandHandler))
+
+
+def test_host_memory_reports_the_cost_of_additional_bots():
+    host = HostMemory(added=[40 * 2**20, 3 * 2**20, 5 * 2**20])
+    assert host.per_additional_bot() == 4 * 2**20
+    assert host.summary().startswith("3 bots in this process, ")
+    assert host.summary().endswith(", 4.0 MiB per additional bot")
+    assert "per additional bot" not in HostMemory(added=[40 * 2**20]).summary()
+
+
+@pytest.mark.asyncio
+async def test_shared_request_outlives_each_bot_shutdown():
+    request = SharedRequest()
+    await request.initialize()
+
+    # What Application.shutdown() does to its bot's request
+    await request.shutdown()
+    assert not request._client.is_closed
+
+    await request.close()
+    assert request._client.is_closed
@@ -1,6 +1,7 @@
 from unittest.mock import AsyncMock
 import pytest
 
+from lolibot.services.chat_contexts import ChatContexts
 from lolibot.telegram.get_context_command import command as get_context_command
 from types import SimpleNamespace
 
@@ -14,7 +15,7 @@ async def test_get_context_command(multi_contexts_config):
 
     context_ns = SimpleNamespace()
     context_ns.application = SimpleNamespace()
-    context_ns.application.bot_data = {"config": multi_contexts_config}
+    context_ns.application.bot_data = {"config": multi_contexts_config, "chat_contexts": ChatContexts(multi_contexts_config)}
 
     await get_context_command(mock_update, context_ns)
 
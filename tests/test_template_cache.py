@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+from lolibot.llm.default import DefaultProvider
+from lolibot.llm.processor import LLMProcessor
+from lolibot.llm.template_cache import TemplateCache
+
+SCOPE = ("default", 1)
+
+
+def future(days: int) -> str:
+    return (datetime.now() + timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def test_mask_temporal(provider: DefaultProvider):
+    tomorrow = provider.mask_temporal("Standup tomorrow at 10:00")
+    iso = provider.mask_temporal(f"standup  {future(3)} at 10:30")
+
+    assert tomorrow.masked == "standup <date> at <time>"
+    assert tomorrow.masked == iso.masked
+    assert tomorrow.date == future(1)
+    assert tomorrow.time == "10:00"
+    assert iso.date_text == future(3)
+    assert iso.time == "10:30"
+
+
+def test_hit_refills_date_and_time(provider: DefaultProvider):
+    cache = TemplateCache()
+    first = provider.mask_temporal("Standup tomorrow at 10:00")
+    llm_result = {
+        "task_type": "event",
+        "title": "Standup",
+        "description": "Standup tomorrow at 10:00",
+        "date": future(1),
+        "time": "10:00",
+        "duration": 15,
+    }
+    assert cache.store(first, SCOPE, llm_result)
+
+    second = provider.mask_temporal(f"standup {future(4)} at 09:45")
+    result = cache.lookup(second, SCOPE)
+    assert result == {
+        "task_type": "event",
+        "title": "Standup",
+        "description": f"Standup {future(4)} at 09:45",
+        "date": future(4),
+        "time": "09:45",
+        "duration": 15,
+    }
+    assert cache.lookup(second, ("other", 1)) is None
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+def test_disagreeing_extractions_are_not_cached(provider: DefaultProvider):
+    cache = TemplateCache()
+    mask = provider.mask_temporal("Standup tomorrow at 10")
+    # The parser does not understand "at 10", so it could not re-fill the time on a hit
+    assert not cache.store(mask, SCOPE, {"task_type": "event", "title": "Standup", "date": future(1), "time": "10:00"})
+    assert cache.stats()["not_cacheable"] == 1
+
+
+def test_cache_is_bounded(provider: DefaultProvider):
+    cache = TemplateCache(max_size=2)
+    for text in ["call ana", "call bob", "call eve"]:
+        mask = provider.mask_temporal(text)
+        cache.store(mask, SCOPE, {"task_type": "task", "title": text, "date": mask.date, "time": None})
+    assert cache.stats()["size"] == 2
+    assert cache.lookup(provider.mask_temporal("call ana"), SCOPE) is None
+
+
+def test_processor_skips_llm_on_hit_and_verifies(test_config):
+    processor = LLMProcessor(test_config, template_cache=TemplateCache())
+    calls = []
+
+    def fake_providers(text):
+        calls.append(text)
+        return {"task_type": "event", "title": "Standup", "date": future(1), "time": "10:00"}, processor.providers[0]
+
+    processor._process_text_with_providers = fake_providers
+    processor.process_text("Standup tomorrow at 10:00")
+    result = processor.process_text("Standup tomorrow at 11:00")
+    assert len(calls) == 1
+    assert result["time"] == "11:00"
+
+    # With verification on, hits are checked against a fresh call
+    processor.template_cache_verify_rate = 1.0
+    processor.process_text("Standup tomorrow at 10:00")
+    assert len(calls) == 2
+    assert processor.template_cache.stats()["accuracy"] == 1.0
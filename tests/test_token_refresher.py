@@ -0,0 +1,91 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+from lolibot.google_api import save_token
+from lolibot.services.token_refresher import TokenRefresher
+
+NOW = datetime(2030, 1, 1, 12, 0)
+
+
+class FakeCreds:
+    def __init__(self, expiry, refresh_token="refresh"):
+        self.expiry = expiry
+        self.refresh_token = refresh_token
+
+    def to_json(self):
+        return json.dumps({"expiry": self.expiry.isoformat()})
+
+
+def make_refresher(credentials, refresh):
+    return TokenRefresher(margin=300, credentials=lambda: credentials, refresh=refresh, clock=lambda: NOW)
+
+
+def test_refreshes_only_tokens_about_to_expire():
+    refreshed = []
+
+    def refresh(creds, token_file):
+        refreshed.append(token_file)
+        creds.expiry = NOW + timedelta(hours=1)
+
+    credentials = {
+        ("work", "calendar"): (FakeCreds(NOW + timedelta(minutes=2)), "calendar.json"),
+        ("work", "tasks"): (FakeCreds(NOW + timedelta(minutes=30)), "tasks.json"),
+    }
+    refresher = make_refresher(credentials, refresh)
+    refresher.check_once()
+
+    assert refreshed == ["calendar.json"]
+    states = refresher.status("work")
+    assert states[("work", "calendar")].expiry == NOW + timedelta(hours=1)
+    assert states[("work", "calendar")].refreshed_at is not None
+    assert states[("work", "tasks")].refreshed_at is None
+
+
+def test_refresh_failures_are_kept_for_status():
+    def refresh(creds, token_file):
+        raise RuntimeError("invalid_grant")
+
+    credentials = {
+        ("work", "calendar"): (FakeCreds(NOW - timedelta(minutes=1)), "calendar.json"),
+        ("home", "tasks"): (FakeCreds(None, refresh_token=None), "tasks.json"),
+    }
+    refresher = make_refresher(credentials, refresh)
+    refresher.check_once()
+
+    assert refresher.status("work")[("work", "calendar")].error == "invalid_grant"
+    assert "log in again" in refresher.status("home")[("home", "tasks")].error
+
+
+def test_status_does_not_wait_for_a_slow_refresh():
+    refreshing, release = threading.Event(), threading.Event()
+
+    def refresh(creds, token_file):
+        refreshing.set()
+        release.wait(timeout=5)
+        creds.expiry = NOW + timedelta(hours=1)
+
+    credentials = {("work", "calendar"): (FakeCreds(NOW + timedelta(minutes=2)), "calendar.json")}
+    refresher = make_refresher(credentials, refresh)
+    check = threading.Thread(target=refresher.check_once)
+    check.start()
+    assert refreshing.wait(timeout=5)
+
+    # Answered while the token endpoint is still busy, with what was known before
+    started = time.perf_counter()
+    assert refresher.status("work")[("work", "calendar")].refreshed_at is None
+    assert time.perf_counter() - started < 1
+
+    release.set()
+    check.join()
+    assert refresher.status("work")[("work", "calendar")].expiry == NOW + timedelta(hours=1)
+
+
+def test_save_token_replaces_the_file_atomically(tmp_path):
+    token_file = tmp_path / "creds" / "token_calendar.json"
+    token_file.parent.mkdir()
+    token_file.write_text("old")
+    save_token(token_file, FakeCreds(NOW))
+    assert json.loads(token_file.read_text()) == {"expiry": NOW.isoformat()}
+    assert [path.name for path in token_file.parent.iterdir()] == ["token_calendar.json"]
@@ -0,0 +1,40 @@
+import threading
+
+from lolibot.llm import AnthropicProvider, GeminiProvider, OpenAIProvider
+from lolibot.services import warmup
+
+
+def test_warm_up_reaches_every_enabled_target_concurrently(monkeypatch, test_config):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def check_connection(self):
+        # Only passes if the three providers are pinged at the same time
+        barrier.wait()
+        return True
+
+    for provider in (OpenAIProvider, AnthropicProvider, GeminiProvider):
+        monkeypatch.setattr(provider, "check_connection", check_connection)
+    monkeypatch.setattr(warmup, "_ping_google", lambda config, service_name: True)
+
+    results = warmup.warm_up(test_config.snapshot())
+    targets = sorted(result.target for result in results)
+    assert targets == ["Anthropic", "Gemini Flash 2.5", "Google calendar", "Google tasks", "OpenAI", "Regex parser"]
+    assert all(result.ok for result in results)
+
+
+def test_warm_up_reports_failures_without_raising(monkeypatch, test_config):
+    def broken(self):
+        raise ConnectionError("unreachable")
+
+    def no_token(config, service_name):
+        raise RuntimeError("no token")
+
+    for provider in (OpenAIProvider, AnthropicProvider, GeminiProvider):
+        monkeypatch.setattr(provider, "check_connection", broken)
+    monkeypatch.setattr(warmup, "get_google_service", no_token)
+
+    results = {result.target: result for result in warmup.keep_alive(test_config.snapshot())}
+    assert "Regex parser" not in results
+    assert results["OpenAI"].error == "unreachable"
+    assert results["Google calendar"].error == "no token"
+    assert not any(result.ok for result in results.values())